@@ -66,6 +66,17 @@ class Assignment(keystone_assignment.Driver):
             assignments = query.all()
             return [assignment.actor_id for assignment in assignments]
 
+    def list_user_ids_for_projects(self, project_ids):
+        user_ids = set()
+        with sql.transaction() as session:
+            for batch in sql.in_clause_batches(project_ids):
+                query = session.query(RoleAssignment.actor_id)
+                query = query.filter_by(type=AssignmentType.USER_PROJECT)
+                query = query.filter(RoleAssignment.target_id.in_(batch))
+                query = query.distinct()
+                user_ids.update(assignment.actor_id for assignment in query)
+        return list(user_ids)
+
     def _get_metadata(self, user_id=None, tenant_id=None,
                       domain_id=None, group_id=None, session=None):
         # TODO(henry-nash): This method represents the last vestiges of the old
@@ -447,6 +447,8 @@ class RoleAssignmentV3(controller.V3Controller):
 
     collection_name = 'role_assignments'
     member_name = 'role_assignment'
+    # Role assignments have no ID to page by.
+    marker_pagination = False
 
     @classmethod
     def wrap_member(cls, context, ref):
@@ -15,6 +15,7 @@
 """Main entry point into the Assignment service."""
 
 import abc
+import uuid
 
 from oslo_config import cfg
 from oslo_log import log
@@ -70,6 +71,7 @@ def deprecated_to_resource_api(f):
     return wrapper()
 
 
+@notifications.listener
 @dependency.provider('assignment_api')
 @dependency.requires('credential_api', 'identity_api', 'resource_api',
                      'revoke_api', 'role_api')
@@ -100,6 +102,47 @@ class Manager(manager.Manager):
 
         super(Manager, self).__init__(assignment_driver)
 
+        self.event_callbacks = {
+            notifications.ACTIONS.internal: {
+                notifications.INVALIDATE_USER_TOKEN_PERSISTENCE: [
+                    self._user_roles_changed],
+                notifications.INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE: [
+                    self._user_project_roles_changed],
+            },
+        }
+
+    def _user_roles_changed(self, service, resource_type, operation,
+                            payload):
+        self.invalidate_user_roles(payload['resource_info'])
+
+    def _user_project_roles_changed(self, service, resource_type, operation,
+                                    payload):
+        self.invalidate_user_roles(payload['resource_info']['user_id'])
+
+    @MEMOIZE
+    def _get_assignment_generation(self):
+        # NOTE: The effective roles of every user are cached under this
+        # generation (and the per-user one below), so replacing it drops all
+        # of them without having to know which entries exist.
+        return uuid.uuid4().hex
+
+    @MEMOIZE
+    def _get_user_assignment_generation(self, user_id):
+        return uuid.uuid4().hex
+
+    def invalidate_user_roles(self, user_id=None):
+        """Invalidate the cached effective roles of a user.
+
+        Changes that cannot be attributed to a single user (group grants,
+        deleted projects or roles) should omit ``user_id``, which invalidates
+        the effective roles of every user.
+
+        """
+        if user_id is None:
+            self._get_assignment_generation.invalidate(self)
+        else:
+            self._get_user_assignment_generation.invalidate(self, user_id)
+
     def _get_group_ids_for_user_id(self, user_id):
         # TODO(morganfainberg): Implement a way to get only group_ids
         # instead of the more expensive to_dict() call for each record.
@@ -110,6 +153,15 @@ class Manager(manager.Manager):
         self.resource_api.get_project(tenant_id)
         return self.driver.list_user_ids_for_project(tenant_id)
 
+    def list_user_ids_for_projects(self, project_ids):
+        """List the IDs of users with a role assignment on any of projects.
+
+        Unlike ``list_user_ids_for_project``, the projects are not looked
+        up first, so that the users of many projects can be found at once.
+
+        """
+        return self.driver.list_user_ids_for_projects(list(project_ids))
+
     def _list_parent_ids_of_project(self, project_id):
         if CONF.os_inherit.enabled:
             return [x['id'] for x in (
@@ -130,6 +182,18 @@ class Manager(manager.Manager):
                  keystone.exception.ProjectNotFound
 
         """
+        # NOTE: The project is looked up outside of the cached call so that
+        # a deleted project is still reported as such.
+        self.resource_api.get_project(tenant_id)
+        return list(self._get_roles_for_user_and_project(
+            user_id, tenant_id, CONF.os_inherit.enabled,
+            self._get_assignment_generation(),
+            self._get_user_assignment_generation(user_id)))
+
+    @MEMOIZE
+    def _get_roles_for_user_and_project(self, user_id, tenant_id,
+                                        inherit_enabled, generation,
+                                        user_generation):
         def _get_group_project_roles(user_id, project_ref):
             group_ids = self._get_group_ids_for_user_id(user_id)
             return self.list_role_ids_for_groups_on_project(
@@ -181,7 +245,14 @@ class Manager(manager.Manager):
                  keystone.exception.DomainNotFound
 
         """
+        self.resource_api.get_domain(domain_id)
+        return list(self._get_roles_for_user_and_domain(
+            user_id, domain_id, self._get_assignment_generation(),
+            self._get_user_assignment_generation(user_id)))
 
+    @MEMOIZE
+    def _get_roles_for_user_and_domain(self, user_id, domain_id, generation,
+                                       user_generation):
         def _get_group_domain_roles(user_id, domain_id):
             role_list = []
             group_ids = self._get_group_ids_for_user_id(user_id)
@@ -211,7 +282,6 @@ class Manager(manager.Manager):
             return self._roles_from_role_dicts(
                 metadata_ref.get('roles', {}), False)
 
-        self.resource_api.get_domain(domain_id)
         user_role_list = _get_user_domain_roles(user_id, domain_id)
         group_role_list = _get_group_domain_roles(user_id, domain_id)
         # Use set() to process the list to remove any duplicates
@@ -264,6 +334,7 @@ class Manager(manager.Manager):
                 user_id,
                 tenant_id,
                 CONF.member_role_id)
+        self.invalidate_user_roles(user_id)
 
     @notifications.role_assignment('created')
     def _add_role_to_user_and_project_adapter(self, role_id, user_id=None,
@@ -279,6 +350,7 @@ class Manager(manager.Manager):
         self.resource_api.get_project(project_id)
         self.role_api.get_role(role_id)
         self.driver.add_role_to_user_and_project(user_id, project_id, role_id)
+        self.invalidate_user_roles(user_id)
 
     def add_role_to_user_and_project(self, user_id, tenant_id, role_id):
         self._add_role_to_user_and_project_adapter(
@@ -294,17 +366,26 @@ class Manager(manager.Manager):
         roles = self.get_roles_for_user_and_project(user_id, tenant_id)
         if not roles:
             raise exception.NotFound(tenant_id)
-        for role_id in roles:
-            try:
-                self.driver.remove_role_from_user_and_project(user_id,
-                                                              tenant_id,
-                                                              role_id)
-                self.revoke_api.revoke_by_grant(role_id, user_id=user_id,
-                                                project_id=tenant_id)
-
-            except exception.RoleNotFound:
-                LOG.debug("Removing role %s failed because it does not exist.",
-                          role_id)
+        revoke_events = []
+        # NOTE(dstanek): The events are written even if removing a role fails
+        # part way through, so that no role that was already removed is left
+        # without a revocation event.
+        try:
+            for role_id in roles:
+                try:
+                    self.driver.remove_role_from_user_and_project(user_id,
+                                                                  tenant_id,
+                                                                  role_id)
+                    revoke_events.append(self.revoke_api.model.RevokeEvent(
+                        user_id=user_id, role_id=role_id,
+                        project_id=tenant_id))
+
+                except exception.RoleNotFound:
+                    LOG.debug("Removing role %s failed because it does not "
+                              "exist.", role_id)
+        finally:
+            self.invalidate_user_roles(user_id)
+            self.revoke_api.revoke_many(revoke_events)
 
     # TODO(henry-nash): We might want to consider list limiting this at some
     # point in the future.
@@ -415,6 +496,7 @@ class Manager(manager.Manager):
 
         self.driver.remove_role_from_user_and_project(user_id, project_id,
                                                       role_id)
+        self.invalidate_user_roles(user_id)
         self.identity_api.emit_invalidate_user_token_persistence(user_id)
         self.revoke_api.revoke_by_grant(role_id, user_id=user_id,
                                         project_id=project_id)
@@ -443,6 +525,9 @@ class Manager(manager.Manager):
             self.resource_api.get_project(project_id)
         self.driver.create_grant(role_id, user_id, group_id, domain_id,
                                  project_id, inherited_to_projects)
+        # NOTE: A group grant may change the roles of any of its members, so
+        # it invalidates everyone rather than listing the group.
+        self.invalidate_user_roles(user_id)
 
     def get_grant(self, role_id, user_id=None, group_id=None,
                   domain_id=None, project_id=None,
@@ -473,6 +558,7 @@ class Manager(manager.Manager):
                                 inherited_to_projects, context):
         self._emit_invalidate_grant_token_persistence(user_id, project_id)
 
+    @notifications.coalesce_invalidations()
     def delete_grant(self, role_id, user_id=None, group_id=None,
                      domain_id=None, project_id=None,
                      inherited_to_projects=False, context=None):
@@ -520,7 +606,9 @@ class Manager(manager.Manager):
             self.resource_api.get_project(project_id)
         self.driver.delete_grant(role_id, user_id, group_id, domain_id,
                                  project_id, inherited_to_projects)
+        self.invalidate_user_roles(user_id)
 
+    @notifications.coalesce_invalidations()
     def delete_tokens_for_role_assignments(self, role_id):
         assignments = self.list_role_assignments_for_role(role_id=role_id)
 
@@ -593,6 +681,22 @@ class Manager(manager.Manager):
         # from persistence if persistence is enabled.
         pass
 
+    def delete_project_assignments(self, project_id):
+        self.driver.delete_project_assignments(project_id)
+        self.invalidate_user_roles()
+
+    def delete_role_assignments(self, role_id):
+        self.driver.delete_role_assignments(role_id)
+        self.invalidate_user_roles()
+
+    def delete_user_assignments(self, user_id):
+        self.driver.delete_user_assignments(user_id)
+        self.invalidate_user_roles(user_id)
+
+    def delete_group_assignments(self, group_id):
+        self.driver.delete_group_assignments(group_id)
+        self.invalidate_user_roles()
+
     @deprecated_to_role_api
     def create_role(self, role_id, role):
         return self.role_api.create_role(role_id, role)
@@ -715,6 +819,20 @@ class Driver(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_user_ids_for_projects(self, project_ids):
+        """Lists all user IDs with a role assignment in any of the projects.
+
+        Drivers that can find the users of many projects at once should
+        override this.
+
+        :returns: a list of user_ids or an empty list.
+
+        """
+        user_ids = set()
+        for project_id in project_ids:
+            user_ids.update(self.list_user_ids_for_project(project_id))
+        return list(user_ids)
+
     @abc.abstractmethod
     def add_role_to_user_and_project(self, user_id, tenant_id, role_id):
         """Add a role to a user within given tenant.
@@ -14,18 +14,15 @@
 
 import sys
 
-from keystoneclient.common import cms
 from oslo_config import cfg
 from oslo_log import log
 from oslo_log import versionutils
-from oslo_serialization import jsonutils
 from oslo_utils import importutils
 import six
 import stevedore
 
 from keystone.common import controller
 from keystone.common import dependency
-from keystone.common import utils
 from keystone.common import wsgi
 from keystone import config
 from keystone.contrib.federation import constants as federation_constants
@@ -538,19 +535,10 @@ class Auth(controller.V3Controller):
     def revocation_list(self, context, auth=None):
         if not CONF.token.revoke_by_id:
             raise exception.Gone()
-        tokens = self.token_provider_api.list_revoked_tokens()
-
-        for t in tokens:
-            expires = t['expires']
-            if not (expires and isinstance(expires, six.text_type)):
-                t['expires'] = utils.isotime(expires)
-        data = {'revoked': tokens}
-        json_data = jsonutils.dumps(data)
-        signed_text = cms.cms_sign_text(json_data,
-                                        CONF.signing.certfile,
-                                        CONF.signing.keyfile)
-
-        return {'signed': signed_text}
+        revocation_list = self.token_provider_api.get_signed_revocation_list()
+        return wsgi.render_etag_response(
+            context, {'signed': revocation_list['signed']},
+            revocation_list['etag'])
 
     def _combine_lists_uniquely(self, a, b):
         # it's most likely that only one of these will be filled so avoid
@@ -13,8 +13,6 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import itertools
-
 from oslo_config import cfg
 import sqlalchemy
 from sqlalchemy.sql import true
@@ -23,6 +21,7 @@ from keystone import catalog
 from keystone.catalog import core
 from keystone.common import sql
 from keystone import exception
+from keystone import notifications
 
 
 CONF = cfg.CONF
@@ -86,6 +85,7 @@ class Endpoint(sql.ModelBase, sql.DictBase):
     extra = sql.Column(sql.JsonBlob())
 
 
+@notifications.listener
 class Catalog(catalog.Driver):
     # Regions
     def list_regions(self, hints):
@@ -267,6 +267,90 @@ class Catalog(catalog.Driver):
             ref.extra = new_endpoint.extra
         return ref.to_dict()
 
+    @property
+    def event_callbacks(self):
+        callbacks = {}
+        for action in (notifications.ACTIONS.created,
+                       notifications.ACTIONS.updated,
+                       notifications.ACTIONS.deleted):
+            callbacks[action] = {
+                'region': [self._catalog_changed],
+                'service': [self._catalog_changed],
+                'endpoint': [self._catalog_changed],
+            }
+        return callbacks
+
+    def _catalog_changed(self, service, resource_type, operation, payload):
+        substitutions = self._get_substitutions_key()
+        self._get_compiled_v2_catalog.invalidate(self, substitutions)
+        self._get_compiled_v3_catalog.invalidate(self, substitutions)
+
+    def _get_substitutions_key(self):
+        # NOTE: The substitutions are part of the cache key so that a change
+        # in configuration is picked up without any invalidation.
+        return tuple(sorted(core.get_url_substitutions().items()))
+
+    def _compile_url(self, url, substitutions):
+        try:
+            return core.compile_url(url, substitutions)
+        except exception.MalformedEndpoint:
+            return None  # this failure is already logged in format_url()
+
+    # NOTE(dstanek): The V2 and V3 catalogs are compiled separately, so that
+    # building either only runs the query and URL compilation it needs.
+    # Everything except the user and project is substituted when compiling,
+    # so that building a catalog only has to fill those in.
+
+    @core.MEMOIZE
+    def _get_compiled_v2_catalog(self, substitutions):
+        """Build the enabled endpoints with their URLs compiled."""
+        substitutions = dict(substitutions)
+        session = sql.get_session()
+
+        endpoints = []
+        for endpoint in (session.query(Endpoint).
+                         options(sql.joinedload(Endpoint.service)).
+                         filter(Endpoint.enabled == true()).all()):
+            if not endpoint.service['enabled']:
+                continue
+            url = self._compile_url(endpoint['url'], substitutions)
+            if url is None:
+                continue
+            endpoints.append({
+                'id': endpoint['id'],
+                'interface': endpoint['interface'],
+                'region_id': endpoint['region_id'],
+                'url': url,
+                'service_type': endpoint.service['type'],
+                'service_name': endpoint.service.extra.get('name', ''),
+            })
+        return endpoints
+
+    @core.MEMOIZE
+    def _get_compiled_v3_catalog(self, substitutions):
+        """Build the enabled services with their URLs compiled."""
+        substitutions = dict(substitutions)
+        session = sql.get_session()
+
+        services = []
+        for svc in (session.query(Service).filter(Service.enabled == true()).
+                    options(sql.joinedload(Service.endpoints)).all()):
+            service_endpoints = []
+            for endpoint in (ep.to_dict() for ep in svc.endpoints
+                             if ep.enabled):
+                del endpoint['service_id']
+                del endpoint['legacy_endpoint_id']
+                del endpoint['enabled']
+                endpoint['region'] = endpoint['region_id']
+                endpoint['url'] = self._compile_url(endpoint['url'],
+                                                    substitutions)
+                if endpoint['url'] is not None:
+                    service_endpoints.append(endpoint)
+            services.append({'endpoints': service_endpoints, 'id': svc.id,
+                             'type': svc.type,
+                             'name': svc.extra.get('name', '')})
+        return services
+
     def get_catalog(self, user_id, tenant_id):
         """Retrieve and format the V2 service catalog.
 
@@ -282,41 +366,21 @@ class Catalog(catalog.Driver):
                   empty dict.
 
         """
-        substitutions = dict(
-            itertools.chain(CONF.items(), CONF.eventlet_server.items()))
-        substitutions.update({'user_id': user_id})
-        silent_keyerror_failures = []
-        if tenant_id:
-            substitutions.update({'tenant_id': tenant_id})
-        else:
-            silent_keyerror_failures = ['tenant_id']
-
-        session = sql.get_session()
-        endpoints = (session.query(Endpoint).
-                     options(sql.joinedload(Endpoint.service)).
-                     filter(Endpoint.enabled == true()).all())
+        endpoints = self._get_compiled_v2_catalog(
+            self._get_substitutions_key())
 
         catalog = {}
 
         for endpoint in endpoints:
-            if not endpoint.service['enabled']:
+            url = core.fill_url(endpoint['url'], user_id, tenant_id)
+            if url is None:
                 continue
-            try:
-                formatted_url = core.format_url(
-                    endpoint['url'], substitutions,
-                    silent_keyerror_failures=silent_keyerror_failures)
-                if formatted_url is not None:
-                    url = formatted_url
-                else:
-                    continue
-            except exception.MalformedEndpoint:
-                continue  # this failure is already logged in format_url()
 
             region = endpoint['region_id']
-            service_type = endpoint.service['type']
+            service_type = endpoint['service_type']
             default_service = {
                 'id': endpoint['id'],
-                'name': endpoint.service.extra.get('name', ''),
+                'name': endpoint['service_name'],
                 'publicURL': ''
             }
             catalog.setdefault(region, {})
@@ -339,45 +403,23 @@ class Catalog(catalog.Driver):
         :returns: A list representing the service catalog or an empty list
 
         """
-        d = dict(
-            itertools.chain(CONF.items(), CONF.eventlet_server.items()))
-        d.update({'user_id': user_id})
-        silent_keyerror_failures = []
-        if tenant_id:
-            d.update({'tenant_id': tenant_id})
-        else:
-            silent_keyerror_failures = ['tenant_id']
-
-        session = sql.get_session()
-        services = (session.query(Service).filter(Service.enabled == true()).
-                    options(sql.joinedload(Service.endpoints)).
-                    all())
+        services = self._get_compiled_v3_catalog(
+            self._get_substitutions_key())
 
         def make_v3_endpoints(endpoints):
-            for endpoint in (ep.to_dict() for ep in endpoints if ep.enabled):
-                del endpoint['service_id']
-                del endpoint['legacy_endpoint_id']
-                del endpoint['enabled']
-                endpoint['region'] = endpoint['region_id']
-                try:
-                    formatted_url = core.format_url(
-                        endpoint['url'], d,
-                        silent_keyerror_failures=silent_keyerror_failures)
-                    if formatted_url:
-                        endpoint['url'] = formatted_url
-                    else:
-                        continue
-                except exception.MalformedEndpoint:
-                    continue  # this failure is already logged in format_url()
-
+            for endpoint in endpoints:
+                url = core.fill_url(endpoint['url'], user_id, tenant_id)
+                if not url:
+                    continue
+                endpoint = endpoint.copy()
+                endpoint['url'] = url
                 yield endpoint
 
         # TODO(davechen): If there is service with no endpoints, we should skip
         # the service instead of keeping it in the catalog, see bug #1436704.
         def make_v3_service(svc):
-            eps = list(make_v3_endpoints(svc.endpoints))
-            service = {'endpoints': eps, 'id': svc.id, 'type': svc.type}
-            service['name'] = svc.extra.get('name', '')
+            service = svc.copy()
+            service['endpoints'] = list(make_v3_endpoints(svc['endpoints']))
             return service
 
         return [make_v3_service(svc) for svc in services]
@@ -85,6 +85,70 @@ def format_url(url, substitutions, silent_keyerror_failures=None):
     return result
 
 
+def get_url_substitutions():
+    """Return the configuration values that may be substituted into URLs.
+
+    This is the whitelisted subset of the options that would be found by
+    chaining ``CONF.items()`` and ``CONF.eventlet_server.items()``.
+
+    """
+    substitutions = {}
+    for group in (CONF, CONF.eventlet_server):
+        for name in WHITELISTED_PROPERTIES:
+            try:
+                substitutions[name] = group[name]
+            except cfg.NoSuchOptError:
+                pass
+    return substitutions
+
+
+def compile_url(url, substitutions):
+    """Substitute everything but the user and project into an endpoint URL.
+
+    The result is a template in which only ``%(tenant_id)s`` and
+    ``%(user_id)s`` are left to be filled in by :func:`fill_url`, so it can be
+    computed once per endpoint rather than once per catalog.
+
+    :param string url: the URL to be compiled
+    :param dict substitutions: the configuration values to substitute, as
+        returned by :func:`get_url_substitutions`
+    :returns: the URL template
+    :raises keystone.exception.MalformedEndpoint: if the URL could never be
+        formatted
+
+    """
+    static = {'tenant_id': '%(tenant_id)s', 'user_id': '%(user_id)s'}
+    for name, value in substitutions.items():
+        if name in static:
+            continue
+        # NOTE: The result is formatted a second time by fill_url, so any
+        # literal percent signs need to survive that.
+        if isinstance(value, six.string_types):
+            value = value.replace('%', '%%')
+        static[name] = value
+    if isinstance(url, six.string_types):
+        url = url.replace('%%', '%%%%')
+    return format_url(url, static)
+
+
+def fill_url(template, user_id, tenant_id):
+    """Format a URL template produced by :func:`compile_url`.
+
+    :returns: the formatted URL, or None if it requires a ``tenant_id`` and
+        none was given
+
+    """
+    if '%' not in template:
+        return template
+    values = {'user_id': user_id}
+    if tenant_id:
+        values['tenant_id'] = tenant_id
+    try:
+        return template % values
+    except KeyError:
+        return None
+
+
 def check_endpoint_url(url):
     """Check substitution of url.
 
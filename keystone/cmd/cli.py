@@ -28,6 +28,7 @@ from keystone.common import sql
 from keystone.common.sql import migration_helpers
 from keystone.common import utils
 from keystone import config
+from keystone.contrib import revoke
 from keystone import exception
 from keystone.i18n import _, _LW
 from keystone.server import backends
@@ -244,6 +245,17 @@ class TokenFlush(BaseApp):
         token_manager.flush_expired_tokens()
 
 
+class RevocationFlush(BaseApp):
+    """Flush expired revocation events from the backend."""
+
+    name = 'revocation_flush'
+
+    @classmethod
+    def main(cls):
+        revoke_manager = revoke.Manager()
+        revoke_manager.flush_expired_events()
+
+
 class MappingPurge(BaseApp):
     """Purge the mapping table."""
 
@@ -652,6 +664,7 @@ CMDS = [
     MappingPurge,
     MappingEngineTester,
     PKISetup,
+    RevocationFlush,
     SamlIdentityProviderMetadata,
     SSLSetup,
     TokenFlush,
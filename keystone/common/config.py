@@ -157,6 +157,14 @@ FILE_OPTIONS = {
                    help='Time to cache identity data (in seconds). This has '
                         'no effect unless global and identity caching are '
                         'enabled.'),
+        cfg.IntOpt('group_name_cache_time', default=60,
+                   help='Time to remember the IDs of groups looked up by '
+                        'name, e.g. the groups of a federated user (in '
+                        'seconds). Each process keeps its own IDs, so a '
+                        'group renamed by another process may be resolved '
+                        'to its old name for this long. Names that match '
+                        'no group are never remembered. This has no effect '
+                        'unless global and identity caching are enabled.'),
         cfg.IntOpt('max_password_length', default=4096,
                    help='Maximum supported length for user passwords; '
                         'decrease to improve performance.'),
@@ -280,6 +288,12 @@ FILE_OPTIONS = {
                         "middleware must be configured with the "
                         "hash_algorithms, otherwise token revocation will "
                         "not be processed correctly."),
+        cfg.BoolOpt('concurrent_data_fetch', default=False,
+                    help='Look up the scope, user, roles, catalog and '
+                         'service providers of a new token concurrently '
+                         'rather than one after another. This lowers the '
+                         'latency of issuing tokens when the backends are '
+                         'remote, e.g. LDAP.'),
     ],
     'revoke': [
         cfg.StrOpt('driver',
@@ -485,6 +499,21 @@ FILE_OPTIONS = {
                    default='sql',
                    help='Entrypoint for the credential backend driver in the '
                         'keystone.credential namespace.'),
+        cfg.BoolOpt('caching', default=True,
+                    help='Toggle for credential caching. This has no effect '
+                         'unless global caching is enabled.'),
+        cfg.IntOpt('cache_time',
+                   help='TTL (in seconds) to cache credential data. This has '
+                        'no effect unless global caching is enabled.'),
+    ],
+    'ec2': [
+        cfg.IntOpt('token_reuse_time', default=0,
+                   help='Time (in seconds) during which the token issued for '
+                        'an EC2 or S3 signed request is returned again for '
+                        'other requests signed with the same access key, '
+                        'as long as it remains valid. The signature is '
+                        'still checked for every request. Set to 0 to issue '
+                        'a new token for every request.'),
     ],
     'oauth1': [
         cfg.StrOpt('driver',
@@ -661,6 +690,11 @@ FILE_OPTIONS = {
         cfg.StrOpt('user_enabled_emulation_dn',
                    help='DN of the group entry to hold enabled users when '
                         'using enabled emulation.'),
+        cfg.IntOpt('enabled_emulation_cache_time', default=0,
+                   help='Time (in seconds) to keep the members of the '
+                        'enabled emulation groups in memory between '
+                        'listings. The members are always fetched once per '
+                        'listing; 0 disables keeping them any longer.'),
         cfg.ListOpt('user_additional_attribute_mapping',
                     default=[],
                     help='List of additional LDAP attributes used for mapping '
@@ -973,6 +1007,13 @@ FILE_OPTIONS = {
                         'appropriate package, specify absolute path or adjust '
                         'your PATH environment variable if the binary cannot '
                         'be found.'),
+        cfg.StrOpt('assertion_signer', default='xmlsec1',
+                   choices=['xmlsec1', 'internal'],
+                   help='How SAML assertions are signed. "xmlsec1" runs the '
+                        'xmlsec1 binary for each assertion. "internal" signs '
+                        'them in process with the key and certificate kept '
+                        'in memory, which requires lxml and an RSA key; '
+                        'xmlsec1 is used when they are not available.'),
         cfg.StrOpt('certfile',
                    default=_CERTFILE,
                    help='Path of the certfile for SAML signing. For '
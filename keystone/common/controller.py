@@ -33,6 +33,9 @@ from keystone.models import token_model
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 
+# Environment key holding the token ID and the auth context built from it.
+POLICY_CREDENTIALS_ENV = 'keystone.policy_credentials'
+
 
 def v2_deprecated(f):
     """No-op decorator in preparation for deprecating Identity API v2.
@@ -66,6 +69,15 @@ def _build_policy_check_credentials(self, action, context, kwargs):
         LOG.debug('RBAC: using auth context from the request environment')
         return context['environment'].get(authorization.AUTH_CONTEXT_ENV)
 
+    # NOTE(dstanek): an auth context built from the token earlier in this
+    # request is reused so nested checks don't validate the token again.
+    environment = context.get('environment')
+    if environment is not None:
+        cached = environment.get(POLICY_CREDENTIALS_ENV)
+        if cached is not None and cached[0] == context.get('token_id'):
+            LOG.debug('RBAC: using auth context built earlier in the request')
+            return cached[1]
+
     # There is no current auth context, build it from the incoming token.
     # TODO(morganfainberg): Collapse this logic with AuthContextMiddleware
     # in a sane manner as this just mirrors the logic in AuthContextMiddleware
@@ -84,6 +96,9 @@ def _build_policy_check_credentials(self, action, context, kwargs):
         raise exception.Unauthorized()
 
     auth_context = authorization.token_to_auth_context(token_ref)
+    if environment is not None:
+        environment[POLICY_CREDENTIALS_ENV] = (context['token_id'],
+                                               auth_context)
 
     return auth_context
 
@@ -400,6 +415,10 @@ class V3Controller(wsgi.Application):
     member_name = 'entity'
     get_member_from_driver = None
 
+    # Collections whose members have an ID can be paged with the marker
+    # query parameter, the ID of the last member of the previous page.
+    marker_pagination = True
+
     @classmethod
     def base_url(cls, context, path=None):
         endpoint = super(V3Controller, cls).base_url(context, 'public')
@@ -461,7 +480,9 @@ class V3Controller(wsgi.Application):
         - Executing any filtering not already carried out
         - Truncate to a set limit if necessary
         - Adds 'self' links in every member
-        - Adds 'next', 'self' and 'prev' links for the whole collection.
+        - Adds 'next', 'self' and 'prev' links for the whole collection. The
+          'next' link is only set if the collection was truncated, and
+          continues the listing after its last member.
 
         :param context: the current context, containing the original url path
                         and query string
@@ -491,9 +512,21 @@ class V3Controller(wsgi.Application):
 
         if list_limited:
             container['truncated'] = True
+            if cls.marker_pagination and refs:
+                container['links']['next'] = cls._next_url(context,
+                                                           refs[-1]['id'])
 
         return container
 
+    @classmethod
+    def _next_url(cls, context, marker):
+        query = dict(context['query_string'] or {})
+        query['marker'] = marker
+        query = [(k, six.text_type(v).encode('utf-8'))
+                 for k, v in sorted(query.items())]
+        return '%s?%s' % (cls.base_url(context, path=context['path']),
+                          six.moves.urllib.parse.urlencode(query))
+
     @classmethod
     def limit(cls, refs, hints):
         """Limits a list of entities.
@@ -512,7 +545,17 @@ class V3Controller(wsgi.Application):
         NOT_LIMITED = False
         LIMITED = True
 
-        if hints is None or hints.limit is None:
+        if hints is None:
+            return NOT_LIMITED, refs
+
+        if hints.marker and not hints.marker['satisfied']:
+            # The driver wasn't able to start the list after the marker, so
+            # we must do it here
+            refs = sorted((ref for ref in refs
+                           if ref['id'] > hints.marker['marker']),
+                          key=lambda ref: ref['id'])
+
+        if hints.limit is None:
             # No truncation was requested
             return NOT_LIMITED, refs
 
@@ -522,7 +565,9 @@ class V3Controller(wsgi.Application):
 
         if len(refs) > hints.limit['limit']:
             # The driver layer wasn't able to truncate it for us, so we must
-            # do it here
+            # do it here, keeping the same order the drivers page in.
+            if cls.marker_pagination:
+                refs = sorted(refs, key=lambda ref: ref['id'])
             return LIMITED, refs[:hints.limit['limit']]
 
         return NOT_LIMITED, refs
@@ -607,6 +652,10 @@ class V3Controller(wsgi.Application):
             return hints
 
         for key in query_dict:
+            if key in ('limit', 'marker'):
+                # These are pagination directives, not filters
+                continue
+
             # Check if this is an exact filter
             if supported_filters is None or key in supported_filters:
                 hints.add_filter(key, query_dict[key])
@@ -642,9 +691,19 @@ class V3Controller(wsgi.Application):
                                  comparator=comparator,
                                  case_sensitive=case_sensitive)
 
-        # NOTE(henry-nash): If we were to support pagination, we would pull any
-        # pagination directives out of the query_dict here, and add them into
-        # the hints list.
+        if 'limit' in query_dict:
+            try:
+                limit = int(query_dict['limit'])
+                if limit < 1:
+                    raise AssertionError()
+            except (ValueError, AssertionError):
+                msg = _('Invalid limit value')
+                raise exception.ValidationError(message=msg)
+            hints.set_limit(limit)
+
+        if 'marker' in query_dict and cls.marker_pagination:
+            hints.set_marker(query_dict['marker'])
+
         return hints
 
     def _require_matching_id(self, value, ref):
@@ -28,7 +28,10 @@ class Hints(object):
 
     A Hint object contains filters, which is a list of dicts that can be
     accessed publicly. Also it contains a dict called limit, which will
-    indicate the amount of data we want to limit our listing to.
+    indicate the amount of data we want to limit our listing to, and a dict
+    called marker, which holds the ID of the last entity of the previous page
+    of the listing. Only entities with a greater ID are part of the listing;
+    a driver that satisfies the marker must mark it as such.
 
     If the filter is discovered to never match, then `cannot_match` can be set
     to indicate that there will not be any matches and the backend work can be
@@ -47,6 +50,7 @@ class Hints(object):
     """
     def __init__(self):
         self.limit = None
+        self.marker = None
         self.filters = list()
         self.cannot_match = False
 
@@ -68,3 +72,8 @@ class Hints(object):
     def set_limit(self, limit, truncated=False):
         """Set a limit to indicate the list should be truncated."""
         self.limit = {'limit': limit, 'type': 'limit', 'truncated': truncated}
+
+    def set_marker(self, marker, satisfied=False):
+        """Set a marker to indicate the list should start after an entity."""
+        self.marker = {'marker': marker, 'type': 'marker',
+                       'satisfied': satisfied}
@@ -18,6 +18,7 @@ import functools
 import os.path
 import re
 import sys
+import time
 import weakref
 
 import ldap.filter
@@ -51,6 +52,10 @@ LDAP_TLS_CERTS = {'never': ldap.OPT_X_TLS_NEVER,
 # indicate that no attributes should be returned besides the DN.
 DN_ONLY = ['1.1']
 
+# The maximum number of terms OR-ed together in a single search filter, to
+# keep the filters well within the limits of the servers.
+SEARCH_FILTER_BATCH_SIZE = 100
+
 _utf8_encoder = codecs.getencoder('utf-8')
 
 
@@ -307,6 +312,25 @@ def is_dn_equal(dn1, dn2):
     return True
 
 
+def dn_key(dn):
+    """Returns a key that is the same for DNs that are equal.
+
+    The key can be used to find DNs in sets and dicts. DNs with the same key
+    are equal according to is_dn_equal, so the limitations of that function
+    apply here.
+
+    :param dn: Either a string DN or a DN parsed by ldap.dn.str2dn.
+
+    """
+
+    if not isinstance(dn, list):
+        dn = ldap.dn.str2dn(utf8_encode(dn))
+
+    return tuple(frozenset((attr_type.lower(), prep_case_insensitive(val))
+                           for attr_type, val, dummy in rdn)
+                 for rdn in dn)
+
+
 def dn_startswith(descendant_dn, dn):
     """Returns True if and only if the descendant_dn is under the dn.
 
@@ -1503,6 +1527,36 @@ class BaseLdap(object):
         return [self._ldap_res_to_model(x)
                 for x in self._ldap_get_all(ldap_filter)]
 
+    def _get_all_by_attribute(self, attr, values):
+        values = list(set(values))
+        refs = []
+        for i in six.moves.range(0, len(values), SEARCH_FILTER_BATCH_SIZE):
+            value_filters = u''.join(
+                u'(%s=%s)' % (attr,
+                              ldap.filter.escape_filter_chars(
+                                  six.text_type(value)))
+                for value in values[i:i + SEARCH_FILTER_BATCH_SIZE])
+            refs.extend(self.get_all(u'(|%s)%s' % (value_filters,
+                                                   self.ldap_filter or '')))
+        return refs
+
+    def get_all_by_ids(self, object_ids):
+        """Return the objects with any of the IDs, in few searches.
+
+        IDs that don't match an object are ignored.
+
+        """
+        return self._get_all_by_attribute(self.id_attr, object_ids)
+
+    def get_all_by_names(self, names):
+        """Return the objects with any of the names, in few searches.
+
+        Names that don't match an object are ignored.
+
+        """
+        return self._get_all_by_attribute(self.attribute_mapping['name'],
+                                          names)
+
     def update(self, object_id, values, old_obj=None):
         if old_obj is None:
             old_obj = self.get(object_id)
@@ -1802,6 +1856,51 @@ class EnabledEmuMixIn(BaseLdap):
             naming_attr = (utf8_decode(naming_rdn[0]),
                            utf8_decode(naming_rdn[1]))
         self.enabled_emulation_naming_attr = naming_attr
+        self.enabled_emulation_cache_time = (
+            conf.ldap.enabled_emulation_cache_time)
+        self._enabled_members = None
+
+    def _get_enabled_members(self, conn):
+        """Return the keys of the DNs of all the enabled objects.
+
+        The members are fetched with a single search and, if
+        enabled_emulation_cache_time is set, kept for that long.
+
+        """
+        cached = self._enabled_members
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+
+        try:
+            res = conn.search_s(self.enabled_emulation_dn,
+                                ldap.SCOPE_BASE,
+                                u'(objectClass=*)', ['member'])
+        except ldap.NO_SUCH_OBJECT:
+            res = []
+        members = set()
+        for dn, attrs in res:
+            for member_dn in attrs.get('member', []):
+                try:
+                    members.add(dn_key(member_dn))
+                except ldap.DECODING_ERROR:
+                    LOG.debug('Ignoring invalid member DN %(member)s of '
+                              '%(dn)s', {'member': member_dn, 'dn': dn})
+
+        if self.enabled_emulation_cache_time > 0:
+            self._enabled_members = (
+                time.time() + self.enabled_emulation_cache_time, members)
+        return members
+
+    def _enabled_member_key(self, object_id, dn):
+        """Return the key of the member DN that marks an object enabled.
+
+        This is the DN _add_enabled writes, which for a one level search is
+        built from the ID rather than being the DN of the entry.
+
+        """
+        if self.LDAP_SCOPE == ldap.SCOPE_ONELEVEL:
+            dn = self._id_to_dn_string(object_id)
+        return dn_key(dn)
 
     def _get_enabled(self, object_id, conn):
         dn = self._id_to_dn(object_id)
@@ -1816,6 +1915,7 @@ class EnabledEmuMixIn(BaseLdap):
             return bool(enabled_value)
 
     def _add_enabled(self, object_id):
+        self._enabled_members = None
         with self.get_connection() as conn:
             if not self._get_enabled(object_id, conn):
                 modlist = [(ldap.MOD_ADD,
@@ -1832,6 +1932,7 @@ class EnabledEmuMixIn(BaseLdap):
                     conn.add_s(self.enabled_emulation_dn, attr_list)
 
     def _remove_enabled(self, object_id):
+        self._enabled_members = None
         modlist = [(ldap.MOD_DELETE,
                     'member',
                     [self._id_to_dn(object_id)])]
@@ -1864,13 +1965,19 @@ class EnabledEmuMixIn(BaseLdap):
     def get_all(self, ldap_filter=None):
         if 'enabled' not in self.attribute_ignore and self.enabled_emulation:
             # had to copy BaseLdap.get_all here to ldap_filter by DN
-            tenant_list = [self._ldap_res_to_model(x)
-                           for x in self._ldap_get_all(ldap_filter)
-                           if x[0] != self.enabled_emulation_dn]
+            res = [x for x in self._ldap_get_all(ldap_filter)
+                   if x[0] != self.enabled_emulation_dn]
+            if not res:
+                return []
             with self.get_connection() as conn:
-                for tenant_ref in tenant_list:
-                    tenant_ref['enabled'] = self._get_enabled(
-                        tenant_ref['id'], conn)
+                enabled_members = self._get_enabled_members(conn)
+            tenant_list = []
+            for x in res:
+                tenant_ref = self._ldap_res_to_model(x)
+                tenant_ref['enabled'] = (
+                    self._enabled_member_key(tenant_ref['id'], x[0]) in
+                    enabled_members)
+                tenant_list.append(tenant_ref)
             return tenant_list
         else:
             return super(EnabledEmuMixIn, self).get_all(ldap_filter)
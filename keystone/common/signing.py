@@ -0,0 +1,267 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""In-process CMS signing of tokens and other documents.
+
+keystoneclient signs documents by running ``openssl cms -sign -nodetach
+-nocerts -noattr -nosmimecap``, one process per document. Without signed
+attributes such a document contains nothing but the content, the identity of
+the signing certificate and a PKCS#1 v1.5 signature of the content's digest.
+All of those are deterministic for an RSA key, so the document can be built
+here, from a key loaded once, and be byte for byte identical to the one
+openssl would have produced.
+
+Keys that cannot be used this way (for instance non-RSA keys) are signed
+with keystoneclient, as before.
+
+"""
+
+import base64
+import binascii
+import os
+import ssl
+import zlib
+
+from cryptography.hazmat import backends
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from keystoneclient.common import cms
+from oslo_log import log
+import six
+
+from keystone.i18n import _LW
+
+
+LOG = log.getLogger(__name__)
+
+# DER encoded object identifiers, tag and length included.
+_OID_SIGNED_DATA = binascii.unhexlify(b'06092a864886f70d010702')
+_OID_DATA = binascii.unhexlify(b'06092a864886f70d010701')
+_OID_RSA_ENCRYPTION = binascii.unhexlify(b'06092a864886f70d010101')
+_DER_NULL = binascii.unhexlify(b'0500')
+
+_DIGESTS = {
+    'sha1': (hashes.SHA1, binascii.unhexlify(b'06052b0e03021a')),
+    'sha224': (hashes.SHA224,
+               binascii.unhexlify(b'0609608648016503040204')),
+    'sha256': (hashes.SHA256,
+               binascii.unhexlify(b'0609608648016503040201')),
+    'sha384': (hashes.SHA384,
+               binascii.unhexlify(b'0609608648016503040202')),
+    'sha512': (hashes.SHA512,
+               binascii.unhexlify(b'0609608648016503040203')),
+}
+
+_SEQUENCE = 0x30
+_SET = 0x31
+_INTEGER = 0x02
+_OCTET_STRING = 0x04
+_CONTEXT_0 = 0xa0
+
+_PEM_HEADER = '-----BEGIN CMS-----'
+_PEM_FOOTER = '-----END CMS-----'
+_PEM_LINE_LENGTH = 64
+
+
+def _der(tag, *contents):
+    content = b''.join(contents)
+    length = len(content)
+    if length < 0x80:
+        header = bytearray([tag, length])
+    else:
+        octets = bytearray()
+        while length:
+            octets.insert(0, length & 0xff)
+            length >>= 8
+        header = bytearray([tag, 0x80 | len(octets)]) + octets
+    return bytes(header) + content
+
+
+def _der_element(der, offset):
+    """Return the offsets of the content and the end of a DER element."""
+    length = six.indexbytes(der, offset + 1)
+    start = offset + 2
+    if length & 0x80:
+        size = length & 0x7f
+        length = int(binascii.hexlify(der[start:start + size]), 16)
+        start += size
+    return start, start + length
+
+
+def _issuer_and_serial_number(cert_der):
+    """Return the DER encoded IssuerAndSerialNumber of a certificate."""
+    # Certificate ::= SEQUENCE { tbsCertificate SEQUENCE { [0] version
+    # OPTIONAL, serialNumber, signature, issuer, ... }, ... }
+    tbs, _end = _der_element(cert_der, 0)
+    offset, _end = _der_element(cert_der, tbs)
+    if six.indexbytes(cert_der, offset) == _CONTEXT_0:
+        offset = _der_element(cert_der, offset)[1]
+    serial_end = _der_element(cert_der, offset)[1]
+    algorithm_end = _der_element(cert_der, serial_end)[1]
+    issuer_end = _der_element(cert_der, algorithm_end)[1]
+    return _der(_SEQUENCE,
+                cert_der[algorithm_end:issuer_end],
+                cert_der[offset:serial_end])
+
+
+def load_rsa_key(key_pem):
+    """Load a PEM encoded private key that can be used to sign in process.
+
+    :raises ValueError: if the key cannot be loaded or is not an RSA key
+
+    """
+    key = serialization.load_pem_private_key(
+        key_pem, password=None, backend=backends.default_backend())
+    if not isinstance(key, rsa.RSAPrivateKey):
+        raise ValueError('Only RSA keys can be used to sign in process')
+    return key
+
+
+def rsa_sign(key, data, algorithm):
+    """Return the PKCS#1 v1.5 signature of data made with an RSA key."""
+    pad = padding.PKCS1v15()
+    if hasattr(key, 'sign'):
+        return key.sign(data, pad, algorithm)
+    # NOTE(dstanek): older releases of cryptography only offer signer().
+    signer = key.signer(pad, algorithm)
+    signer.update(data)
+    return signer.finalize()
+
+
+class CMSSigner(object):
+    """Sign documents with a certificate and RSA key held in memory."""
+
+    def __init__(self, cert_pem, key_pem, message_digest='sha256'):
+        if isinstance(cert_pem, six.binary_type):
+            cert_pem = cert_pem.decode('utf-8')
+        self._key = load_rsa_key(key_pem)
+        self._hash, digest_oid = _DIGESTS[message_digest]
+        self._digest_algorithm = _der(_SEQUENCE, digest_oid)
+        self._signer_id = _issuer_and_serial_number(
+            ssl.PEM_cert_to_DER_cert(cert_pem))
+
+    def _sign(self, data):
+        return rsa_sign(self._key, data, self._hash())
+
+    def sign(self, data):
+        """Return the DER encoded CMS SignedData document of data."""
+        signer_info = _der(_SEQUENCE,
+                           _der(_INTEGER, b'\x01'),
+                           self._signer_id,
+                           self._digest_algorithm,
+                           _der(_SEQUENCE, _OID_RSA_ENCRYPTION, _DER_NULL),
+                           _der(_OCTET_STRING, self._sign(data)))
+        signed_data = _der(_SEQUENCE,
+                           _der(_INTEGER, b'\x01'),
+                           _der(_SET, self._digest_algorithm),
+                           _der(_SEQUENCE,
+                                _OID_DATA,
+                                _der(_CONTEXT_0, _der(_OCTET_STRING, data))),
+                           _der(_SET, signer_info))
+        return _der(_SEQUENCE, _OID_SIGNED_DATA,
+                    _der(_CONTEXT_0, signed_data))
+
+    def sign_pem(self, data):
+        """Return the CMS document of data in PEM form, like openssl."""
+        encoded = base64.b64encode(self.sign(data)).decode('ascii')
+        lines = [_PEM_HEADER]
+        lines.extend(encoded[i:i + _PEM_LINE_LENGTH]
+                     for i in six.moves.range(0, len(encoded),
+                                              _PEM_LINE_LENGTH))
+        lines.append(_PEM_FOOTER)
+        return '\n'.join(lines) + '\n'
+
+
+_signers = {}
+
+
+def get_signer(factory, certfile, keyfile, fallback, **kwargs):
+    """Return a signer built from a certificate and key file.
+
+    The signer is ``factory(cert_pem, key_pem, **kwargs)``. It is kept for as
+    long as neither file changes, so that a new key or certificate is picked
+    up just as it is by the external program used instead.
+
+    :param fallback: name of the program used when no signer can be built,
+                     for the warning logged in that case
+    :returns: the signer, or None if the files cannot be used in process
+
+    """
+    try:
+        version = (os.stat(certfile).st_mtime, os.stat(keyfile).st_mtime)
+    except (OSError, TypeError):
+        return None
+    cache_key = (factory, certfile, keyfile, tuple(sorted(kwargs.items())))
+    cached = _signers.get(cache_key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    try:
+        with open(certfile, 'rb') as f:
+            cert_pem = f.read()
+        with open(keyfile, 'rb') as f:
+            key_pem = f.read()
+        signer = factory(cert_pem, key_pem, **kwargs)
+    except (IOError, ValueError, TypeError, KeyError) as e:
+        LOG.warning(_LW('Unable to sign in process with %(certfile)s and '
+                        '%(keyfile)s, %(fallback)s will be used instead: '
+                        '%(error)s'),
+                    {'certfile': certfile, 'keyfile': keyfile,
+                     'fallback': fallback, 'error': e})
+        signer = None
+    _signers[cache_key] = (version, signer)
+    return signer
+
+
+def _sign_pem(text, certfile, keyfile, message_digest):
+    signer = get_signer(CMSSigner, certfile, keyfile, 'openssl',
+                        message_digest=message_digest)
+    if signer is None:
+        return None
+    if isinstance(text, six.text_type):
+        text = text.encode('utf-8')
+    return signer.sign_pem(text)
+
+
+def cms_sign_text(text, certfile, keyfile,
+                  message_digest=cms.DEFAULT_TOKEN_DIGEST_ALGORITHM):
+    """Sign text, as ``keystoneclient.common.cms.cms_sign_text`` does."""
+    signed = _sign_pem(text, certfile, keyfile, message_digest)
+    if signed is None:
+        return cms.cms_sign_text(text, certfile, keyfile,
+                                 message_digest=message_digest)
+    return signed
+
+
+def cms_sign_token(text, certfile, keyfile,
+                   message_digest=cms.DEFAULT_TOKEN_DIGEST_ALGORITHM):
+    """Sign a token, as ``keystoneclient.common.cms.cms_sign_token`` does."""
+    signed = _sign_pem(text, certfile, keyfile, message_digest)
+    if signed is None:
+        return cms.cms_sign_token(text, certfile, keyfile,
+                                  message_digest=message_digest)
+    return cms.cms_to_token(signed)
+
+
+def pkiz_sign(text, certfile, keyfile, compression_level=6,
+              message_digest=cms.DEFAULT_TOKEN_DIGEST_ALGORITHM):
+    """Sign a token, as ``keystoneclient.common.cms.pkiz_sign`` does."""
+    signed = _sign_pem(text, certfile, keyfile, message_digest)
+    if signed is None:
+        return cms.pkiz_sign(text, certfile, keyfile,
+                             compression_level=compression_level,
+                             message_digest=message_digest)
+    compressed = zlib.compress(signed.encode('utf-8'), compression_level)
+    return cms.PKIZ_PREFIX + base64.urlsafe_b64encode(
+        compressed).decode('utf-8')
@@ -200,6 +200,19 @@ def transaction(expire_on_commit=False):
         yield session
 
 
+# The maximum number of values used in a single IN clause. It is kept low
+# enough that two such clauses, plus a few other parameters, fit within the
+# bind parameter limits of every supported database.
+IN_CLAUSE_BATCH_SIZE = 450
+
+
+def in_clause_batches(values):
+    """Split values into lists small enough to be used in an IN clause."""
+    values = list(values)
+    for i in six.moves.range(0, len(values), IN_CLAUSE_BATCH_SIZE):
+        yield values[i:i + IN_CLAUSE_BATCH_SIZE]
+
+
 def truncated(f):
     """Ensure list truncation is detected in Driver list entity methods.
 
@@ -371,6 +384,28 @@ def _filter(model, query, hints):
         return
 
 
+def _paginate(model, query, hints):
+    """Applies a marker and a stable order to a query.
+
+    :param model: the table model in question
+    :param query: query to apply the marker to
+    :param hints: contains the marker and limit details. If a marker is
+                  applied here it's marked satisfied.
+
+    :returns updated query
+
+    """
+    # NOTE(dstanek): pages are ordered by ID, which is indexed for every
+    # model listed, so that a page can start just after the last ID of the
+    # previous one rather than at an offset into the whole table.
+    if hints.marker:
+        query = query.filter(model.id > hints.marker['marker'])
+        hints.set_marker(hints.marker['marker'], satisfied=True)
+    if hints.marker or hints.limit:
+        query = query.order_by(model.id)
+    return query
+
+
 def _limit(query, hints):
     """Applies a limit to a query.
 
@@ -380,9 +415,6 @@ def _limit(query, hints):
     :returns updated query
 
     """
-    # NOTE(henry-nash): If we were to implement pagination, then we
-    # we would expand this method to support pagination and limiting.
-
     # If we satisfied all the filters, set an upper limit if supplied
     if hints.limit:
         query = query.limit(hints.limit['limit'])
@@ -390,13 +422,13 @@ def _limit(query, hints):
 
 
 def filter_limit_query(model, query, hints):
-    """Applies filtering and limit to a query.
+    """Applies filtering, pagination and limit to a query.
 
     :param model: table model
     :param query: query to apply filters to
-    :param hints: contains the list of filters and limit details.  This may
-                  be None, indicating that there are no filters or limits
-                  to be applied. If it's not None, then any filters
+    :param hints: contains the list of filters, marker and limit details.
+                  This may be None, indicating that there are no filters or
+                  limits to be applied. If it's not None, then any filters
                   satisfied here will be removed so that the caller will
                   know if any filters remain.
 
@@ -413,6 +445,10 @@ def filter_limit_query(model, query, hints):
         # Nothing's going to match, so don't bother with the query.
         return []
 
+    # The marker only excludes entities by ID, so it can be applied whether
+    # or not the controller has filters left to apply.
+    query = _paginate(model, query, hints)
+
     # NOTE(henry-nash): Any unsatisfied filters will have been left in
     # the hints list for the controller to handle. We can only try and
     # limit here if all the filters are already satisfied since, if not,
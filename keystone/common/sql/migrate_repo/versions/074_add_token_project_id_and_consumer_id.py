@@ -0,0 +1,59 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Add indexed `project_id` and `consumer_id` columns to the `token` table."""
+
+import datetime
+
+from oslo_serialization import jsonutils
+import sqlalchemy as sql
+
+
+def _project_id(extra):
+    tenant = extra.get('tenant')
+    if tenant:
+        return tenant.get('id')
+
+
+def _consumer_id(extra):
+    token_data = extra.get('token_data') or {}
+    try:
+        oauth = token_data['token'].get('OS-OAUTH1')
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if oauth:
+        return oauth.get('consumer_id')
+
+
+def upgrade(migrate_engine):
+    meta = sql.MetaData()
+    meta.bind = migrate_engine
+
+    token = sql.Table('token', meta, autoload=True)
+    token.create_column(sql.Column('project_id', sql.String(64)))
+    token.create_column(sql.Column('consumer_id', sql.String(64)))
+    sql.Index('ix_token_project_id', token.c.project_id).create()
+    sql.Index('ix_token_consumer_id', token.c.consumer_id).create()
+
+    # Only tokens that can still be deleted need to be populated; expired or
+    # already invalid tokens are never matched against these columns.
+    now = datetime.datetime.utcnow()
+    query = sql.select([token.c.id, token.c.extra]).where(
+        sql.and_(token.c.valid == sql.true(), token.c.expires > now))
+    for token_ref in migrate_engine.execute(query).fetchall():
+        extra = jsonutils.loads(token_ref.extra) if token_ref.extra else {}
+        values = {'project_id': _project_id(extra),
+                  'consumer_id': _consumer_id(extra)}
+        if not any(values.values()):
+            continue
+        update = token.update().where(token.c.id == token_ref.id)
+        migrate_engine.execute(update.values(values))
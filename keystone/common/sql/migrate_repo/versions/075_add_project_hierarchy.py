@@ -0,0 +1,64 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Add the `project_hierarchy` closure table and populate it."""
+
+import sqlalchemy as sql
+
+
+PROJECT_HIERARCHY_TABLE = 'project_hierarchy'
+
+
+def _list_ancestors(project_id, parents):
+    # NOTE: Mirrors the driver: a project in a circular reference is recorded
+    # as its own ancestor and the walk stops at the first repeated project.
+    examined = set([project_id])
+    parent_id = parents.get(project_id)
+    depth = 0
+    while parent_id is not None:
+        depth += 1
+        if parent_id in examined:
+            if parent_id == project_id:
+                yield parent_id, depth
+            return
+        yield parent_id, depth
+        examined.add(parent_id)
+        parent_id = parents.get(parent_id)
+
+
+def upgrade(migrate_engine):
+    meta = sql.MetaData()
+    meta.bind = migrate_engine
+
+    hierarchy_table = sql.Table(
+        PROJECT_HIERARCHY_TABLE,
+        meta,
+        sql.Column('ancestor_id', sql.String(64), primary_key=True),
+        sql.Column('descendant_id', sql.String(64), primary_key=True,
+                   index=True),
+        sql.Column('depth', sql.Integer, nullable=False),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8')
+    hierarchy_table.create(migrate_engine, checkfirst=True)
+
+    project_table = sql.Table('project', meta, autoload=True)
+    query = sql.select([project_table.c.id, project_table.c.parent_id])
+    parents = {ref.id: ref.parent_id
+               for ref in migrate_engine.execute(query).fetchall()}
+
+    rows = [{'ancestor_id': ancestor_id,
+             'descendant_id': project_id,
+             'depth': depth}
+            for project_id in parents
+            for ancestor_id, depth in _list_ancestors(project_id, parents)]
+    if rows:
+        migrate_engine.execute(hierarchy_table.insert(), rows)
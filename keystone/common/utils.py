@@ -22,6 +22,8 @@ import grp
 import hashlib
 import os
 import pwd
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log
@@ -522,3 +524,66 @@ def get_token_ref(context):
     except KeyError:
         LOG.warning(_LW("Couldn't find the auth context."))
         raise exception.Unauthorized()
+
+
+class LRUCache(object):
+    """A bounded in-process cache of values, which may expire.
+
+    When the cache is full the least recently used entry is dropped. The
+    cache may be shared by threads; every access holds a lock, since the
+    order of the entries is changed by reads as well as by writes.
+
+    :param maxsize: the maximum number of entries kept.
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or (entry[1] is not None and
+                                 entry[1] < time.time()):
+                return default
+            # Re-insert the entry to mark it as the most recently used.
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Keep a value for key for ttl seconds, or until dropped."""
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Forget key, returning its value or default if missing."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def discard_keys(self, match):
+        """Forget every key for which match(key) is true."""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def discard_values(self, value):
+        """Forget every key that has the given value."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry[0] == value:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
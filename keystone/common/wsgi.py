@@ -778,6 +778,25 @@ def render_response(body=None, status=None, headers=None, method=None):
     return resp
 
 
+def render_etag_response(context, body, etag):
+    """Forms a WSGI response validated by an entity tag.
+
+    When the request's If-None-Match header already lists the tag, the
+    client's copy is current and an empty 304 response is formed instead.
+
+    """
+    headers = [('ETag', etag)]
+    if_none_match = context.get('headers', {}).get('If-None-Match', '')
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in (etag, '*'):
+            return render_response(status=(304, 'Not Modified'),
+                                   headers=headers)
+    return render_response(body=body, headers=headers)
+
+
 def render_exception(error, context=None, request=None, user_locale=None):
     """Forms a WSGI response based on the current error."""
 
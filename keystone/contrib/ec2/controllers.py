@@ -37,7 +37,9 @@ import sys
 import uuid
 
 from keystoneclient.contrib.ec2 import utils as ec2_utils
+from oslo_config import cfg
 from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 import six
 
 from keystone.common import controller
@@ -46,6 +48,15 @@ from keystone.common import utils
 from keystone.common import wsgi
 from keystone import exception
 from keystone.i18n import _
+from keystone import notifications
+
+
+CONF = cfg.CONF
+
+CRED_TYPE_EC2 = 'ec2'
+
+# The number of credentials for which an issued token is kept for reuse.
+TOKEN_REUSE_CACHE_SIZE = 1000
 
 
 @dependency.requires('assignment_api', 'catalog_api', 'credential_api',
@@ -53,6 +64,20 @@ from keystone.i18n import _
                      'token_provider_api')
 @six.add_metaclass(abc.ABCMeta)
 class Ec2ControllerCommon(object):
+    # NOTE(dstanek): Tokens issued for signed requests are kept, by
+    # credential, for ``[ec2] token_reuse_time`` seconds so that services
+    # validating every request they receive (S3 middleware checks each object
+    # request) don't cause a new token to be issued each time. The cache is
+    # shared by the controllers of a process.
+    _reusable_tokens = utils.LRUCache(TOKEN_REUSE_CACHE_SIZE)
+
+    @classmethod
+    def _register_credential_callback(cls):
+        notifications.register_event_callback(
+            notifications.ACTIONS.internal,
+            notifications.CREDENTIAL_CHANGED,
+            _forget_reusable_tokens)
+
     def check_signature(self, creds_ref, credentials):
         signer = ec2_utils.Ec2Signer(creds_ref['secret'])
         signature = signer.generate(credentials)
@@ -106,10 +131,11 @@ class Ec2ControllerCommon(object):
         """
         raise exception.NotImplemented()
 
-    def _authenticate(self, credentials=None, ec2credentials=None):
-        """Common code shared between the V2 and V3 authenticate methods.
+    def _check_request(self, credentials=None, ec2credentials=None):
+        """Check the signature of a request.
 
-        :returns: user_ref, tenant_ref, metadata_ref, roles_ref, catalog_ref
+        :returns: creds_ref: dict of the ec2 credential the request is
+                             signed with
         """
 
         # FIXME(ja): validate that a service token was used!
@@ -123,8 +149,21 @@ class Ec2ControllerCommon(object):
 
         creds_ref = self._get_credentials(credentials['access'])
         self.check_signature(creds_ref, credentials)
+        return creds_ref
+
+    def _authenticate(self, credentials=None, ec2credentials=None,
+                      creds_ref=None, include_catalog=True):
+        """Common code shared between the V2 and V3 authenticate methods.
+
+        :param creds_ref: ec2 credential already checked by `_check_request`,
+                          if any
+        :param include_catalog: whether to build the catalog; catalog_ref is
+                                None otherwise
+        :returns: user_ref, tenant_ref, metadata_ref, roles_ref, catalog_ref
+        """
+        if creds_ref is None:
+            creds_ref = self._check_request(credentials, ec2credentials)
 
-        # TODO(termie): don't create new tokens every time
         # TODO(termie): this is copied from TokenController.authenticate
         tenant_ref = self.resource_api.get_project(creds_ref['tenant_id'])
         user_ref = self.identity_api.get_user(creds_ref['user_id'])
@@ -153,13 +192,76 @@ class Ec2ControllerCommon(object):
         roles = metadata_ref.get('roles', [])
         if not roles:
             raise exception.Unauthorized(message='User not valid for tenant.')
-        roles_ref = [self.role_api.get_role(role_id) for role_id in roles]
+        roles_ref = self._get_roles(roles)
 
-        catalog_ref = self.catalog_api.get_catalog(
-            user_ref['id'], tenant_ref['id'])
+        catalog_ref = None
+        if include_catalog:
+            catalog_ref = self.catalog_api.get_catalog(
+                user_ref['id'], tenant_ref['id'])
 
         return user_ref, tenant_ref, metadata_ref, roles_ref, catalog_ref
 
+    def _get_roles(self, role_ids):
+        """Return the roles for a list of IDs, in the same order.
+
+        :raises keystone.exception.RoleNotFound: if any of the roles is
+                                                 missing
+        """
+        roles = {role['id']: role for role in
+                 self.role_api.list_roles_from_ids(role_ids)}
+        try:
+            return [roles[role_id] for role_id in role_ids]
+        except KeyError as e:
+            raise exception.RoleNotFound(role_id=e.args[0])
+
+    @staticmethod
+    def _reusable_token_key(version, creds_ref):
+        # NOTE(dstanek): The user and project are part of the key so that a
+        # token isn't handed back after the credential is moved to another
+        # user or project; the signature would still check out.
+        return (version, utils.hash_access_key(creds_ref['access']),
+                creds_ref['user_id'], creds_ref['tenant_id'])
+
+    def _get_reusable_token(self, version, creds_ref, validate):
+        """Return a token issued earlier for the same credential.
+
+        :param version: token version, used to keep V2 and V3 tokens apart
+        :param creds_ref: ec2 credential the request is signed with
+        :param validate: function validating a token ID
+        :returns: (token_id, token_data), or None if no valid token is kept
+        """
+        if not CONF.ec2.token_reuse_time:
+            return None
+        key = self._reusable_token_key(version, creds_ref)
+        cached = self._reusable_tokens.get(key)
+        if cached is None:
+            return None
+        token_id, token_data = cached
+        # NOTE(dstanek): Validating the token makes sure it hasn't been
+        # revoked, for instance because the user or project was disabled or
+        # a role was taken away, since it was issued.
+        try:
+            validate(token_id)
+        except (exception.TokenNotFound, exception.Unauthorized):
+            self._reusable_tokens.pop(key)
+            return None
+        return token_id, token_data
+
+    def _keep_token(self, version, creds_ref, token_id, token_data,
+                    expires_at):
+        """Keep an issued token to be returned again for the credential."""
+        reuse_time = CONF.ec2.token_reuse_time
+        if not reuse_time:
+            return
+        expires = timeutils.normalize_time(
+            timeutils.parse_isotime(expires_at))
+        ttl = min(reuse_time, timeutils.delta_seconds(timeutils.utcnow(),
+                                                      expires))
+        if ttl <= 0:
+            return
+        key = self._reusable_token_key(version, creds_ref)
+        self._reusable_tokens.set(key, (token_id, token_data), ttl)
+
     def create_credential(self, context, user_id, tenant_id):
         """Create a secret/access pair for use with ec2 style auth.
 
@@ -183,7 +285,7 @@ class Ec2ControllerCommon(object):
                     'project_id': tenant_id,
                     'blob': jsonutils.dumps(blob),
                     'id': credential_id,
-                    'type': 'ec2'}
+                    'type': CRED_TYPE_EC2}
         self.credential_api.create_credential(credential_id, cred_ref)
         return {'credential': self._convert_v3_to_ec2_credential(cred_ref)}
 
@@ -195,8 +297,9 @@ class Ec2ControllerCommon(object):
         """
 
         self.identity_api.get_user(user_id)
-        credential_refs = self.credential_api.list_credentials_for_user(
-            user_id)
+        credential_refs = (
+            self.credential_api.list_credentials_for_user_and_type(
+                user_id, CRED_TYPE_EC2))
         return {'credentials':
                 [self._convert_v3_to_ec2_credential(credential)
                     for credential in credential_refs]}
@@ -259,14 +362,30 @@ class Ec2ControllerCommon(object):
         return self._convert_v3_to_ec2_credential(creds)
 
 
+def _forget_reusable_tokens(service, resource_type, operation, payload):
+    """Drop the tokens kept for a credential that was updated or deleted."""
+    credential_id = payload['resource_info']
+    Ec2ControllerCommon._reusable_tokens.discard_keys(
+        lambda key: key[1] == credential_id)
+
+
 @dependency.requires('policy_api', 'token_provider_api')
 class Ec2Controller(Ec2ControllerCommon, controller.V2Controller):
 
+    def __init__(self):
+        super(Ec2Controller, self).__init__()
+        self._register_credential_callback()
+
     @controller.v2_deprecated
     def authenticate(self, context, credentials=None, ec2Credentials=None):
+        creds_ref = self._check_request(credentials, ec2Credentials)
+        token = self._get_reusable_token(
+            'v2', creds_ref, self.token_provider_api.validate_v2_token)
+        if token:
+            return token[1]
+
         (user_ref, tenant_ref, metadata_ref, roles_ref,
-         catalog_ref) = self._authenticate(credentials=credentials,
-                                           ec2credentials=ec2Credentials)
+         catalog_ref) = self._authenticate(creds_ref=creds_ref)
 
         # NOTE(morganfainberg): Make sure the data is in correct form since it
         # might be consumed external to Keystone and this is a v2.0 controller.
@@ -280,6 +399,8 @@ class Ec2Controller(Ec2ControllerCommon, controller.V2Controller):
                                id='placeholder')
         (token_id, token_data) = self.token_provider_api.issue_v2_token(
             auth_token_data, roles_ref, catalog_ref)
+        self._keep_token('v2', creds_ref, token_id, token_data,
+                         token_data['access']['token']['expires'])
         return token_data
 
     @controller.v2_deprecated
@@ -360,6 +481,7 @@ class Ec2ControllerV3(Ec2ControllerCommon, controller.V3Controller):
 
     def __init__(self):
         super(Ec2ControllerV3, self).__init__()
+        self._register_credential_callback()
 
     def _check_credential_owner_and_user_id_match(self, context, prep_info,
                                                   user_id, credential_id):
@@ -378,15 +500,24 @@ class Ec2ControllerV3(Ec2ControllerCommon, controller.V3Controller):
         self.check_protection(context, prep_info, ref)
 
     def authenticate(self, context, credentials=None, ec2Credentials=None):
+        creds_ref = self._check_request(credentials, ec2Credentials)
+        token = self._get_reusable_token(
+            'v3', creds_ref, self.token_provider_api.validate_v3_token)
+        if token:
+            return render_token_data_response(*token)
+
+        # NOTE(dstanek): The token provider builds the V3 catalog itself.
         (user_ref, project_ref, metadata_ref, roles_ref,
-         catalog_ref) = self._authenticate(credentials=credentials,
-                                           ec2credentials=ec2Credentials)
+         catalog_ref) = self._authenticate(creds_ref=creds_ref,
+                                           include_catalog=False)
 
         method_names = ['ec2credential']
 
         token_id, token_data = self.token_provider_api.issue_v3_token(
             user_ref['id'], method_names, project_id=project_ref['id'],
             metadata_ref=metadata_ref)
+        self._keep_token('v3', creds_ref, token_id, token_data,
+                         token_data['token']['expires_at'])
         return render_token_data_response(token_id, token_data)
 
     @controller.protected(callback=_check_credential_owner_and_user_id_match)
@@ -13,6 +13,7 @@
 """Main entry point into the Federation service."""
 
 import abc
+import copy
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -56,6 +57,9 @@ class Manager(manager.Manager):
 
     def __init__(self):
         super(Manager, self).__init__(CONF.federation.driver)
+        # Maps a mapping ID to its rules and the RuleProcessor compiled
+        # from them.
+        self._rule_processors = {}
 
     def get_enabled_service_providers(self):
         """List enabled service providers for Service Catalog
@@ -83,10 +87,35 @@ class Manager(manager.Manager):
         service_providers = self.driver.get_enabled_service_providers()
         return [normalize(sp) for sp in service_providers]
 
+    def update_mapping(self, mapping_id, mapping_ref):
+        ref = self.driver.update_mapping(mapping_id, mapping_ref)
+        self._rule_processors.pop(mapping_id, None)
+        return ref
+
+    def delete_mapping(self, mapping_id):
+        self.driver.delete_mapping(mapping_id)
+        self._rule_processors.pop(mapping_id, None)
+
+    def _get_rule_processor(self, mapping):
+        """Return a RuleProcessor for the mapping, compiling it if needed.
+
+        The compiled processor is reused for as long as the rules are
+        unchanged, so a mapping updated by another process is recompiled.
+
+        """
+        rules = mapping['rules']
+        cached = self._rule_processors.get(mapping['id'])
+        if cached is not None and cached[0] == rules:
+            return cached[1]
+
+        rule_processor = utils.RuleProcessor(copy.deepcopy(rules))
+        self._rule_processors[mapping['id']] = (rule_processor.rules,
+                                                rule_processor)
+        return rule_processor
+
     def evaluate(self, idp_id, protocol_id, assertion_data):
         mapping = self.get_mapping_from_idp_and_protocol(idp_id, protocol_id)
-        rules = mapping['rules']
-        rule_processor = utils.RuleProcessor(rules)
+        rule_processor = self._get_rule_processor(mapping)
         mapped_properties = rule_processor.process(assertion_data)
         return mapped_properties, mapping['id']
 
@@ -10,11 +10,16 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import copy
 import datetime
+import hashlib
 import os
+import ssl
 import subprocess
 import uuid
 
+from cryptography.hazmat.primitives import hashes
 from oslo_config import cfg
 from oslo_log import log
 from oslo_utils import fileutils
@@ -28,10 +33,13 @@ from saml2 import saml
 from saml2 import samlp
 from saml2.schema import soapenv
 from saml2 import sigver
+import six
 xmldsig = importutils.try_import("saml2.xmldsig")
 if not xmldsig:
     xmldsig = importutils.try_import("xmldsig")
+etree = importutils.try_import("lxml.etree")
 
+from keystone.common import signing
 from keystone.common import utils
 from keystone import exception
 from keystone.i18n import _, _LE
@@ -383,9 +391,79 @@ class SAMLGenerator(object):
         return signature
 
 
+class AssertionSigner(object):
+    """Sign SAML assertions in process, with a key held in memory.
+
+    The signature is the one ``xmlsec1`` completes from the template built by
+    ``SAMLGenerator._create_signature``: an enveloped RSA-SHA1 signature of
+    the exclusive canonical form of the assertion, with the certificate
+    included in its ``X509Data``.
+
+    """
+
+    def __init__(self, cert_pem, key_pem):
+        if etree is None:
+            raise ValueError('lxml is required to sign in process')
+        if isinstance(cert_pem, six.binary_type):
+            cert_pem = cert_pem.decode('utf-8')
+        self._key = signing.load_rsa_key(key_pem)
+        self._certificate = base64.b64encode(
+            ssl.PEM_cert_to_DER_cert(cert_pem)).decode('ascii')
+
+    def _sign(self, data):
+        return signing.rsa_sign(self._key, data, hashes.SHA1())
+
+    @staticmethod
+    def _find(element, path):
+        return element.find(path.replace('ds:', '{%s}' % xmldsig.NAMESPACE))
+
+    def _digest(self, assertion):
+        # The enveloped-signature transform: the digest is of the assertion
+        # without its signature, with any text around the signature kept.
+        assertion = copy.deepcopy(assertion)
+        signature = self._find(assertion, 'ds:Signature')
+        index = assertion.index(signature)
+        tail = signature.tail
+        assertion.remove(signature)
+        if tail:
+            if index:
+                previous = assertion[index - 1]
+                previous.tail = (previous.tail or '') + tail
+            else:
+                assertion.text = (assertion.text or '') + tail
+        return hashlib.sha1(etree.tostring(
+            assertion, method='c14n', exclusive=True)).digest()
+
+    def sign(self, assertion_xml):
+        """Return the assertion XML with its signature template completed."""
+        assertion = etree.fromstring(assertion_xml)
+        signature = self._find(assertion, 'ds:Signature')
+        signed_info = self._find(signature, 'ds:SignedInfo')
+
+        self._find(signed_info, 'ds:Reference/ds:DigestValue').text = (
+            base64.b64encode(self._digest(assertion)).decode('ascii'))
+        self._find(signature, 'ds:SignatureValue').text = base64.b64encode(
+            self._sign(etree.tostring(signed_info, method='c14n',
+                                      exclusive=True))).decode('ascii')
+        x509_data = self._find(signature, 'ds:KeyInfo/ds:X509Data')
+        etree.SubElement(
+            x509_data, '{%s}X509Certificate' % xmldsig.NAMESPACE).text = (
+                self._certificate)
+        return etree.tostring(assertion)
+
+
+def _get_assertion_signer(certfile, keyfile):
+    """Return the signer for the files, or None if they need ``xmlsec1``."""
+    return signing.get_signer(AssertionSigner, certfile, keyfile, 'xmlsec1')
+
+
 def _sign_assertion(assertion):
     """Sign a SAML assertion.
 
+    If ``[saml] assertion_signer`` is ``internal`` the assertion is signed in
+    process by an ``AssertionSigner``, unless the key or certificate cannot
+    be used that way. Otherwise ``xmlsec1`` is used as described below.
+
     This method utilizes ``xmlsec1`` binary and signs SAML assertions in a
     separate process. ``xmlsec1`` cannot read input data from stdin so the
     prepared assertion needs to be serialized and stored in a temporary
@@ -401,6 +479,19 @@ def _sign_assertion(assertion):
     :return: XML <Assertion> object
 
     """
+    if CONF.saml.assertion_signer == 'internal':
+        signer = _get_assertion_signer(CONF.saml.certfile, CONF.saml.keyfile)
+        if signer is not None:
+            try:
+                signed = signer.sign(assertion.to_string(
+                    nspair={'saml': saml2.NAMESPACE,
+                            'xmldsig': xmldsig.NAMESPACE}))
+            except Exception as e:
+                LOG.error(_LE('Error when signing assertion, reason: '
+                              '%(reason)s'), {'reason': e})
+                raise exception.SAMLSigningError(reason=e)
+            return saml2.create_class_from_xml_string(saml.Assertion, signed)
+
     xmlsec_binary = CONF.saml.xmlsec1_binary
     idp_private_key = CONF.saml.keyfile
     idp_public_key = CONF.saml.certfile
@@ -13,6 +13,7 @@
 """Utilities for Federation Extension."""
 
 import ast
+import copy
 import re
 
 import jsonschema
@@ -254,12 +255,17 @@ def validate_groups_in_backend(group_ids, mapping_id, identity_api):
     :raises: exception.MappedGroupNotFound
 
     """
-    for group_id in group_ids:
-        try:
-            identity_api.get_group(group_id)
-        except exception.GroupNotFound:
-            raise exception.MappedGroupNotFound(
-                group_id=group_id, mapping_id=mapping_id)
+    missing = _find_missing_groups(group_ids, identity_api)
+    if missing:
+        raise exception.MappedGroupNotFound(
+            group_id=missing[0], mapping_id=mapping_id)
+
+
+def _find_missing_groups(group_ids, identity_api):
+    """Return the IDs that don't match a group in the backend."""
+    found = set(group['id']
+                for group in identity_api.list_groups_by_ids(group_ids))
+    return [group_id for group_id in group_ids if group_id not in found]
 
 
 def validate_groups(group_ids, mapping_id, identity_api):
@@ -284,8 +290,6 @@ def validate_groups(group_ids, mapping_id, identity_api):
     validate_groups_in_backend(group_ids, mapping_id, identity_api)
 
 
-# TODO(marek-denis): Optimize this function, so the number of calls to the
-# backend are minimized.
 def transform_to_group_ids(group_names, mapping_id,
                            identity_api, resource_api):
     """Transform groups identitified by name/domain to their ids
@@ -320,6 +324,11 @@ def transform_to_group_ids(group_names, mapping_id,
     :param identity_api: identity_api object
     :param resource_api: resource manager object
 
+    The groups are looked up all at once, and each domain name is resolved
+    only once. Group IDs the identity backend remembers resolving before are
+    checked against the backend, and looked up by name again if the group
+    no longer exists.
+
     :returns: generator object with group ids
 
     :raises: excepton.MappedGroupNotFound: in case asked group doesn't
@@ -327,6 +336,8 @@ def transform_to_group_ids(group_names, mapping_id,
 
     """
 
+    domain_ids = {}
+
     def resolve_domain(domain):
         """Return domain id.
 
@@ -338,19 +349,31 @@ def transform_to_group_ids(group_names, mapping_id,
         :rtype: str
 
         """
-        domain_id = (domain.get('id') or
-                     resource_api.get_domain_by_name(
-                     domain.get('name')).get('id'))
-        return domain_id
-
-    for group in group_names:
-        try:
-            group_dict = identity_api.get_group_by_name(
-                group['name'], resolve_domain(group['domain']))
-            yield group_dict['id']
-        except exception.GroupNotFound:
+        if domain.get('id'):
+            return domain['id']
+        name = domain.get('name')
+        if name not in domain_ids:
+            domain_ids[name] = resource_api.get_domain_by_name(name).get('id')
+        return domain_ids[name]
+
+    keys = [(group['name'], resolve_domain(group['domain']))
+            for group in group_names]
+    group_ids = identity_api.get_group_ids_by_names(keys)
+    missing = set(_find_missing_groups(list(set(group_ids.values())),
+                                       identity_api))
+    if missing:
+        stale = [key for key, group_id in group_ids.items()
+                 if group_id in missing]
+        for key in stale:
+            del group_ids[key]
+        group_ids.update(
+            identity_api.get_group_ids_by_names(stale, refresh=True))
+    for key in keys:
+        if key in group_ids:
+            yield group_ids[key]
+        else:
             LOG.debug('Skip mapping group %s; has no entry in the backend',
-                      group['name'])
+                      key[0])
 
 
 def get_assertion_params_from_env(context):
@@ -389,6 +412,36 @@ class RuleProcessor(object):
         """
 
         self.rules = rules
+        # NOTE(dstanek): the remote requirements are compiled once so that
+        # each assertion is matched against prepared sets and patterns.
+        self._compiled_rules = [
+            ([self._compile_requirement(r) for r in rule['remote']], rule)
+            for rule in rules]
+
+    def _compile_requirement(self, requirement):
+        """Prepare a remote requirement for repeated evaluation.
+
+        The values of ``any_one_of`` and ``not_any_of`` become compiled
+        regular expressions when ``regex`` is set and frozensets otherwise,
+        and ``blacklist`` and ``whitelist`` values become frozensets.
+
+        """
+        compiled = dict(requirement)
+        regex = requirement.get('regex', False)
+        for eval_type in (self._EvalType.ANY_ONE_OF,
+                          self._EvalType.NOT_ANY_OF):
+            values = requirement.get(eval_type)
+            if values is not None:
+                if regex:
+                    compiled[eval_type] = [re.compile(v) for v in values]
+                else:
+                    compiled[eval_type] = frozenset(values)
+        for eval_type in (self._EvalType.BLACKLIST,
+                          self._EvalType.WHITELIST):
+            values = requirement.get(eval_type)
+            if values is not None:
+                compiled[eval_type] = frozenset(values)
+        return compiled
 
     def process(self, assertion_data):
         """Transform assertion to a dictionary of user name and group ids
@@ -452,8 +505,8 @@ class RuleProcessor(object):
         identity_values = []
 
         LOG.debug('rules: %s', self.rules)
-        for rule in self.rules:
-            direct_maps = self._verify_all_requirements(rule['remote'],
+        for requirements, rule in self._compiled_rules:
+            direct_maps = self._verify_all_requirements(requirements,
                                                         assertion)
 
             # If the compare comes back as None, then the rule did not apply
@@ -464,8 +517,9 @@ class RuleProcessor(object):
             # If there are no direct mappings, then add the local mapping
             # directly to the array of saved values. However, if there is
             # a direct mapping, then perform variable replacement.
+            # The local mapping is copied as the result may be modified.
             if not direct_maps:
-                identity_values += rule['local']
+                identity_values += copy.deepcopy(rule['local'])
             else:
                 for local in rule['local']:
                     new_local = self._update_local_mapping(local, direct_maps)
@@ -628,7 +682,7 @@ class RuleProcessor(object):
         to blacklist or whitelist rules and finally return the values in
         order, to be directly mapped.
 
-        :param requirements: list of remote requirements from rules
+        :param requirements: list of compiled remote requirements from rules
         :type requirements: list
 
         Example requirements::
@@ -724,7 +778,7 @@ class RuleProcessor(object):
     def _evaluate_values_by_regex(self, values, assertion_values):
         for value in values:
             for assertion_value in assertion_values:
-                if re.search(value, assertion_value):
+                if value.search(assertion_value):
                     return True
         return False
 
@@ -737,8 +791,8 @@ class RuleProcessor(object):
         assertion values. Otherwise, grab the intersection of the values
         and use that to compare against the evaluation type.
 
-        :param values: list of allowed values, defined in the requirement
-        :type values: list
+        :param values: allowed values, defined in the requirement
+        :type values: frozenset, or list of compiled patterns if regex is set
         :param requirement_type: key to look for in the assertion
         :type requirement_type: string
         :param eval_type: determine how to evaluate requirements
@@ -760,7 +814,7 @@ class RuleProcessor(object):
             any_match = self._evaluate_values_by_regex(values,
                                                        assertion_values)
         else:
-            any_match = bool(set(values).intersection(set(assertion_values)))
+            any_match = not values.isdisjoint(assertion_values)
         if any_match and eval_type == self._EvalType.ANY_ONE_OF:
             return True
         if not any_match and eval_type == self._EvalType.NOT_ANY_OF:
@@ -58,17 +58,22 @@ class Revoke(revoke.Driver):
         return results
 
     def revoke(self, event):
+        self.revoke_many([event])
+
+    def revoke_many(self, events):
         pruned = []
         expire_delta = datetime.timedelta(seconds=CONF.token.expiration)
         oldest = timeutils.utcnow() - expire_delta
 
         with self._store.get_lock(_EVENT_KEY) as lock:
-            events = self._list_events()
-            if event:
-                events.append(event)
+            events = self._list_events() + [e for e in events if e]
 
             for event in events:
                 revoked_at = event.revoked_at
                 if revoked_at > oldest:
                     pruned.append(event)
             self._store.set(_EVENT_KEY, pruned, lock)
+
+    def flush_expired_events(self):
+        # Expired events are already pruned whenever an event is added.
+        self.revoke_many([])
@@ -12,9 +12,15 @@
 
 import uuid
 
+from oslo_log import log
+
 from keystone.common import sql
 from keystone.contrib import revoke
 from keystone.contrib.revoke import model
+from keystone.i18n import _LI
+
+
+LOG = log.getLogger(__name__)
 
 
 class RevocationEvent(sql.ModelBase, sql.ModelDictMixin):
@@ -40,15 +46,11 @@ class RevocationEvent(sql.ModelBase, sql.ModelDictMixin):
 
 class Revoke(revoke.Driver):
     def _flush_batch_size(self, dialect):
-        batch_size = 0
+        batch_size = 1000
         if dialect == 'ibm_db_sa':
             # This functionality is limited to DB2, because
             # it is necessary to prevent the transaction log
-            # from filling up, whereas at least some of the
-            # other supported databases do not support update
-            # queries with LIMIT subqueries nor do they appear
-            # to require the use of such queries when deleting
-            # large numbers of records at once.
+            # from filling up.
             batch_size = 100
             # Limit of 100 is known to not fill a transaction log
             # of default maximum size while not significantly
@@ -57,28 +59,33 @@ class Revoke(revoke.Driver):
             # been increased beyond the default.
         return batch_size
 
-    def _prune_expired_events(self):
+    def flush_expired_events(self):
         oldest = revoke.revoked_before_cutoff_time()
 
         session = sql.get_session()
         dialect = session.bind.dialect.name
         batch_size = self._flush_batch_size(dialect)
-        if batch_size > 0:
-            query = session.query(RevocationEvent.id)
-            query = query.filter(RevocationEvent.revoked_at < oldest)
-            query = query.limit(batch_size).subquery()
-            delete_query = (session.query(RevocationEvent).
-                            filter(RevocationEvent.id.in_(query)))
-            while True:
-                rowcount = delete_query.delete(synchronize_session=False)
-                if rowcount == 0:
-                    break
-        else:
-            query = session.query(RevocationEvent)
-            query = query.filter(RevocationEvent.revoked_at < oldest)
-            query.delete(synchronize_session=False)
-
-        session.flush()
+        total_removed = 0
+        while True:
+            # NOTE(dstanek): Not every database supports LIMIT in a DELETE
+            # subquery, so the IDs of each batch are selected first. Every
+            # batch is deleted in its own transaction.
+            with session.begin():
+                query = session.query(RevocationEvent.id)
+                query = query.filter(RevocationEvent.revoked_at < oldest)
+                event_ids = [ref.id for ref in query.limit(batch_size)]
+                if event_ids:
+                    delete_query = session.query(RevocationEvent).filter(
+                        RevocationEvent.id.in_(event_ids))
+                    total_removed += delete_query.delete(
+                        synchronize_session=False)
+            LOG.debug('Removed %d total expired revocation events',
+                      total_removed)
+            if len(event_ids) < batch_size:
+                break
+
+        LOG.info(_LI('Total expired revocation events removed: %d'),
+                 total_removed)
 
     def list_events(self, last_fetch=None):
         session = sql.get_session()
@@ -93,12 +100,14 @@ class Revoke(revoke.Driver):
         return events
 
     def revoke(self, event):
-        kwargs = dict()
-        for attr in model.REVOKE_KEYS:
-            kwargs[attr] = getattr(event, attr)
-        kwargs['id'] = uuid.uuid4().hex
-        record = RevocationEvent(**kwargs)
+        self.revoke_many([event])
+
+    def revoke_many(self, events):
         session = sql.get_session()
         with session.begin():
-            session.add(record)
-        self._prune_expired_events()
+            for event in events:
+                kwargs = dict()
+                for attr in model.REVOKE_KEYS:
+                    kwargs[attr] = getattr(event, attr)
+                kwargs['id'] = uuid.uuid4().hex
+                session.add(RevocationEvent(**kwargs))
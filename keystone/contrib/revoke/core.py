@@ -14,6 +14,10 @@
 
 import abc
 import datetime
+import heapq
+import itertools
+import threading
+import uuid
 
 from oslo_config import cfg
 from oslo_log import log
@@ -55,6 +59,12 @@ extension.register_admin_extension(EXTENSION_DATA['alias'], EXTENSION_DATA)
 extension.register_public_extension(EXTENSION_DATA['alias'], EXTENSION_DATA)
 
 MEMOIZE = cache.get_memoization_decorator(section='revoke')
+SHOULD_CACHE = cache.get_should_cache_fn('revoke')
+
+# Events are fetched with this much overlap with the previous fetch so that
+# events committed out of order (e.g. by other keystone processes) are not
+# missed. Applying the same event to the index more than once is harmless.
+_FETCH_OVERLAP = datetime.timedelta(seconds=10)
 
 
 def revoked_before_cutoff_time():
@@ -64,6 +74,84 @@ def revoked_before_cutoff_time():
     return oldest
 
 
+def _event_key(event):
+    return tuple(getattr(event, name) for name in model.REVOKE_KEYS)
+
+
+class _LocalRevokeIndex(object):
+    """A process local revocation index that is maintained incrementally.
+
+    Instead of rebuilding the index from every stored event each time a new
+    event is recorded, only the events newer than the last fetch are pulled
+    from the backend and applied to the existing index. Expired events are
+    removed from the index locally, in the order they expire.
+
+    """
+
+    def __init__(self):
+        self.index = model.RevokeIndex()
+        self._events = {}
+        self._expiry_queue = []
+        self._counter = itertools.count()
+        self._last_fetch = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _add_event(self, event, cutoff):
+        if event.revoked_at < cutoff:
+            # the backend hasn't pruned this event yet, but it can no longer
+            # match a valid token
+            return
+
+        key = _event_key(event)
+        if key in self._events:
+            return
+
+        self._events[key] = event
+        heapq.heappush(self._expiry_queue,
+                       (event.revoked_at, next(self._counter), key))
+        self.index.add_event(event)
+
+    def _prune(self, cutoff):
+        while self._expiry_queue and self._expiry_queue[0][0] < cutoff:
+            key = heapq.heappop(self._expiry_queue)[2]
+            self.index.remove_event(self._events.pop(key))
+
+    def synchronize(self, driver, generation):
+        """Bring the index up to date with the events stored by the driver.
+
+        :param driver: the revoke driver to fetch new events from
+        :param generation: an opaque value that changes whenever a new event
+                           is recorded; nothing is fetched if it matches the
+                           value given to the last synchronization
+        :returns: the up to date :class:`model.RevokeIndex`
+
+        """
+        if generation is not None and generation == self._generation:
+            return self.index
+
+        with self._lock:
+            if generation is not None and generation == self._generation:
+                return self.index
+
+            last_fetch = self._last_fetch
+            if last_fetch is not None:
+                last_fetch -= _FETCH_OVERLAP
+            events = driver.list_events(last_fetch=last_fetch)
+
+            cutoff = revoked_before_cutoff_time()
+            for event in events:
+                self._add_event(event, cutoff)
+                if self._last_fetch is None or (
+                        event.revoked_at > self._last_fetch):
+                    self._last_fetch = event.revoked_at
+            self._prune(cutoff)
+
+            self._generation = generation
+
+        return self.index
+
+
 @dependency.provider('revoke_api')
 class Manager(manager.Manager):
     """Default pivot point for the Revoke backend.
@@ -81,6 +169,7 @@ class Manager(manager.Manager):
         super(Manager, self).__init__(CONF.revoke.driver)
         self._register_listeners()
         self.model = model
+        self._local_revoke_index = _LocalRevokeIndex()
 
     def _user_callback(self, service, resource_type, operation,
                        payload):
@@ -207,11 +296,33 @@ class Manager(manager.Manager):
         self.revoke(model.RevokeEvent(domain_id=domain_id, role_id=role_id))
 
     @MEMOIZE
-    def _get_revoke_tree(self):
-        events = self.driver.list_events()
-        revoke_tree = model.RevokeTree(revoke_events=events)
+    def _get_revoke_generation(self):
+        # NOTE(dstanek): the value itself is meaningless, it only has to
+        # change every time the cached value is invalidated by a new
+        # revocation (in any process sharing the cache). When caching is
+        # disabled, a new value is returned every time and the local index is
+        # synchronized on every check.
+        return uuid.uuid4().hex
+
+    def get_revoke_generation(self):
+        """Return an opaque value that changes whenever an event is recorded.
+
+        Anything derived from the revocation events, such as the outcome of
+        checking a token, remains correct for as long as this value does not
+        change.
 
-        return revoke_tree
+        :returns: the generation, or None when revocation caching is disabled,
+                  in which case nothing derived from the events may be kept
+
+        """
+        generation = self._get_revoke_generation()
+        if not SHOULD_CACHE(generation):
+            return None
+        return generation
+
+    def _get_revoke_index(self):
+        return self._local_revoke_index.synchronize(
+            self.driver, self._get_revoke_generation())
 
     def check_token(self, token_values):
         """Checks the values from a token against the revocation list
@@ -223,12 +334,29 @@ class Manager(manager.Manager):
         :raises exception.TokenNotFound: if the token is invalid
 
          """
-        if self._get_revoke_tree().is_revoked(token_values):
+        if self._get_revoke_index().is_revoked(token_values):
             raise exception.TokenNotFound(_('Failed to validate token'))
 
     def revoke(self, event):
         self.driver.revoke(event)
-        self._get_revoke_tree.invalidate(self)
+        self._get_revoke_generation.invalidate(self)
+
+    def revoke_many(self, events):
+        """Record several revocation events at once.
+
+        The events are stored together, so that revoking many tokens costs
+        one write rather than one per event.
+
+        """
+        events = list(events)
+        if not events:
+            return
+        self.driver.revoke_many(events)
+        self._get_revoke_generation.invalidate(self)
+
+    def flush_expired_events(self):
+        """Remove the events that can no longer match a valid token."""
+        self.driver.flush_expired_events()
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -257,3 +385,25 @@ class Driver(object):
 
         """
         raise exception.NotImplemented()  # pragma: no cover
+
+    def revoke_many(self, events):
+        """register several revocation events
+
+        Drivers that can store the events in a single operation should
+        override this.
+
+        :param events: A list of
+            keystone.contrib.revoke.model.RevocationEvent
+
+        """
+        for event in events:
+            self.revoke(event)
+
+    def flush_expired_events(self):
+        """remove the events older than the expiration cutoff
+
+        Expired events can no longer match a valid token, so storing them is
+        only a waste of space.
+
+        """
+        raise exception.NotImplemented()
@@ -255,6 +255,134 @@ class RevokeTree(object):
         return self._search(self.revoke_map, _EVENT_NAMES, token_data)
 
 
+# The order in which RevokeIndex looks up the attributes of a token, from the
+# most to the least selective. Every event is indexed by the first attribute
+# in this list that it has a value for.
+_INDEX_NAMES = ['audit_id',
+                'access_token_id',
+                'trust_id',
+                'consumer_id',
+                'audit_chain_id',
+                'user_id',
+                'project_id',
+                'role_id',
+                'domain_scope_id',
+                'domain_id',
+                'expires_at']
+
+
+class RevokeIndex(object):
+    """Revocation checking based on per attribute hash indexes.
+
+    This is a drop-in alternative to :class:`RevokeTree`. Instead of walking
+    every level of a tree, each event is stored under its most selective
+    attribute, so that checking a token is a few dictionary lookups followed
+    by a comparison of the candidate events against the token.
+
+    As with the tree, events that are otherwise identical are collapsed and
+    only the latest 'issued_before' is kept.
+
+    """
+
+    def __init__(self, revoke_events=None):
+        self.issued_before = dict()
+        self.indexes = {name: {} for name in _INDEX_NAMES}
+        self.unindexed = frozenset()
+        self.add_events(revoke_events)
+
+    @staticmethod
+    def _event_key(event):
+        # falsy values are wildcards, as they are in RevokeEvent.key_for_name
+        return tuple(getattr(event, name) or None for name in _EVENT_NAMES)
+
+    def _update_index(self, key, update):
+        # NOTE(dstanek): the sets are replaced rather than modified in place
+        # so that is_revoked never iterates over a set that is being changed.
+        values = dict(zip(_EVENT_NAMES, key))
+        for name in _INDEX_NAMES:
+            value = values[name]
+            if value is not None:
+                index = self.indexes[name]
+                keys = update(index.get(value, frozenset()), key)
+                if keys:
+                    index[value] = keys
+                else:
+                    index.pop(value, None)
+                return
+        self.unindexed = update(self.unindexed, key)
+
+    def add_event(self, event):
+        """Updates the index based on a revocation event.
+
+        :param:  Event to add to the index
+
+        :returns:  the event that was passed in.
+
+        """
+        key = self._event_key(event)
+        issued_before = self.issued_before.get(key)
+        if issued_before is None:
+            self.issued_before[key] = event.issued_before
+            self._update_index(key, lambda keys, k: keys | frozenset([k]))
+        else:
+            self.issued_before[key] = max(event.issued_before, issued_before)
+        return event
+
+    def remove_event(self, event):
+        """Update the index based on the removal of a Revocation Event
+
+        As with :meth:`RevokeTree.remove_event`, only an exact match on
+        'issued_before' ever triggers a removal.
+
+        :param: Event to remove from the index
+
+        """
+        key = self._event_key(event)
+        if self.issued_before.get(key) != event.issued_before:
+            return
+        self._update_index(key, lambda keys, k: keys - frozenset([k]))
+        del self.issued_before[key]
+
+    def add_events(self, revoke_events):
+        return list(map(self.add_event, revoke_events or []))
+
+    @staticmethod
+    def _token_values(name, token_data):
+        if name == 'role_id':
+            return token_data.get('roles', [])
+        return [token_data[alt_name]
+                for alt_name in ALTERNATIVES.get(name, [name])]
+
+    def _matches(self, key, token_data):
+        issued_before = self.issued_before.get(key)
+        if issued_before is None or (
+                issued_before <= token_data['issued_at']):
+            return False
+        for name, value in zip(_EVENT_NAMES, key):
+            if value is not None and (
+                    value not in self._token_values(name, token_data)):
+                return False
+        return True
+
+    def is_revoked(self, token_data):
+        """Check if a token matches any revocation event
+
+        token_data is the same map of token values used by
+        :meth:`RevokeTree.is_revoked`.
+
+        """
+        for name in _INDEX_NAMES:
+            index = self.indexes[name]
+            if not index:
+                continue
+            for value in self._token_values(name, token_data):
+                for key in index.get(value, ()):
+                    if self._matches(key, token_data):
+                        return True
+
+        return any(self._matches(key, token_data) for key in self.unindexed)
+
+
 def build_token_values_v2(access, default_domain_id):
     token_data = access['token']
 
@@ -27,6 +27,10 @@ class CredentialModel(sql.ModelBase, sql.DictBase):
     blob = sql.Column(sql.JsonBlob(), nullable=False)
     type = sql.Column(sql.String(255), nullable=False)
     extra = sql.Column(sql.JsonBlob())
+    __table_args__ = (
+        sql.Index('ix_credential_user_id_type', 'user_id', 'type'),
+        sql.Index('ix_credential_project_id', 'project_id'),
+    )
 
 
 class Credential(credential.Driver):
@@ -55,6 +59,12 @@ class Credential(credential.Driver):
         refs = query.filter_by(user_id=user_id).all()
         return [ref.to_dict() for ref in refs]
 
+    def list_credentials_for_user_and_type(self, user_id, type):
+        session = sql.get_session()
+        query = session.query(CredentialModel)
+        refs = query.filter_by(user_id=user_id, type=type).all()
+        return [ref.to_dict() for ref in refs]
+
     def _get_credential(self, session, credential_id):
         ref = session.query(CredentialModel).get(credential_id)
         if ref is None:
@@ -20,15 +20,18 @@ from oslo_config import cfg
 from oslo_log import log
 import six
 
+from keystone.common import cache
 from keystone.common import dependency
 from keystone.common import driver_hints
 from keystone.common import manager
 from keystone import exception
+from keystone import notifications
 
 
 CONF = cfg.CONF
 
 LOG = log.getLogger(__name__)
+MEMOIZE = cache.get_memoization_decorator(section='credential')
 
 
 @dependency.provider('credential_api')
@@ -49,6 +52,40 @@ class Manager(manager.Manager):
     def list_credentials(self, hints=None):
         return self.driver.list_credentials(hints or driver_hints.Hints())
 
+    # NOTE(dstanek): EC2 and S3 signature validation looks up the same
+    # credential for every signed request, so credentials are cached and
+    # invalidated whenever they are changed through this manager.
+
+    @MEMOIZE
+    def get_credential(self, credential_id):
+        return self.driver.get_credential(credential_id)
+
+    @notifications.internal(notifications.CREDENTIAL_CHANGED)
+    def update_credential(self, credential_id, credential):
+        ref = self.driver.update_credential(credential_id, credential)
+        self.get_credential.invalidate(self, credential_id)
+        return ref
+
+    @notifications.internal(notifications.CREDENTIAL_CHANGED)
+    def delete_credential(self, credential_id):
+        self.driver.delete_credential(credential_id)
+        self.get_credential.invalidate(self, credential_id)
+
+    def delete_credentials_for_project(self, project_id):
+        hints = driver_hints.Hints()
+        hints.add_filter('project_id', project_id)
+        credentials = [cr for cr in self.driver.list_credentials(hints)
+                       if cr['project_id'] == project_id]
+        self.driver.delete_credentials_for_project(project_id)
+        for cr in credentials:
+            self.get_credential.invalidate(self, cr['id'])
+
+    def delete_credentials_for_user(self, user_id):
+        credentials = self.driver.list_credentials_for_user(user_id)
+        self.driver.delete_credentials_for_user(user_id)
+        for cr in credentials:
+            self.get_credential.invalidate(self, cr['id'])
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Driver(object):
@@ -87,6 +124,21 @@ class Driver(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_credentials_for_user_and_type(self, user_id, type):
+        """List the credentials of one type for a user.
+
+        Backends that can filter on the type themselves should override this;
+        the default filters the user's credentials.
+
+        :param user_id: ID of a user to filter credentials by.
+        :param type: type of credentials to list.
+
+        :returns: a list of credential_refs or an empty list.
+
+        """
+        return [cr for cr in self.list_credentials_for_user(user_id)
+                if cr['type'] == type]
+
     @abc.abstractmethod
     def get_credential(self, credential_id):
         """Get a credential by ID.
@@ -119,24 +171,32 @@ class Driver(object):
     @abc.abstractmethod
     def delete_credentials_for_project(self, project_id):
         """Deletes all credentials for a project."""
-        self._delete_credentials(lambda cr: cr['project_id'] == project_id)
+        hints = driver_hints.Hints()
+        hints.add_filter('project_id', project_id)
+        self._delete_credentials(self.list_credentials(hints),
+                                 lambda cr: cr['project_id'] == project_id)
 
     @abc.abstractmethod
     def delete_credentials_for_user(self, user_id):
         """Deletes all credentials for a user."""
-        self._delete_credentials(lambda cr: cr['user_id'] == user_id)
+        self._delete_credentials(self.list_credentials_for_user(user_id),
+                                 lambda cr: cr['user_id'] == user_id)
 
-    def _delete_credentials(self, match_fn):
+    def _delete_credentials(self, credentials, match_fn):
         """Do the actual credential deletion work (default implementation).
 
+        Backends should rather delete all the matching credentials at once.
+
+        :param credentials: list of credential dicts, filtered as far as the
+                            backend is able to.
         :param match_fn: function that takes a credential dict as the
                          parameter and returns true or false if the
                          identifier matches the credential dict.
         """
-        for cr in self.list_credentials():
+        for cr in credentials:
             if match_fn(cr):
                 try:
-                    self.credential_api.delete_credential(cr['id'])
+                    self.delete_credential(cr['id'])
                 except exception.CredentialNotFound:
                     LOG.debug('Deletion of credential is not required: %s',
                               cr['id'])
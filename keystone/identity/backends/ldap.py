@@ -20,7 +20,6 @@ from oslo_log import log
 import six
 
 from keystone.common import clean
-from keystone.common import driver_hints
 from keystone.common import ldap as common_ldap
 from keystone.common import models
 from keystone import exception
@@ -134,6 +133,16 @@ class Identity(identity.Driver):
         # parameter left in so this matches the Driver specification
         return self.group.get_filtered_by_name(group_name)
 
+    def list_groups_by_ids(self, group_ids):
+        return [common_ldap.filter_entity(group)
+                for group in self.group.get_all_by_ids(group_ids)]
+
+    def list_groups_by_names(self, group_names, domain_id):
+        # domain_id will already have been handled in the Manager layer,
+        # parameter left in so this matches the Driver specification
+        return [common_ldap.filter_entity(group)
+                for group in self.group.get_all_by_names(group_names)]
+
     def update_group(self, group_id, group):
         self.group.check_allow_update()
         if 'name' in group:
@@ -163,27 +172,32 @@ class Identity(identity.Driver):
         return self.group.get_all_filtered(hints)
 
     def list_users_in_group(self, group_id, hints):
-        users = []
-        for user_dn in self.group.list_group_users(group_id):
-            user_id = self.user._dn_to_id(user_dn)
+        user_dns = self.group.list_group_users(group_id)
+        # NOTE(dstanek): fetch the members in batches rather than with a
+        # search each. The IDs are matched case-insensitively, as LDAP does.
+        users = {
+            user['id'].lower(): self.user.filter_attributes(user)
+            for user in self.user.get_all_by_ids(
+                [self.user._dn_to_id(user_dn) for user_dn in user_dns])}
+        user_refs = []
+        for user_dn in user_dns:
             try:
-                users.append(self.user.get_filtered(user_id))
-            except exception.UserNotFound:
+                user_refs.append(users[self.user._dn_to_id(user_dn).lower()])
+            except KeyError:
                 LOG.debug(("Group member '%(user_dn)s' not found in"
                            " '%(group_id)s'. The user should be removed"
                            " from the group. The user will be ignored."),
                           dict(user_dn=user_dn, group_id=group_id))
-        return users
+        return user_refs
 
     def check_user_in_group(self, user_id, group_id):
-        user_refs = self.list_users_in_group(group_id, driver_hints.Hints())
-        for x in user_refs:
-            if x['id'] == user_id:
-                break
-        else:
-            # Try to fetch the user to see if it even exists.  This
+        user_ref = self.user._ldap_get(user_id)
+        if user_ref is None:
+            raise exception.UserNotFound(user_id=user_id)
+        if not self.group.has_member(group_id, user_ref[0]):
+            # Try to fetch the group to see if it even exists.  This
             # will raise a more accurate exception.
-            self.get_user(user_id)
+            self.group.get(group_id)
             raise exception.NotFound(_("User '%(user_id)s' not found in"
                                        " group '%(group_id)s'") %
                                      {'user_id': user_id,
@@ -356,6 +370,15 @@ class GroupApi(common_ldap.BaseLdap):
                                self.ldap_filter or '')
         return self.get_all(query)
 
+    def has_member(self, group_id, user_dn):
+        """Return True if the user is a member of the group."""
+
+        user_dn_esc = ldap.filter.escape_filter_chars(user_dn)
+        query = '(%s=%s)%s' % (self.member_attribute,
+                               user_dn_esc,
+                               self.ldap_filter or '')
+        return self._ldap_get(group_id, query) is not None
+
     def list_user_groups_filtered(self, user_dn, hints):
         """Return a filtered list of groups for which the user is a member."""
 
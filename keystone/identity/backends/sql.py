@@ -276,6 +276,24 @@ class Identity(identity.Driver):
             raise exception.GroupNotFound(group_id=group_name)
         return group_ref.to_dict()
 
+    def list_groups_by_ids(self, group_ids):
+        session = sql.get_session()
+        group_refs = []
+        for batch in sql.in_clause_batches(set(group_ids)):
+            query = session.query(Group).filter(Group.id.in_(batch))
+            group_refs.extend(ref.to_dict() for ref in query)
+        return group_refs
+
+    def list_groups_by_names(self, group_names, domain_id):
+        session = sql.get_session()
+        group_refs = []
+        for batch in sql.in_clause_batches(set(group_names)):
+            query = session.query(Group)
+            query = query.filter_by(domain_id=domain_id)
+            query = query.filter(Group.name.in_(batch))
+            group_refs.extend(ref.to_dict() for ref in query)
+        return group_refs
+
     @sql.handle_conflicts(conflict_type='group')
     def update_group(self, group_id, group):
         session = sql.get_session()
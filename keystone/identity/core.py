@@ -15,6 +15,7 @@
 """Main entry point into the Identity service."""
 
 import abc
+import collections
 import functools
 import os
 import uuid
@@ -28,6 +29,7 @@ from keystone.common import clean
 from keystone.common import dependency
 from keystone.common import driver_hints
 from keystone.common import manager
+from keystone.common import utils
 from keystone import config
 from keystone import exception
 from keystone.i18n import _, _LW
@@ -40,6 +42,14 @@ CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
 MEMOIZE = cache.get_memoization_decorator(section='identity')
+SHOULD_CACHE = cache.get_should_cache_fn('identity')
+EXPIRATION_TIME = cache.get_expiration_time_fn('identity')
+
+# The number of local to public ID mappings each process keeps in memory.
+PUBLIC_ID_CACHE_SIZE = 10000
+
+# The number of group name to ID resolutions each process keeps in memory.
+GROUP_NAME_CACHE_SIZE = 10000
 
 DOMAIN_CONF_FHEAD = 'keystone.'
 DOMAIN_CONF_FTAIL = '.conf'
@@ -415,6 +425,7 @@ class Manager(manager.Manager):
     def __init__(self):
         super(Manager, self).__init__(CONF.identity.driver)
         self.domain_configs = DomainConfigs()
+        self._group_ids_by_name = utils.LRUCache(GROUP_NAME_CACHE_SIZE)
 
         self.event_callbacks = {
             notifications.ACTIONS.deleted: {
@@ -499,8 +510,8 @@ class Manager(manager.Manager):
             return self._set_domain_id_and_mapping_for_single_ref(
                 ref, domain_id, driver, entity_type, conf)
         elif isinstance(ref, list):
-            return [self._set_domain_id_and_mapping(
-                    x, domain_id, driver, entity_type) for x in ref]
+            return self._set_domain_id_and_mapping_for_list(
+                ref, domain_id, driver, entity_type, conf)
         else:
             raise ValueError(_('Expected dict or list: %s') % type(ref))
 
@@ -536,6 +547,44 @@ class Manager(manager.Manager):
                           ref['id'])
         return ref
 
+    def _set_domain_id_and_mapping_for_list(self, ref_list, domain_id, driver,
+                                            entity_type, conf):
+        """Post process a list of entities, with bulk mapping lookups.
+
+        This is the equivalent of calling
+        ``_set_domain_id_and_mapping_for_single_ref`` for each entity, but the
+        existing mappings are read, and the missing ones created, all at once.
+
+        """
+        ref_list = [ref.copy() for ref in ref_list]
+        for ref in ref_list:
+            self._insert_domain_id_if_needed(ref, driver, domain_id, conf)
+
+        if not ref_list or not self._is_mapping_needed(driver):
+            return ref_list
+
+        local_entities = [{'domain_id': ref['domain_id'],
+                           'local_id': ref['id'],
+                           'entity_type': entity_type} for ref in ref_list]
+        public_ids = self.id_mapping_api.get_public_ids(local_entities)
+
+        unmapped = [i for i, public_id in enumerate(public_ids)
+                    if public_id is None]
+        if unmapped:
+            # If the driver generates UUIDs then the local UUIDs are used as
+            # the public IDs.
+            new_public_ids = self.id_mapping_api.create_id_mappings(
+                [local_entities[i] for i in unmapped],
+                public_ids=([ref_list[i]['id'] for i in unmapped]
+                            if driver.generates_uuids() else None))
+            for i, public_id in zip(unmapped, new_public_ids):
+                public_ids[i] = public_id
+            LOG.debug('Created %d new mappings to public IDs', len(unmapped))
+
+        for ref, public_id in zip(ref_list, public_ids):
+            ref['id'] = public_id
+        return ref_list
+
     def _insert_domain_id_if_needed(self, ref, driver, domain_id, conf):
         """Inserts the domain ID into the ref, if required.
 
@@ -867,6 +916,7 @@ class Manager(manager.Manager):
         # that particular driver type.
         group['id'] = uuid.uuid4().hex
         ref = driver.create_group(group['id'], group)
+        self._group_ids_by_name.clear()
 
         notifications.Audit.created(self._GROUP, group['id'], initiator)
 
@@ -891,6 +941,84 @@ class Manager(manager.Manager):
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.GROUP)
 
+    @domains_configured
+    def list_groups_by_ids(self, group_ids):
+        """List the groups with any of the given IDs.
+
+        Each backend driver is asked for all of its groups at once. IDs that
+        don't match a group are ignored.
+
+        """
+        entity_ids = collections.OrderedDict()
+        for group_id in group_ids:
+            try:
+                domain_id, driver, entity_id = (
+                    self._get_domain_driver_and_entity_id(group_id))
+            except exception.PublicIDNotFound:
+                continue
+            entity_ids.setdefault((domain_id, driver), []).append(entity_id)
+
+        group_refs = []
+        for (domain_id, driver), ids in entity_ids.items():
+            ref_list = driver.list_groups_by_ids(ids)
+            group_refs.extend(self._set_domain_id_and_mapping(
+                ref_list, domain_id, driver, mapping.EntityType.GROUP))
+        return group_refs
+
+    def _cache_group_id(self, key, group_id):
+        if SHOULD_CACHE(group_id):
+            self._group_ids_by_name.set(key, group_id,
+                                        CONF.identity.group_name_cache_time)
+
+    @domains_configured
+    def get_group_ids_by_names(self, group_names, refresh=False):
+        """Resolve many group names to IDs.
+
+        :param group_names: (name, domain ID) pairs
+        :type group_names: list of tuples
+        :param refresh: whether to look up every name in the backend, rather
+                        than using the IDs this process resolved before.
+
+        :returns: a dict of the group ID for each pair that names a group.
+
+        Each backend driver is asked for all of its groups at once. The IDs
+        found are kept by this process for ``[identity]
+        group_name_cache_time`` seconds; names that don't resolve are looked
+        up again every time, so that new groups are found straight away.
+        Names are matched as the backend matches them, so a name may resolve
+        regardless of case.
+
+        """
+        group_ids = {}
+        names_by_domain = collections.OrderedDict()
+        for key in group_names:
+            group_id = None
+            if not refresh:
+                group_id = self._group_ids_by_name.get(key)
+            if group_id is None:
+                names_by_domain.setdefault(key[1], set()).add(key[0])
+            else:
+                group_ids[key] = group_id
+
+        for domain_id, names in names_by_domain.items():
+            driver = self._select_identity_driver(domain_id)
+            ref_list = self._set_domain_id_and_mapping(
+                driver.list_groups_by_names(list(names), domain_id),
+                domain_id, driver, mapping.EntityType.GROUP)
+            found = {}
+            found_lower = {}
+            for ref in ref_list:
+                found.setdefault(ref['name'], ref['id'])
+                found_lower.setdefault(ref['name'].lower(), ref['id'])
+            for name in names:
+                group_id = found.get(name, found_lower.get(name.lower()))
+                if group_id is None:
+                    self._group_ids_by_name.pop((name, domain_id))
+                else:
+                    group_ids[(name, domain_id)] = group_id
+                    self._cache_group_id((name, domain_id), group_id)
+        return group_ids
+
     @domains_configured
     @exception_translated('group')
     def update_group(self, group_id, group, initiator=None):
@@ -901,18 +1029,21 @@ class Manager(manager.Manager):
         group = self._clear_domain_id_if_domain_unaware(driver, group)
         ref = driver.update_group(entity_id, group)
         self.get_group.invalidate(self, group_id)
+        self._group_ids_by_name.clear()
         notifications.Audit.updated(self._GROUP, group_id, initiator)
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.GROUP)
 
     @domains_configured
     @exception_translated('group')
+    @notifications.coalesce_invalidations()
     def delete_group(self, group_id, initiator=None):
         domain_id, driver, entity_id = (
             self._get_domain_driver_and_entity_id(group_id))
         user_ids = (u['id'] for u in self.list_users_in_group(group_id))
         driver.delete_group(entity_id)
         self.get_group.invalidate(self, group_id)
+        self._group_ids_by_name.clear()
         self.id_mapping_api.delete_id_mapping(group_id)
         self.assignment_api.delete_group_assignments(group_id)
 
@@ -939,6 +1070,7 @@ class Manager(manager.Manager):
             user_entity_id, user_driver, group_entity_id, group_driver)
 
         group_driver.add_user_to_group(user_entity_id, group_entity_id)
+        self.assignment_api.invalidate_user_roles(user_id)
 
     @domains_configured
     @exception_translated('group')
@@ -1257,6 +1389,39 @@ class Driver(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_groups_by_ids(self, group_ids):
+        """List the groups with any of the IDs.
+
+        Drivers that can look up many groups at once should override this.
+
+        :returns: a list of group_refs; IDs without a group are ignored.
+
+        """
+        group_refs = []
+        for group_id in group_ids:
+            try:
+                group_refs.append(self.get_group(group_id))
+            except exception.GroupNotFound:
+                pass
+        return group_refs
+
+    def list_groups_by_names(self, group_names, domain_id):
+        """List the groups in a domain with any of the names.
+
+        Drivers that can look up many groups at once should override this.
+
+        :returns: a list of group_refs; names without a group are ignored.
+
+        """
+        group_refs = []
+        for group_name in group_names:
+            try:
+                group_refs.append(self.get_group_by_name(group_name,
+                                                         domain_id))
+            except exception.GroupNotFound:
+                pass
+        return group_refs
+
     @abc.abstractmethod
     def update_group(self, group_id, group):
         """Updates an existing group.
@@ -1281,12 +1446,96 @@ class Driver(object):
 
 @dependency.provider('id_mapping_api')
 class MappingManager(manager.Manager):
-    """Default pivot point for the ID Mapping backend."""
+    """Default pivot point for the ID Mapping backend.
+
+    Public IDs are looked up for every user and group listed from a backend
+    that needs mapping, so the manager keeps the most recently used local to
+    public ID mappings of this process in memory. Entries expire like any
+    other cached identity data.
+
+    """
 
     driver_namespace = 'keystone.identity.id_mapping'
 
     def __init__(self):
         super(MappingManager, self).__init__(CONF.identity_mapping.driver)
+        self._public_ids = utils.LRUCache(PUBLIC_ID_CACHE_SIZE)
+
+    @staticmethod
+    def _cache_key(local_entity):
+        return (local_entity['domain_id'], local_entity['local_id'],
+                local_entity['entity_type'])
+
+    def _get_cached_public_id(self, local_entity):
+        return self._public_ids.get(self._cache_key(local_entity))
+
+    def _cache_public_id(self, local_entity, public_id):
+        if not SHOULD_CACHE(public_id):
+            return
+        expiration_time = EXPIRATION_TIME() or CONF.cache.expiration_time
+        self._public_ids.set(self._cache_key(local_entity), public_id,
+                             expiration_time)
+
+    def get_public_id(self, local_entity):
+        public_id = self._get_cached_public_id(local_entity)
+        if public_id is None:
+            public_id = self.driver.get_public_id(local_entity)
+            if public_id is not None:
+                self._cache_public_id(local_entity, public_id)
+        return public_id
+
+    def get_public_ids(self, local_entities):
+        """Returns the public IDs of many local entities.
+
+        :param list local_entities: the local entities, as given to
+                                    ``get_public_id``.
+        :returns: a list of public IDs, in the same order as the local
+                  entities, with None for those that have no mapping.
+
+        """
+        public_ids = [self._get_cached_public_id(local_entity)
+                      for local_entity in local_entities]
+        uncached = [i for i, public_id in enumerate(public_ids)
+                    if public_id is None]
+        if uncached:
+            found = self.driver.get_public_ids(
+                [local_entities[i] for i in uncached])
+            for i, public_id in zip(uncached, found):
+                if public_id is not None:
+                    public_ids[i] = public_id
+                    self._cache_public_id(local_entities[i], public_id)
+        return public_ids
+
+    def create_id_mapping(self, local_entity, public_id=None):
+        public_id = self.driver.create_id_mapping(local_entity, public_id)
+        self._cache_public_id(local_entity, public_id)
+        return public_id
+
+    def create_id_mappings(self, local_entities, public_ids=None):
+        """Create and store the mappings of many local entities.
+
+        :param list local_entities: the local entities, as given to
+                                    ``create_id_mapping``.
+        :param list public_ids: the public IDs to use, in the same order as
+                                the local entities. If not specified, the
+                                public IDs are generated.
+        :returns: a list of the public IDs, in the same order as the local
+                  entities.
+
+        """
+        public_ids = self.driver.create_id_mappings(local_entities,
+                                                    public_ids=public_ids)
+        for local_entity, public_id in zip(local_entities, public_ids):
+            self._cache_public_id(local_entity, public_id)
+        return public_ids
+
+    def delete_id_mapping(self, public_id):
+        self.driver.delete_id_mapping(public_id)
+        self._public_ids.discard_values(public_id)
+
+    def purge_mappings(self, purge_filter):
+        self.driver.purge_mappings(purge_filter)
+        self._public_ids.clear()
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -1304,6 +1553,20 @@ class MappingDriver(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def get_public_ids(self, local_entities):
+        """Returns the public IDs of many local entities.
+
+        Drivers that can look up many mappings at once should override this.
+
+        :param list local_entities: Containing the entity domain, local ID and
+                                    type ('user' or 'group') of each entity.
+        :returns: list of public IDs, in the same order as the local entities,
+                  with None for each entity that has no mapping.
+
+        """
+        return [self.get_public_id(local_entity)
+                for local_entity in local_entities]
+
     @abc.abstractmethod
     def get_id_mapping(self, public_id):
         """Returns the local mapping.
@@ -1328,6 +1591,23 @@ class MappingDriver(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def create_id_mappings(self, local_entities, public_ids=None):
+        """Create and store the mappings of many local entities.
+
+        Drivers that can store many mappings at once should override this.
+
+        :param list local_entities: Containing the entity domain, local ID and
+                                    type ('user' or 'group') of each entity.
+        :param list public_ids: If specified, the public IDs to use, in the
+                                same order as the local entities.
+        :returns: list of public IDs, in the same order as the local entities
+
+        """
+        if public_ids is None:
+            public_ids = [None] * len(local_entities)
+        return [self.create_id_mapping(local_entity, public_id)
+                for local_entity, public_id in zip(local_entities, public_ids)]
+
     @abc.abstractmethod
     def delete_id_mapping(self, public_id):
         """Deletes an entry for the given public_id.
@@ -57,6 +57,28 @@ class Mapping(identity.MappingDriver):
         except sql.NotFound:
             return None
 
+    def get_public_ids(self, local_entities):
+        local_ids = {}
+        for local_entity in local_entities:
+            key = (local_entity['domain_id'], local_entity['entity_type'])
+            local_ids.setdefault(key, set()).add(local_entity['local_id'])
+
+        public_ids = {}
+        session = sql.get_session()
+        for (domain_id, entity_type), ids in local_ids.items():
+            for batch in sql.in_clause_batches(ids):
+                query = session.query(IDMapping.local_id, IDMapping.public_id)
+                query = query.filter_by(domain_id=domain_id)
+                query = query.filter_by(entity_type=entity_type)
+                query = query.filter(IDMapping.local_id.in_(batch))
+                for local_id, public_id in query:
+                    public_ids[(domain_id, local_id, entity_type)] = public_id
+
+        return [public_ids.get((local_entity['domain_id'],
+                                local_entity['local_id'],
+                                local_entity['entity_type']))
+                for local_entity in local_entities]
+
     def get_id_mapping(self, public_id):
         session = sql.get_session()
         mapping_ref = session.query(IDMapping).get(public_id)
@@ -73,6 +95,21 @@ class Mapping(identity.MappingDriver):
             session.add(mapping_ref)
         return public_id
 
+    def create_id_mappings(self, local_entities, public_ids=None):
+        if public_ids is None:
+            public_ids = [None] * len(local_entities)
+        created = []
+        with sql.transaction() as session:
+            for local_entity, public_id in zip(local_entities, public_ids):
+                entity = local_entity.copy()
+                if public_id is None:
+                    public_id = self.id_generator_api.generate_public_ID(
+                        entity)
+                entity['public_id'] = public_id
+                session.add(IDMapping.from_dict(entity))
+                created.append(public_id)
+        return created
+
     def delete_id_mapping(self, public_id):
         with sql.transaction() as session:
             try:
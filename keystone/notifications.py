@@ -14,11 +14,14 @@
 
 """Notifications module for OpenStack Identity Service resources"""
 
+import atexit
 import collections
 import functools
 import inspect
 import logging
 import socket
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log
@@ -30,8 +33,9 @@ from pycadf import cadftype
 from pycadf import credential
 from pycadf import eventfactory
 from pycadf import resource
+from six.moves import queue
 
-from keystone.i18n import _, _LE
+from keystone.i18n import _, _LE, _LW
 
 
 notifier_opts = [
@@ -44,6 +48,15 @@ notifier_opts = [
                     'the resource being operated on. A "cadf" notification '
                     'has the same information, as well as information about '
                     'the initiator of the event.'),
+    cfg.IntOpt('notification_workers', default=0,
+               help='Number of workers that send notifications, and run the '
+                    'notification callbacks that can be deferred, after the '
+                    'API request has been answered. If 0, they are run '
+                    'during the API request.'),
+    cfg.IntOpt('notification_queue_size', default=1000,
+               help='Maximum number of notifications waiting for a '
+                    'notification worker. Notifications that don\'t fit in '
+                    'the queue are handled during the API request.'),
 ]
 
 config_section = None
@@ -79,6 +92,7 @@ SAML_AUDIT_TYPE = 'http://docs.oasis-open.org/security/saml/v2.0'
 # resource types that can be notified
 _SUBSCRIBERS = {}
 _notifier = None
+_dispatcher = None
 SERVICE = 'identity'
 
 
@@ -91,6 +105,15 @@ INVALIDATE_USER_TOKEN_PERSISTENCE = 'invalidate_user_tokens'
 INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE = 'invalidate_user_project_tokens'
 INVALIDATE_USER_OAUTH_CONSUMER_TOKENS = 'invalidate_user_consumer_tokens'
 
+# NOTE(dstanek): Sent internally when a credential is updated or deleted, so
+# that anything derived from it in process can be dropped.
+CREDENTIAL_CHANGED = 'credential_changed'
+
+# Internal events that may be merged by coalesce_invalidations.
+_COALESCED_EVENTS = frozenset([INVALIDATE_USER_TOKEN_PERSISTENCE,
+                               INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE])
+_coalescing = threading.local()
+
 
 class Audit(object):
     """Namespace for audit notification functions.
@@ -341,8 +364,236 @@ def listener(cls):
     return cls
 
 
+def deferrable(callback):
+    """A decorator to mark a notification callback as deferrable.
+
+    A deferrable callback doesn't need to have run by the time the API request
+    that triggered it is answered, so it's run by a notification worker if
+    ``notification_workers`` is set.
+
+    """
+    callback.deferrable = True
+    return callback
+
+
+class _Dispatcher(object):
+    """Runs notification work in a pool of background workers.
+
+    Work is put on a bounded queue, and work that doesn't fit is run by the
+    caller instead, so that a slow message bus slows the API requests down
+    rather than letting the backlog grow without limit. The workers are
+    threads, which are green threads when eventlet has monkey patched the
+    standard library.
+
+    """
+
+    def __init__(self, workers, queue_size):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        self._workers = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._work,
+                                      name='notification-worker-%d' % i)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+            if stat == 'queued':
+                self._stats['max_pending'] = max(self._stats['max_pending'],
+                                                 self._queue.qsize())
+
+    def dispatch(self, fn, *args):
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            self._count('overflowed')
+            fn(*args)
+        else:
+            self._count('queued')
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                fn, args = item
+                try:
+                    fn(*args)
+                except Exception:
+                    self._count('failed')
+                    LOG.exception(_LE('Deferred notification work %s '
+                                      'failed'), fn)
+                else:
+                    self._count('completed')
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait for the queued work to be done.
+
+        :returns: True if it was done before the timeout
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    self._queue.all_tasks_done.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=None):
+        """Finish the queued work and stop the workers."""
+        flushed = self.flush(timeout)
+        for worker in self._workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        return flushed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        stats['workers'] = len(self._workers)
+        return stats
+
+
+def _get_dispatcher():
+    global _dispatcher
+
+    if _dispatcher is None and CONF.notification_workers > 0:
+        _dispatcher = _Dispatcher(CONF.notification_workers,
+                                  CONF.notification_queue_size)
+    return _dispatcher
+
+
+def _dispatch(fn, *args):
+    """Run fn by a notification worker, if there are any, or now."""
+    dispatcher = _get_dispatcher()
+    if dispatcher is None:
+        fn(*args)
+    else:
+        dispatcher.dispatch(fn, *args)
+
+
+def flush(timeout=None):
+    """Wait for the notifications being sent in the background to be sent.
+
+    :param timeout: seconds to wait for, or None to wait for as long as it
+                    takes
+    :returns: False if some notifications were still waiting at the timeout
+
+    """
+    if _dispatcher is None:
+        return True
+    flushed = _dispatcher.flush(timeout)
+    if not flushed:
+        LOG.warning(_LW('%d notifications were not sent in time'),
+                    _dispatcher.stats()['pending'])
+    return flushed
+
+
+# Notifications still waiting at exit are given this long to be sent.
+_EXIT_FLUSH_TIMEOUT = 30
+atexit.register(flush, _EXIT_FLUSH_TIMEOUT)
+
+
+def dispatch_stats():
+    """Return the counters of the background notification workers.
+
+    ``queued`` work was handed to the workers, which ``completed`` or
+    ``failed`` it. ``overflowed`` work was run by the API request since the
+    queue was full; a growing count means the workers can't keep up.
+    ``pending`` and ``max_pending`` are the current and highest queue depths.
+
+    """
+    if _dispatcher is None:
+        return {}
+    return _dispatcher.stats()
+
+
+class InvalidationCoalescer(object):
+    """Merges the token invalidation events sent within a block of code.
+
+    Within the block, the ``invalidate_user_tokens`` and
+    ``invalidate_user_project_tokens`` internal events are collected rather
+    than delivered. When the outermost block ends each distinct event is
+    delivered once, leaving out the project events of users whose tokens are
+    all invalidated anyway.
+
+    Used either as a context manager or as a decorator::
+
+        with notifications.coalesce_invalidations():
+            ...
+
+        @notifications.coalesce_invalidations()
+        def delete_group(self, group_id):
+            ...
+
+    """
+
+    def __enter__(self):
+        if not getattr(_coalescing, 'depth', 0):
+            _coalescing.depth = 0
+            _coalescing.events = collections.OrderedDict()
+        _coalescing.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _coalescing.depth -= 1
+        if _coalescing.depth:
+            return
+        events = _coalescing.events
+        _coalescing.events = None
+
+        # The events describe changes that have been made, so they are
+        # delivered even if the block raised.
+        user_ids = set(payload['resource_info']
+                       for resource_type, payload in events.values()
+                       if resource_type == INVALIDATE_USER_TOKEN_PERSISTENCE)
+        for resource_type, payload in events.values():
+            if (resource_type == INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE
+                    and payload['resource_info']['user_id'] in user_ids):
+                continue
+            notify_event_callbacks(SERVICE, resource_type, ACTIONS.internal,
+                                   payload)
+
+    def __call__(self, f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with InvalidationCoalescer():
+                return f(*args, **kwargs)
+        return wrapper
+
+
+def _coalesce(resource_type, operation, payload):
+    """Collect the event if it's sent within coalesce_invalidations."""
+    if (operation != ACTIONS.internal or
+            resource_type not in _COALESCED_EVENTS or
+            not getattr(_coalescing, 'depth', 0)):
+        return False
+    key = payload['resource_info']
+    if isinstance(key, dict):
+        key = tuple(sorted(key.items()))
+    _coalescing.events[(resource_type, key)] = (resource_type, payload)
+    return True
+
+
 def notify_event_callbacks(service, resource_type, operation, payload):
     """Sends a notification to registered extensions."""
+    if _coalesce(resource_type, operation, payload):
+        return
     if operation in _SUBSCRIBERS:
         if resource_type in _SUBSCRIBERS[operation]:
             for cb in _SUBSCRIBERS[operation][resource_type]:
@@ -354,7 +605,10 @@ def notify_event_callbacks(service, resource_type, operation, payload):
                 LOG.debug('Invoking callback %(cb_name)s for event '
                           '%(service)s %(resource_type)s %(operation)s for'
                           '%(payload)s', subst_dict)
-                cb(service, resource_type, operation, payload)
+                if getattr(cb, 'deferrable', False) is True:
+                    _dispatch(cb, service, resource_type, operation, payload)
+                else:
+                    cb(service, resource_type, operation, payload)
 
 
 def _get_notifier():
@@ -395,8 +649,11 @@ def reset_notifier():
     This is used only for testing purposes.
 
     """
-    global _notifier
+    global _notifier, _dispatcher
     _notifier = None
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
 
 
 def _create_cadf_payload(operation, resource_type, resource_id,
@@ -466,12 +723,19 @@ def _send_notification(operation, resource_type, resource_id, public=True):
                 'service': SERVICE,
                 'resource_type': resource_type,
                 'operation': operation}
-            try:
-                notifier.info(context, event_type, payload)
-            except Exception:
-                LOG.exception(_LE(
-                    'Failed to send %(res_id)s %(event_type)s notification'),
-                    {'res_id': resource_id, 'event_type': event_type})
+            _dispatch(_notify, notifier, context, event_type, payload,
+                      _LE('Failed to send %(res_id)s %(event_type)s '
+                          'notification'),
+                      {'res_id': resource_id, 'event_type': event_type})
+
+
+def _notify(notifier, context, event_type, payload, error_msg, error_args):
+    try:
+        notifier.info(context, event_type, payload)
+    except Exception:
+        # diaper defense: any exception that occurs while emitting the
+        # notification should not interfere with the API request
+        LOG.exception(error_msg, error_args)
 
 
 def _get_request_audit_info(context, user_id=None):
@@ -733,17 +997,16 @@ def _send_audit_notification(action, initiator, outcome, target,
     notifier = _get_notifier()
 
     if notifier:
-        try:
-            notifier.info(context, event_type, payload)
-        except Exception:
-            # diaper defense: any exception that occurs while emitting the
-            # notification should not interfere with the API request
-            LOG.exception(_LE(
-                'Failed to send %(action)s %(event_type)s notification'),
-                {'action': action, 'event_type': event_type})
+        _dispatch(_notify, notifier, context, event_type, payload,
+                  _LE('Failed to send %(action)s %(event_type)s '
+                      'notification'),
+                  {'action': action, 'event_type': event_type})
 
 
 emit_event = CadfNotificationWrapper
 
 
+coalesce_invalidations = InvalidationCoalescer
+
+
 role_assignment = CadfRoleAssignmentNotificationWrapper
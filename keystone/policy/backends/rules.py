@@ -18,7 +18,9 @@
 from oslo_config import cfg
 from oslo_log import log
 from oslo_policy import policy as common_policy
+from oslo_serialization import jsonutils
 
+from keystone.common import utils
 from keystone import exception
 from keystone import policy
 
@@ -29,6 +31,79 @@ LOG = log.getLogger(__name__)
 
 _ENFORCER = None
 
+# The number of policy decisions remembered by the enforcer.
+DECISION_CACHE_SIZE = 1000
+
+# Check kinds whose result depends on something other than the rules, the
+# target and the credentials, so decisions involving them are never cached.
+_UNCACHEABLE_CHECK_KINDS = frozenset(['http', 'https'])
+
+
+class _Enforcer(common_policy.Enforcer):
+    """An enforcer that remembers its recent decisions.
+
+    Decisions are keyed on the action and a fingerprint of the credentials
+    and target, and are forgotten whenever the rules are set, reloaded or
+    cleared.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._decisions = utils.LRUCache(DECISION_CACHE_SIZE)
+        self._cacheable = {}
+        super(_Enforcer, self).__init__(*args, **kwargs)
+
+    def _forget_decisions(self):
+        self._decisions.clear()
+        self._cacheable.clear()
+
+    def set_rules(self, *args, **kwargs):
+        super(_Enforcer, self).set_rules(*args, **kwargs)
+        self._forget_decisions()
+
+    def clear(self):
+        super(_Enforcer, self).clear()
+        self._forget_decisions()
+
+    def _is_cacheable(self, action):
+        if action not in self._cacheable:
+            try:
+                rule = self.rules[action]
+            except KeyError:
+                self._cacheable[action] = False
+            else:
+                self._cacheable[action] = self._is_deterministic(rule, set())
+        return self._cacheable[action]
+
+    def _is_deterministic(self, check, seen):
+        if isinstance(check, (common_policy.AndCheck,
+                              common_policy.OrCheck)):
+            return all(self._is_deterministic(c, seen) for c in check.rules)
+        if isinstance(check, common_policy.NotCheck):
+            return self._is_deterministic(check.rule, seen)
+        if isinstance(check, common_policy.RuleCheck):
+            if check.match in seen:
+                return True
+            seen.add(check.match)
+            rule = self.rules.get(check.match)
+            return rule is None or self._is_deterministic(rule, seen)
+        return getattr(check, 'kind', None) not in _UNCACHEABLE_CHECK_KINDS
+
+    def cached_enforce(self, action, target, credentials):
+        """Enforce a policy, reusing an earlier identical decision."""
+        self.load_rules()
+        if not self._is_cacheable(action):
+            return self.enforce(action, target, credentials)
+
+        key = (action,
+               jsonutils.dumps(credentials, sort_keys=True),
+               jsonutils.dumps(target, sort_keys=True))
+        result = self._decisions.get(key)
+        if result is None:
+            result = self.enforce(action, target, credentials)
+            self._decisions.set(key, result)
+        return result
+
 
 def reset():
     global _ENFORCER
@@ -38,7 +113,7 @@ def reset():
 def init():
     global _ENFORCER
     if not _ENFORCER:
-        _ENFORCER = common_policy.Enforcer(CONF)
+        _ENFORCER = _Enforcer(CONF)
 
 
 def enforce(credentials, action, target, do_raise=True):
@@ -60,13 +135,10 @@ def enforce(credentials, action, target, do_raise=True):
     """
     init()
 
-    # Add the exception arguments if asked to do a raise
-    extra = {}
-    if do_raise:
-        extra.update(exc=exception.ForbiddenAction, action=action,
-                     do_raise=do_raise)
-
-    return _ENFORCER.enforce(action, target, credentials, **extra)
+    result = _ENFORCER.cached_enforce(action, target, credentials)
+    if do_raise and not result:
+        raise exception.ForbiddenAction(action=action)
+    return result
 
 
 class Policy(policy.Driver):
@@ -12,6 +12,7 @@
 
 from oslo_config import cfg
 from oslo_log import log
+import sqlalchemy
 
 from keystone.common import clean
 from keystone.common import sql
@@ -89,45 +90,88 @@ class Resource(keystone_resource.Driver):
         project_refs = query.all()
         return [project_ref.to_dict() for project_ref in project_refs]
 
+    def _walk_parents(self, session, project_id):
+        """Yield ``(ancestor_id, depth)`` following ``parent_id`` upwards.
+
+        If the project is part of a circular reference it is yielded as its
+        own ancestor, and the walk stops at the first repeated project.
+
+        """
+        examined = set([project_id])
+        project_ref = self._get_project(session, project_id)
+        depth = 0
+        while project_ref.parent_id is not None:
+            depth += 1
+            parent_id = project_ref.parent_id
+            if parent_id in examined:
+                if parent_id == project_id:
+                    yield parent_id, depth
+                return
+            yield parent_id, depth
+            examined.add(parent_id)
+            project_ref = self._get_project(session, parent_id)
+
+    def _add_to_hierarchy(self, session, project_id, parent_id):
+        if parent_id is None:
+            return
+        session.add(ProjectHierarchy(ancestor_id=parent_id,
+                                     descendant_id=project_id, depth=1))
+        query = session.query(ProjectHierarchy)
+        for ref in query.filter_by(descendant_id=parent_id):
+            session.add(ProjectHierarchy(ancestor_id=ref.ancestor_id,
+                                         descendant_id=project_id,
+                                         depth=ref.depth + 1))
+
+    def _rebuild_hierarchy(self, session, project_id):
+        """Recompute the ancestors of a project and of its whole subtree."""
+        query = session.query(ProjectHierarchy.descendant_id)
+        query = query.filter_by(ancestor_id=project_id)
+        project_ids = set(ref.descendant_id for ref in query)
+        project_ids.add(project_id)
+
+        query = session.query(ProjectHierarchy)
+        query = query.filter(ProjectHierarchy.descendant_id.in_(project_ids))
+        query.delete(synchronize_session=False)
+        for descendant_id in project_ids:
+            for ancestor_id, depth in self._walk_parents(session,
+                                                         descendant_id):
+                session.add(ProjectHierarchy(ancestor_id=ancestor_id,
+                                             descendant_id=descendant_id,
+                                             depth=depth))
+
+    def _log_circular_reference(self, project_id):
+        msg = _LE('Circular reference or a repeated '
+                  'entry found in projects hierarchy - '
+                  '%(project_id)s.')
+        LOG.error(msg, {'project_id': project_id})
+
     def list_projects_in_subtree(self, project_id):
         with sql.transaction() as session:
-            children = self._get_children(session, [project_id])
-            subtree = []
-            examined = set([project_id])
-            while children:
-                children_ids = set()
-                for ref in children:
-                    if ref['id'] in examined:
-                        msg = _LE('Circular reference or a repeated '
-                                  'entry found in projects hierarchy - '
-                                  '%(project_id)s.')
-                        LOG.error(msg, {'project_id': ref['id']})
-                        return
-                    children_ids.add(ref['id'])
-
-                examined.update(children_ids)
-                subtree += children
-                children = self._get_children(session, children_ids)
+            query = session.query(Project)
+            query = query.join(
+                ProjectHierarchy,
+                ProjectHierarchy.descendant_id == Project.id)
+            query = query.filter(ProjectHierarchy.ancestor_id == project_id)
+            query = query.order_by(ProjectHierarchy.depth)
+            subtree = [project_ref.to_dict() for project_ref in query]
+            if any(ref['id'] == project_id for ref in subtree):
+                self._log_circular_reference(project_id)
+                return
             return subtree
 
     def list_project_parents(self, project_id):
         with sql.transaction() as session:
-            project = self._get_project(session, project_id).to_dict()
-            parents = []
-            examined = set()
-            while project.get('parent_id') is not None:
-                if project['id'] in examined:
-                    msg = _LE('Circular reference or a repeated '
-                              'entry found in projects hierarchy - '
-                              '%(project_id)s.')
-                    LOG.error(msg, {'project_id': project['id']})
-                    return
-
-                examined.add(project['id'])
-                parent_project = self._get_project(
-                    session, project['parent_id']).to_dict()
-                parents.append(parent_project)
-                project = parent_project
+            self._get_project(session, project_id)
+            query = session.query(Project)
+            query = query.join(
+                ProjectHierarchy,
+                ProjectHierarchy.ancestor_id == Project.id)
+            query = query.filter(ProjectHierarchy.descendant_id == project_id)
+            query = query.order_by(ProjectHierarchy.depth)
+            parents = [project_ref.to_dict() for project_ref in query]
+            if any(ref['id'] == project_id for ref in parents):
+                self._log_circular_reference(project_id)
+                return
             return parents
 
     def is_leaf_project(self, project_id):
@@ -142,6 +186,8 @@ class Resource(keystone_resource.Driver):
         with sql.transaction() as session:
             tenant_ref = Project.from_dict(tenant)
             session.add(tenant_ref)
+            self._add_to_hierarchy(session, tenant_ref.id,
+                                   tenant_ref.parent_id)
             return tenant_ref.to_dict()
 
     @sql.handle_conflicts(conflict_type='project')
@@ -152,6 +198,7 @@ class Resource(keystone_resource.Driver):
         with sql.transaction() as session:
             tenant_ref = self._get_project(session, tenant_id)
             old_project_dict = tenant_ref.to_dict()
+            old_parent_id = tenant_ref.parent_id
             for k in tenant:
                 old_project_dict[k] = tenant[k]
             new_project = Project.from_dict(old_project_dict)
@@ -159,12 +206,22 @@ class Resource(keystone_resource.Driver):
                 if attr != 'id':
                     setattr(tenant_ref, attr, getattr(new_project, attr))
             tenant_ref.extra = new_project.extra
+            # NOTE: The manager does not allow the parent to change, but the
+            # hierarchy is kept consistent for direct driver callers.
+            if tenant_ref.parent_id != old_parent_id:
+                session.flush()
+                self._rebuild_hierarchy(session, tenant_id)
             return tenant_ref.to_dict(include_extra_dict=True)
 
     @sql.handle_conflicts(conflict_type='project')
     def delete_project(self, tenant_id):
         with sql.transaction() as session:
             tenant_ref = self._get_project(session, tenant_id)
+            query = session.query(ProjectHierarchy)
+            query = query.filter(sqlalchemy.or_(
+                ProjectHierarchy.ancestor_id == tenant_id,
+                ProjectHierarchy.descendant_id == tenant_id))
+            query.delete(synchronize_session=False)
             session.delete(tenant_ref)
 
     # domain crud
@@ -257,3 +314,19 @@ class Project(sql.ModelBase, sql.DictBase):
     # Unique constraint across two columns to create the separation
     # rather than just only 'name' being unique
     __table_args__ = (sql.UniqueConstraint('domain_id', 'name'), {})
+
+
+class ProjectHierarchy(sql.ModelBase, sql.ModelDictMixin):
+    """Closure table of the project hierarchy.
+
+    There is a row for every ancestor of a project, so that the parents and
+    the subtree of a project can each be fetched with a single query.
+
+    """
+
+    __tablename__ = 'project_hierarchy'
+    attributes = ['ancestor_id', 'descendant_id', 'depth']
+    ancestor_id = sql.Column(sql.String(64), primary_key=True)
+    descendant_id = sql.Column(sql.String(64), primary_key=True,
+                               index=True)
+    depth = sql.Column(sql.Integer, nullable=False)
@@ -220,6 +220,7 @@ class Manager(manager.Manager):
                                             original_tenant['domain_id'])
         return ret
 
+    @notifications.coalesce_invalidations()
     def delete_project(self, tenant_id, initiator=None):
         if not self.driver.is_leaf_project(tenant_id):
             raise exception.ForbiddenAction(
@@ -434,6 +435,7 @@ class Manager(manager.Manager):
         self.get_domain_by_name.invalidate(self, original_domain['name'])
         return ret
 
+    @notifications.coalesce_invalidations()
     def delete_domain(self, domain_id, initiator=None):
         # explicitly forbid deleting the default domain (this should be a
         # carefully orchestrated manual process involving configuration
@@ -86,3 +86,35 @@ class FormatUrlTests(unit.BaseTestCase):
                   'user_id': 'B'}
         self.assertIsNone(core.format_url(url_template, values,
                           silent_keyerror_failures=['tenant_id']))
+
+
+class CompileUrlTests(unit.BaseTestCase):
+
+    def test_only_user_and_tenant_are_left(self):
+        url_template = ('http://$(public_bind_host)s:$(admin_port)d/'
+                        '$(tenant_id)s/$(user_id)s')
+        values = {'public_bind_host': 'server', 'admin_port': 9090}
+        compiled_url = core.compile_url(url_template, values)
+
+        self.assertEqual('http://server:9090/%(tenant_id)s/%(user_id)s',
+                         compiled_url)
+        self.assertEqual('http://server:9090/A/B',
+                         core.fill_url(compiled_url, 'B', 'A'))
+
+    def test_literal_percent_signs_are_kept(self):
+        url_template = 'http://$(public_bind_host)s/a%%20b/$(user_id)s'
+        values = {'public_bind_host': 'ser%ver'}
+        compiled_url = core.compile_url(url_template, values)
+
+        self.assertEqual('http://ser%ver/a%20b/B',
+                         core.fill_url(compiled_url, 'B', 'A'))
+
+    def test_raises_malformed_on_missing_key(self):
+        self.assertRaises(exception.MalformedEndpoint,
+                          core.compile_url,
+                          "http://$(public_bind_host)s/$(public_port)d",
+                          {"public_bind_host": "1"})
+
+    def test_fill_without_tenant_id(self):
+        compiled_url = core.compile_url('http://server/$(tenant_id)s', {})
+        self.assertIsNone(core.fill_url(compiled_url, 'B', None))
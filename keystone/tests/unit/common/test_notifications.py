@@ -13,6 +13,7 @@
 #   under the License.
 
 import logging
+import threading
 import uuid
 
 import mock
@@ -204,6 +205,151 @@ class NotificationsTestCase(unit.BaseTestCase):
             mocked.assert_called_once_with(*expected_args)
 
 
+class NotificationDispatchTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(NotificationDispatchTestCase, self).setUp()
+        self.config_fixture = self.useFixture(config_fixture.Config(CONF))
+        self.config_fixture.config(notification_workers=1,
+                                   notification_queue_size=1)
+        self.addCleanup(notifications.clear_subscribers)
+        self.addCleanup(notifications.reset_notifier)
+
+    def _register_deferrable_callback(self, release=None):
+        threads = []
+        started = threading.Event()
+
+        @notifications.deferrable
+        def callback(service, resource_type, operation, payload):
+            threads.append(threading.current_thread())
+            if release is not None and len(threads) == 1:
+                # Keep the worker busy with the first callback.
+                started.set()
+                release.wait()
+
+        notifications.register_event_callback(CREATED_OPERATION,
+                                              EXP_RESOURCE_TYPE, callback)
+        return threads, started
+
+    def test_deferrable_callback_runs_in_worker(self):
+        threads, started = self._register_deferrable_callback()
+        notifications.Audit.created(EXP_RESOURCE_TYPE, uuid.uuid4().hex,
+                                    public=False)
+        self.assertTrue(notifications.flush(timeout=10))
+
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+        stats = notifications.dispatch_stats()
+        self.assertEqual(1, stats['queued'])
+        self.assertEqual(1, stats['completed'])
+        self.assertEqual(0, stats['pending'])
+
+    def test_callback_runs_inline(self):
+        callback = register_callback(CREATED_OPERATION)
+        notifications.Audit.created(EXP_RESOURCE_TYPE, uuid.uuid4().hex,
+                                    public=False)
+        self.assertEqual(1, callback.call_count)
+
+    def test_full_queue_runs_inline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        threads, started = self._register_deferrable_callback(
+            release=release)
+
+        # The first callback keeps the worker busy and the second fills the
+        # queue, so the third has to be run by the caller.
+        notifications.Audit.created(EXP_RESOURCE_TYPE, uuid.uuid4().hex,
+                                    public=False)
+        self.assertTrue(started.wait(10))
+        for i in range(2):
+            notifications.Audit.created(EXP_RESOURCE_TYPE, uuid.uuid4().hex,
+                                        public=False)
+        release.set()
+        self.assertTrue(notifications.flush(timeout=10))
+
+        self.assertEqual(3, len(threads))
+        self.assertIn(threading.current_thread(), threads)
+        self.assertEqual(1, notifications.dispatch_stats()['overflowed'])
+
+    def test_notification_sent_by_worker(self):
+        notifier = notifications._get_notifier()
+        with mock.patch.object(notifier, 'info') as info:
+            notifications._send_notification(CREATED_OPERATION,
+                                             EXP_RESOURCE_TYPE,
+                                             uuid.uuid4().hex)
+            self.assertTrue(notifications.flush(timeout=10))
+        self.assertEqual(1, info.call_count)
+
+
+class InvalidationCoalescerTestCase(unit.BaseTestCase):
+
+    def setUp(self):
+        super(InvalidationCoalescerTestCase, self).setUp()
+        self.addCleanup(notifications.clear_subscribers)
+        self.user_callback = mock.Mock(__name__='user_callback')
+        notifications.register_event_callback(
+            notifications.ACTIONS.internal,
+            notifications.INVALIDATE_USER_TOKEN_PERSISTENCE,
+            self.user_callback)
+        self.user_project_callback = mock.Mock(
+            __name__='user_project_callback')
+        notifications.register_event_callback(
+            notifications.ACTIONS.internal,
+            notifications.INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE,
+            self.user_project_callback)
+
+    def _invalidate_user(self, user_id):
+        notifications._send_notification(
+            notifications.ACTIONS.internal,
+            notifications.INVALIDATE_USER_TOKEN_PERSISTENCE, user_id,
+            public=False)
+
+    def _invalidate_user_project(self, user_id, project_id):
+        notifications._send_notification(
+            notifications.ACTIONS.internal,
+            notifications.INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE,
+            {'user_id': user_id, 'project_id': project_id}, public=False)
+
+    def test_events_merged(self):
+        user_id = uuid.uuid4().hex
+        other_user_id = uuid.uuid4().hex
+        project_id = uuid.uuid4().hex
+
+        with notifications.coalesce_invalidations():
+            for i in range(3):
+                self._invalidate_user(user_id)
+                self._invalidate_user_project(user_id, project_id)
+                with notifications.coalesce_invalidations():
+                    self._invalidate_user_project(other_user_id, project_id)
+            self.assertFalse(self.user_callback.called)
+            self.assertFalse(self.user_project_callback.called)
+
+        self.user_callback.assert_called_once_with(
+            'identity', notifications.INVALIDATE_USER_TOKEN_PERSISTENCE,
+            notifications.ACTIONS.internal, {'resource_info': user_id})
+        self.user_project_callback.assert_called_once_with(
+            'identity',
+            notifications.INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE,
+            notifications.ACTIONS.internal,
+            {'resource_info': {'user_id': other_user_id,
+                               'project_id': project_id}})
+
+    def test_events_delivered_on_error(self):
+        user_id = uuid.uuid4().hex
+
+        @notifications.coalesce_invalidations()
+        def fail():
+            self._invalidate_user(user_id)
+            raise ArbitraryException()
+
+        self.assertRaises(ArbitraryException, fail)
+        self.assertEqual(1, self.user_callback.call_count)
+
+    def test_events_delivered_without_coalescing(self):
+        self._invalidate_user(uuid.uuid4().hex)
+        self.assertEqual(1, self.user_callback.call_count)
+
+
 class BaseNotificationTest(test_v3.RestfulTestCase):
 
     def setUp(self):
@@ -0,0 +1,72 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import uuid
+
+from keystoneclient.common import cms
+import mock
+from oslo_serialization import jsonutils
+
+from keystone.common import signing
+from keystone.tests import unit as tests
+
+
+CERTFILE = tests.dirs.root('examples', 'pki', 'certs', 'signing_cert.pem')
+KEYFILE = tests.dirs.root('examples', 'pki', 'private', 'signing_key.pem')
+
+
+class CMSSigningTests(tests.BaseTestCase):
+
+    def setUp(self):
+        super(CMSSigningTests, self).setUp()
+        # A document large enough to need multi-octet DER lengths.
+        self.text = jsonutils.dumps(
+            {'token': {'id': uuid.uuid4().hex, 'catalog': ['x' * 100] * 700}})
+
+    def test_cms_sign_text_matches_openssl(self):
+        for message_digest in ('sha1', 'sha256', 'sha512'):
+            self.assertEqual(
+                cms.cms_sign_text(self.text, CERTFILE, KEYFILE,
+                                  message_digest=message_digest),
+                signing.cms_sign_text(self.text, CERTFILE, KEYFILE,
+                                      message_digest=message_digest))
+
+    def test_cms_sign_token_matches_openssl(self):
+        for text in ('', '{}', self.text):
+            self.assertEqual(
+                cms.cms_sign_token(text, CERTFILE, KEYFILE),
+                signing.cms_sign_token(text, CERTFILE, KEYFILE))
+
+    def test_pkiz_sign_matches_openssl(self):
+        self.assertEqual(cms.pkiz_sign(self.text, CERTFILE, KEYFILE),
+                         signing.pkiz_sign(self.text, CERTFILE, KEYFILE))
+
+    def test_signed_token_can_be_verified(self):
+        token_id = signing.cms_sign_token(self.text, CERTFILE, KEYFILE)
+        verified = cms.cms_verify(cms.token_to_cms(token_id), CERTFILE,
+                                  tests.dirs.root('examples', 'pki', 'certs',
+                                                  'cacert.pem'))
+        self.assertEqual(self.text.encode('utf-8'), verified)
+
+    def test_signing_does_not_fork(self):
+        signing.cms_sign_token(self.text, CERTFILE, KEYFILE)
+        with mock.patch.object(cms, 'cms_sign_data') as cms_sign_data:
+            signing.cms_sign_token(self.text, CERTFILE, KEYFILE)
+        self.assertFalse(cms_sign_data.called)
+
+    def test_missing_key_falls_back_to_openssl(self):
+        keyfile = uuid.uuid4().hex
+        with mock.patch.object(cms, 'cms_sign_token') as cms_sign_token:
+            signing.cms_sign_token(self.text, CERTFILE, keyfile)
+        cms_sign_token.assert_called_once_with(
+            self.text, CERTFILE, keyfile,
+            message_digest=cms.DEFAULT_TOKEN_DIGEST_ALGORITHM)
@@ -11,6 +11,7 @@
 # under the License.
 
 import datetime
+import threading
 import uuid
 
 from oslo_config import cfg
@@ -154,6 +155,71 @@ class UtilsTestCase(tests.BaseTestCase):
         self.assertEqual(expected_json, json)
 
 
+class LRUCacheTestCase(tests.BaseTestCase):
+
+    def test_get_and_set(self):
+        cache = common_utils.LRUCache(10)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual('default', cache.get('a', 'default'))
+        cache.set('a', 1, 60)
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(1, cache.pop('a'))
+        self.assertIsNone(cache.get('a'))
+
+    def test_expired_values_are_missing(self):
+        cache = common_utils.LRUCache(10)
+        cache.set('a', 1, -1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_values_without_ttl_do_not_expire(self):
+        cache = common_utils.LRUCache(10)
+        cache.set('a', False)
+        self.assertIs(False, cache.get('a'))
+
+    def test_least_recently_used_is_dropped(self):
+        cache = common_utils.LRUCache(2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_discard_values(self):
+        cache = common_utils.LRUCache(10)
+        cache.set('a', 1, 60)
+        cache.set('b', 1, 60)
+        cache.set('c', 2, 60)
+        cache.discard_values(1)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.get('c'))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_concurrent_access(self):
+        cache = common_utils.LRUCache(50)
+        errors = []
+
+        def use_cache(offset):
+            try:
+                for i in range(2000):
+                    cache.set(offset + i % 100, i, 60)
+                    cache.get(offset + (i + 7) % 100)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=use_cache, args=(i * 100,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(50, len(cache))
+
+
 class ServiceHelperTests(tests.BaseTestCase):
 
     @service.fail_gracefully
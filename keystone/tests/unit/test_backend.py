@@ -20,6 +20,7 @@ import uuid
 from keystoneclient.common import cms
 import mock
 from oslo_config import cfg
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import six
 from six.moves import range
@@ -32,6 +33,7 @@ from keystone.tests import unit as tests
 from keystone.tests.unit import default_fixtures
 from keystone.tests.unit import filtering
 from keystone.tests.unit import utils as test_utils
+from keystone.token import persistence as token_persistence
 from keystone.token import provider
 
 
@@ -214,6 +216,13 @@ class IdentityTests(object):
         # Ensure the user is only returned once
         self.assertEqual(1, len(user_ids))
 
+    def test_list_user_ids_for_projects(self):
+        user_ids = self.assignment_api.list_user_ids_for_projects(
+            [self.tenant_bar['id'], self.tenant_baz['id']])
+        self.assertItemsEqual([self.user_foo['id'], self.user_sna['id'],
+                               self.user_two['id'], self.user_badguy['id']],
+                              user_ids)
+
     def test_get_project_user_ids_404(self):
         self.assertRaises(exception.ProjectNotFound,
                           self.assignment_api.list_user_ids_for_project,
@@ -799,6 +808,71 @@ class IdentityTests(object):
                           self.user_foo['id'],
                           uuid.uuid4().hex)
 
+    def test_get_roles_for_user_and_project_is_cached(self):
+        self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        with mock.patch.object(self.identity_api,
+                               'list_groups_for_user') as list_groups:
+            roles_ref = self.assignment_api.get_roles_for_user_and_project(
+                self.user_foo['id'], self.tenant_bar['id'])
+            self.assertFalse(list_groups.called)
+        self.assertNotIn(self.role_admin['id'], roles_ref)
+
+        # A grant for the user only invalidates that user's roles.
+        self.assignment_api.get_roles_for_user_and_project(
+            self.user_two['id'], self.tenant_baz['id'])
+        self.assignment_api.create_grant(user_id=self.user_foo['id'],
+                                         project_id=self.tenant_bar['id'],
+                                         role_id=self.role_admin['id'])
+        with mock.patch.object(self.identity_api,
+                               'list_groups_for_user') as list_groups:
+            self.assignment_api.get_roles_for_user_and_project(
+                self.user_two['id'], self.tenant_baz['id'])
+            self.assertFalse(list_groups.called)
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertIn(self.role_admin['id'], roles_ref)
+
+        self.assignment_api.delete_grant(user_id=self.user_foo['id'],
+                                         project_id=self.tenant_bar['id'],
+                                         role_id=self.role_admin['id'])
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertNotIn(self.role_admin['id'], roles_ref)
+
+    def test_cached_roles_follow_group_membership(self):
+        new_group = {'domain_id': DEFAULT_DOMAIN_ID,
+                     'name': uuid.uuid4().hex}
+        new_group = self.identity_api.create_group(new_group)
+        self.assignment_api.create_grant(group_id=new_group['id'],
+                                         project_id=self.tenant_bar['id'],
+                                         role_id=self.role_other['id'])
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertNotIn(self.role_other['id'], roles_ref)
+
+        self.identity_api.add_user_to_group(self.user_foo['id'],
+                                            new_group['id'])
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertIn(self.role_other['id'], roles_ref)
+
+        self.assignment_api.delete_grant(group_id=new_group['id'],
+                                         project_id=self.tenant_bar['id'],
+                                         role_id=self.role_other['id'])
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertNotIn(self.role_other['id'], roles_ref)
+
+        self.assignment_api.create_grant(group_id=new_group['id'],
+                                         project_id=self.tenant_bar['id'],
+                                         role_id=self.role_other['id'])
+        self.identity_api.remove_user_from_group(self.user_foo['id'],
+                                                 new_group['id'])
+        roles_ref = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        self.assertNotIn(self.role_other['id'], roles_ref)
+
     def test_add_role_to_user_and_project_404(self):
         self.assertRaises(exception.ProjectNotFound,
                           self.assignment_api.add_role_to_user_and_project,
@@ -1724,6 +1798,32 @@ class IdentityTests(object):
             self.user_foo['id'])
         self.assertNotIn(self.tenant_baz, tenants)
 
+    def test_remove_user_from_project_revokes_removed_roles_on_error(self):
+        self.assignment_api.add_user_to_project(self.tenant_baz['id'],
+                                                self.user_foo['id'])
+        self.assignment_api.add_role_to_user_and_project(
+            tenant_id=self.tenant_baz['id'],
+            user_id=self.user_foo['id'],
+            role_id=self.role_other['id'])
+        driver = self.assignment_api.driver
+        remove_role = driver.remove_role_from_user_and_project
+        calls = []
+
+        def remove_one_role(user_id, tenant_id, role_id):
+            if calls:
+                raise exception.UnexpectedError()
+            calls.append(role_id)
+            remove_role(user_id, tenant_id, role_id)
+
+        with mock.patch.object(driver, 'remove_role_from_user_and_project',
+                               side_effect=remove_one_role), \
+                mock.patch.object(self.revoke_api, 'revoke_many') as revoke:
+            self.assertRaises(exception.UnexpectedError,
+                              self.assignment_api.remove_user_from_project,
+                              self.tenant_baz['id'], self.user_foo['id'])
+        events = list(revoke.call_args[0][0])
+        self.assertEqual(calls, [event.role_id for event in events])
+
     def test_remove_user_from_project_404(self):
         self.assertRaises(exception.ProjectNotFound,
                           self.assignment_api.remove_user_from_project,
@@ -2704,6 +2804,53 @@ class IdentityTests(object):
                           uuid.uuid4().hex,
                           DEFAULT_DOMAIN_ID)
 
+    def test_list_groups_by_ids(self):
+        groups = [self.identity_api.create_group(
+            {'domain_id': DEFAULT_DOMAIN_ID, 'name': uuid.uuid4().hex})
+            for _i in range(3)]
+        group_ids = [groups[0]['id'], groups[1]['id'], uuid.uuid4().hex]
+
+        group_refs = self.identity_api.list_groups_by_ids(group_ids)
+        self.assertEqual(set(group_ids[:2]),
+                         set(group['id'] for group in group_refs))
+
+    def test_get_group_ids_by_names(self):
+        groups = [self.identity_api.create_group(
+            {'domain_id': DEFAULT_DOMAIN_ID, 'name': uuid.uuid4().hex})
+            for _i in range(3)]
+        missing = (uuid.uuid4().hex, DEFAULT_DOMAIN_ID)
+        keys = [(groups[0]['name'], DEFAULT_DOMAIN_ID),
+                (groups[1]['name'], DEFAULT_DOMAIN_ID),
+                missing]
+
+        group_ids = self.identity_api.get_group_ids_by_names(keys)
+        self.assertEqual({keys[0]: groups[0]['id'],
+                          keys[1]: groups[1]['id']}, group_ids)
+
+        self.identity_api.delete_group(groups[0]['id'])
+        group_ids = self.identity_api.get_group_ids_by_names(keys)
+        self.assertEqual({keys[1]: groups[1]['id']}, group_ids)
+
+    @tests.skip_if_cache_disabled('identity')
+    def test_get_group_ids_by_names_not_cached_when_missing(self):
+        key = (uuid.uuid4().hex, DEFAULT_DOMAIN_ID)
+        self.assertEqual({}, self.identity_api.get_group_ids_by_names([key]))
+
+        # A group created by another process is found straight away.
+        driver = self.identity_api._select_identity_driver(DEFAULT_DOMAIN_ID)
+        group_id = uuid.uuid4().hex
+        driver.create_group(group_id, {'id': group_id, 'name': key[0],
+                                       'domain_id': DEFAULT_DOMAIN_ID})
+        group_ids = self.identity_api.get_group_ids_by_names([key])
+        self.assertEqual([key], list(group_ids))
+
+        # Refreshing doesn't use the ID this process resolved before.
+        driver.delete_group(group_id)
+        self.assertEqual(group_ids,
+                         self.identity_api.get_group_ids_by_names([key]))
+        self.assertEqual({}, self.identity_api.get_group_ids_by_names(
+            [key], refresh=True))
+
     @tests.skip_if_cache_disabled('identity')
     def test_cache_layer_group_crud(self):
         group = {'domain_id': DEFAULT_DOMAIN_ID, 'name': uuid.uuid4().hex}
@@ -3954,6 +4101,65 @@ class TokenTests(object):
                           token_id1)
         self.token_provider_api._persistence.get_token(token_id2)
 
+    def test_delete_tokens_for_users(self):
+        token_id1, data = self.create_token_sample_data(
+            tenant_id='testtenantid')
+        token_id2, data = self.create_token_sample_data(
+            tenant_id='testtenantid1', user_id='testuserid1')
+        token_id3, data = self.create_token_sample_data(
+            tenant_id='testtenantid', user_id='testuserid2')
+        token_id4, data = self.create_token_sample_data(
+            tenant_id='testtenantid2', user_id='testuserid1')
+
+        driver = self.token_provider_api._persistence.driver
+        deleted = driver.delete_tokens_for_users(
+            ['testuserid', 'testuserid1'],
+            project_ids=['testtenantid', 'testtenantid1'])
+        self.assertEqual(sorted([token_id1, token_id2]), sorted(deleted))
+
+        for token_id in (token_id1, token_id2):
+            self.assertRaises(exception.TokenNotFound,
+                              self.token_provider_api._persistence.get_token,
+                              token_id)
+        for token_id in (token_id3, token_id4):
+            self.token_provider_api._persistence.get_token(token_id)
+
+    def test_delete_tokens_for_users_default_lists_tokens_once(self):
+        token_id1, data = self.create_token_sample_data(
+            tenant_id='testtenantid')
+        token_id2, data = self.create_token_sample_data(
+            tenant_id='testtenantid1', user_id='testuserid1')
+        token_id3, data = self.create_token_sample_data(
+            tenant_id='testtenantid3', user_id='testuserid1')
+
+        driver = self.token_provider_api._persistence.driver
+        with mock.patch.object(driver, '_list_tokens',
+                               wraps=driver._list_tokens) as list_tokens:
+            deleted = token_persistence.Driver.delete_tokens_for_users(
+                driver, ['testuserid', 'testuserid1'],
+                project_ids=['testtenantid', 'testtenantid1',
+                             'testtenantid2'])
+        self.assertEqual(sorted([token_id1, token_id2]), sorted(deleted))
+        self.assertEqual(2, list_tokens.call_count)
+        self.token_provider_api._persistence.get_token(token_id3)
+
+    def test_delete_tokens_for_trusts(self):
+        token_id1, data = self.create_token_sample_data(
+            tenant_id='testtenantid', trust_id='testtrustid')
+        token_id2, data = self.create_token_sample_data(
+            tenant_id='testtenantid', user_id='testuserid1',
+            trust_id='testtrustid1')
+        token_id3, data = self.create_token_sample_data(
+            tenant_id='testtenantid', user_id='testuserid2',
+            trust_id='testtrustid2')
+
+        driver = self.token_provider_api._persistence.driver
+        deleted = driver.delete_tokens_for_trusts(
+            [{'id': 'testtrustid', 'trustee_user_id': 'testuserid'},
+             {'id': 'testtrustid1', 'trustee_user_id': 'testuserid1'}])
+        self.assertEqual(sorted([token_id1, token_id2]), sorted(deleted))
+        self.token_provider_api._persistence.get_token(token_id3)
+
     def _test_token_list(self, token_list_fn):
         tokens = token_list_fn('testuserid')
         self.assertEqual(0, len(tokens))
@@ -4162,6 +4368,48 @@ class TokenTests(object):
         self.assertIn(token_id, revoked_ids)
         self.assertIn(token2_id, revoked_ids)
 
+    @tests.skip_if_cache_disabled('token')
+    def test_signed_revocation_list_cache(self):
+        persistence = self.token_provider_api._persistence
+        token_id, data = self.create_token_sample_data()
+        revocation_list = self.token_provider_api.get_signed_revocation_list()
+
+        # The document is only signed again once the list changes.
+        with mock.patch.object(persistence, 'list_revoked_tokens') as listed:
+            self.assertEqual(
+                revocation_list,
+                self.token_provider_api.get_signed_revocation_list())
+        self.assertFalse(listed.called)
+
+        persistence.delete_token(token_id)
+        new_revocation_list = (
+            self.token_provider_api.get_signed_revocation_list())
+        self.assertNotEqual(revocation_list['etag'],
+                            new_revocation_list['etag'])
+        data = cms.cms_verify(new_revocation_list['signed'],
+                              CONF.signing.certfile, CONF.signing.ca_certs)
+        revoked_ids = [t['id'] for t in jsonutils.loads(data)['revoked']]
+        self.assertIn(token_id, revoked_ids)
+
+    @tests.skip_if_cache_disabled('token')
+    def test_signed_revocation_list_refreshed_on_expiry(self):
+        persistence = self.token_provider_api._persistence
+        expires = timeutils.utcnow() + datetime.timedelta(minutes=1)
+        token_id, data = self.create_token_sample_data(expires=expires)
+        persistence.delete_token(token_id)
+        revocation_list = self.token_provider_api.get_signed_revocation_list()
+
+        # Once the token expires the list is read and signed again.
+        with mock.patch.object(persistence.driver, 'list_revoked_tokens',
+                               return_value=[]):
+            with mock.patch.object(timeutils, 'utcnow') as mock_utcnow:
+                mock_utcnow.return_value = (
+                    expires + datetime.timedelta(minutes=1))
+                new_revocation_list = (
+                    self.token_provider_api.get_signed_revocation_list())
+        self.assertNotEqual(revocation_list['etag'],
+                            new_revocation_list['etag'])
+
     def _test_predictable_revoked_pki_token_id(self, hash_fn):
         token_id = self._create_token_id()
         token_id_hash = hash_fn(token_id).hexdigest()
@@ -4328,6 +4576,30 @@ class TokenCacheInvalidation(object):
         self._check_scoped_tokens_are_invalid()
         self._check_unscoped_tokens_are_valid()
 
+    def test_cached_validation_skips_revocation_check(self):
+        with mock.patch.object(self.token_provider_api,
+                               'check_revocation') as check_revocation:
+            self._check_scoped_tokens_are_valid()
+        self.assertFalse(check_revocation.called)
+
+    def test_revocation_event_forces_full_validation(self):
+        self.revoke_api.revoke_by_user(self.user['id'])
+        self._check_scoped_tokens_are_invalid()
+        self._check_unscoped_tokens_are_invalid()
+
+    def test_validation_cached_without_revocation_caching(self):
+        self.config_fixture.config(group='revoke', caching=False)
+        self._check_scoped_tokens_are_valid()
+        with mock.patch.object(self.token_provider_api.driver,
+                               'validate_v2_token') as validate_v2_token:
+            self._check_scoped_tokens_are_valid()
+        self.assertFalse(validate_v2_token.called)
+
+        # The revocation check isn't cached, so it applies at once.
+        self.revoke_api.revoke_by_user(self.user['id'])
+        self._check_scoped_tokens_are_invalid()
+        self._check_unscoped_tokens_are_invalid()
+
 
 class TrustTests(object):
     def create_sample_trust(self, new_id, remaining_uses=None):
@@ -4420,6 +4692,15 @@ class TrustTests(object):
         trusts = self.trust_api.list_trusts_for_trustor(self.trustee['id'])
         self.assertEqual(0, len(trusts))
 
+    def test_list_trusts_for_users(self):
+        trust_ids = [self.create_sample_trust(uuid.uuid4().hex)['id']
+                     for i in range(2)]
+        trusts = self.trust_api.list_trusts_for_users(
+            [self.trustee['id'], self.trustor['id']])
+        self.assertItemsEqual(trust_ids, [trust['id'] for trust in trusts])
+        trusts = self.trust_api.list_trusts_for_users([uuid.uuid4().hex])
+        self.assertEqual([], trusts)
+
     def test_list_trusts(self):
         for i in range(3):
             self.create_sample_trust(uuid.uuid4().hex)
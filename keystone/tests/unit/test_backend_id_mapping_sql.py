@@ -15,6 +15,7 @@
 
 import uuid
 
+import mock
 from testtools import matchers
 
 from keystone.common import sql
@@ -117,6 +118,63 @@ class SqlIDMapping(test_backend_sql.SqlTests):
         self.assertThat(mapping_sql.list_id_mappings(),
                         matchers.HasLength(initial_mappings))
 
+    def test_id_mappings_bulk(self):
+        initial_mappings = len(mapping_sql.list_id_mappings())
+        local_entities = [{'domain_id': self.domainA['id'],
+                           'local_id': uuid.uuid4().hex,
+                           'entity_type': mapping.EntityType.USER},
+                          {'domain_id': self.domainB['id'],
+                           'local_id': uuid.uuid4().hex,
+                           'entity_type': mapping.EntityType.GROUP},
+                          {'domain_id': self.domainB['id'],
+                           'local_id': uuid.uuid4().hex,
+                           'entity_type': mapping.EntityType.USER}]
+        self.assertEqual([None, None, None],
+                         self.id_mapping_api.get_public_ids(local_entities))
+
+        new_public_id = uuid.uuid4().hex
+        public_ids = self.id_mapping_api.create_id_mappings(
+            local_entities, public_ids=[None, new_public_id, None])
+        self.assertThat(mapping_sql.list_id_mappings(),
+                        matchers.HasLength(initial_mappings + 3))
+        self.assertEqual(new_public_id, public_ids[1])
+        self.assertEqual(
+            public_ids, self.id_mapping_api.get_public_ids(local_entities))
+        for local_entity, public_id in zip(local_entities, public_ids):
+            self.assertEqual(
+                public_id, self.id_mapping_api.get_public_id(local_entity))
+            local_id_ref = self.id_mapping_api.get_id_mapping(public_id)
+            self.assertEqual(local_entity['local_id'],
+                             local_id_ref['local_id'])
+
+        unmapped = {'domain_id': self.domainA['id'],
+                    'local_id': uuid.uuid4().hex,
+                    'entity_type': mapping.EntityType.USER}
+        self.assertEqual(
+            [public_ids[0], None],
+            self.id_mapping_api.get_public_ids([local_entities[0], unmapped]))
+
+    def test_public_ids_are_cached(self):
+        local_entity = {'domain_id': self.domainA['id'],
+                        'local_id': uuid.uuid4().hex,
+                        'entity_type': mapping.EntityType.USER}
+        public_id = self.id_mapping_api.create_id_mapping(local_entity)
+
+        driver = self.id_mapping_api.driver
+        with mock.patch.object(driver, 'get_public_id') as get_public_id:
+            with mock.patch.object(driver, 'get_public_ids') as get_public_ids:
+                self.assertEqual(
+                    public_id, self.id_mapping_api.get_public_id(local_entity))
+                self.assertEqual(
+                    [public_id],
+                    self.id_mapping_api.get_public_ids([local_entity]))
+        self.assertFalse(get_public_id.called)
+        self.assertFalse(get_public_ids.called)
+
+        # Deleting the mapping removes it from the cache as well.
+        self.id_mapping_api.delete_id_mapping(public_id)
+        self.assertIsNone(self.id_mapping_api.get_public_id(local_entity))
+
     def test_id_mapping_handles_unicode(self):
         initial_mappings = len(mapping_sql.list_id_mappings())
         local_id = u'fäké1'
@@ -565,6 +565,43 @@ class BaseLDAPIdentity(test_backend.IdentityTests):
         # If this doesn't raise, then the test is successful.
         self.identity_api.list_users_in_group(group['id'])
 
+    def test_list_group_members_in_batches(self):
+        group = dict(name=uuid.uuid4().hex,
+                     domain_id=CONF.identity.default_domain_id)
+        group_id = self.identity_api.create_group(group)['id']
+        user_ids = []
+        for i in range(5):
+            user = dict(name=uuid.uuid4().hex,
+                        domain_id=CONF.identity.default_domain_id)
+            user_ids.append(self.identity_api.create_user(user)['id'])
+            self.identity_api.add_user_to_group(user_ids[-1], group_id)
+
+        driver = self.identity_api.driver
+        with mock.patch.object(common_ldap_core,
+                               'SEARCH_FILTER_BATCH_SIZE', 2):
+            with mock.patch.object(driver.user, 'get_all',
+                                   side_effect=driver.user.get_all) as get_all:
+                res = self.identity_api.list_users_in_group(group_id)
+
+        # The five members are fetched with three searches.
+        self.assertEqual(3, get_all.call_count)
+        self.assertItemsEqual(user_ids, [user['id'] for user in res])
+
+    def test_check_user_in_group_does_not_list_members(self):
+        group = dict(name=uuid.uuid4().hex,
+                     domain_id=CONF.identity.default_domain_id)
+        group_id = self.identity_api.create_group(group)['id']
+        user = dict(name=uuid.uuid4().hex,
+                    domain_id=CONF.identity.default_domain_id)
+        user_id = self.identity_api.create_user(user)['id']
+        self.identity_api.add_user_to_group(user_id, group_id)
+
+        driver = self.identity_api.driver
+        with mock.patch.object(driver.group,
+                               'list_group_users') as list_group_users:
+            self.identity_api.check_user_in_group(user_id, group_id)
+        self.assertFalse(list_group_users.called)
+
     def test_list_group_members_dumb_member(self):
         self.config_fixture.config(group='ldap', use_dumb_member=True)
         self.clear_database()
@@ -2020,6 +2057,64 @@ class LDAPIdentityEnabledEmulation(LDAPIdentity):
             user_id=self.user_foo['id'],
             password=self.user_foo['password'])
 
+    def test_list_users_emulated_enabled_in_one_search(self):
+        enabled_user = self.identity_api.create_user(
+            {'name': uuid.uuid4().hex, 'enabled': True,
+             'domain_id': CONF.identity.default_domain_id})
+        disabled_user = self.identity_api.create_user(
+            {'name': uuid.uuid4().hex, 'enabled': False,
+             'domain_id': CONF.identity.default_domain_id})
+
+        driver = self.identity_api.driver
+        with mock.patch.object(driver.user, '_get_enabled') as get_enabled:
+            users = {user['id']: user
+                     for user in self.identity_api.list_users()}
+        self.assertFalse(get_enabled.called)
+        self.assertIs(True, users[enabled_user['id']]['enabled'])
+        self.assertIs(False, users[disabled_user['id']]['enabled'])
+
+    def test_list_users_emulated_enabled_cached(self):
+        self.config_fixture.config(group='ldap',
+                                   enabled_emulation_cache_time=600)
+        self.reload_backends(CONF.identity.default_domain_id)
+        user = self.identity_api.create_user(
+            {'name': uuid.uuid4().hex, 'enabled': True,
+             'domain_id': CONF.identity.default_domain_id})
+
+        def list_enabled():
+            return {ref['id']: ref['enabled']
+                    for ref in self.identity_api.list_users()}
+
+        self.assertIs(True, list_enabled()[user['id']])
+        self.assertIsNotNone(self.identity_api.driver.user._enabled_members)
+
+        # Disabling the user must not leave the cached members stale.
+        user['enabled'] = False
+        self.identity_api.update_user(user['id'], user)
+        self.assertIs(False, list_enabled()[user['id']])
+
+    def test_list_users_emulated_enabled_by_id_dn(self):
+        user = self.identity_api.create_user(
+            {'name': uuid.uuid4().hex, 'enabled': True,
+             'domain_id': CONF.identity.default_domain_id})
+        user_api = self.identity_api.driver.user
+        # The entry may be named by another attribute than the ID, but the
+        # member written by _add_enabled is built from the ID.
+        entry_dn = 'cn=%s,%s' % (uuid.uuid4().hex, user_api.tree_dn)
+        self.assertEqual(
+            common_ldap.dn_key(user_api._id_to_dn(user['id'])),
+            user_api._enabled_member_key(user['id'], entry_dn))
+
+    def test_list_users_emulated_enabled_invalid_member(self):
+        user_api = self.identity_api.driver.user
+        member_dn = user_api._id_to_dn_string(uuid.uuid4().hex)
+        conn = mock.Mock()
+        conn.search_s.return_value = [
+            (user_api.enabled_emulation_dn,
+             {'member': ['not a DN', member_dn]})]
+        self.assertEqual(set([common_ldap.dn_key(member_dn)]),
+                         user_api._get_enabled_members(conn))
+
     def test_user_enable_attribute_mask(self):
         self.skipTest(
             "Enabled emulation conflicts with enabled mask")
@@ -27,8 +27,10 @@ import sqlalchemy
 from sqlalchemy import exc
 from testtools import matchers
 
+from keystone.catalog import core as catalog_core
 from keystone.common import driver_hints
 from keystone.common import sql
+from keystone import credential
 from keystone import exception
 from keystone.identity.backends import sql as identity_sql
 from keystone.tests import unit as tests
@@ -159,6 +161,12 @@ class SqlModels(SqlTests):
                 ('parent_id', sql.String, 64))
         self.assertExpectedSchema('project', cols)
 
+    def test_project_hierarchy_model(self):
+        cols = (('ancestor_id', sql.String, 64),
+                ('descendant_id', sql.String, 64),
+                ('depth', sql.Integer, None))
+        self.assertExpectedSchema('project_hierarchy', cols)
+
     def test_role_assignment_model(self):
         cols = (('type', sql.Enum, None),
                 ('actor_id', sql.String, 64),
@@ -608,6 +616,53 @@ class SqlCatalog(SqlTests, test_backend.CatalogTests):
         catalog = self.catalog_api.get_catalog('fake-user', 'fake-tenant')
         self.assertEqual({}, catalog)
 
+    @tests.skip_if_cache_disabled('catalog')
+    def test_catalog_urls_are_compiled_once(self):
+        service = {
+            'id': uuid.uuid4().hex,
+            'type': uuid.uuid4().hex,
+            'name': uuid.uuid4().hex,
+            'description': uuid.uuid4().hex,
+        }
+        self.catalog_api.create_service(service['id'], service.copy())
+
+        endpoint = {
+            'id': uuid.uuid4().hex,
+            'region_id': None,
+            'service_id': service['id'],
+            'interface': 'public',
+            'url': 'http://localhost:$(public_port)s/v2/$(tenant_id)s',
+        }
+        self.catalog_api.create_endpoint(endpoint['id'], endpoint.copy())
+
+        with mock.patch.object(catalog_core, 'compile_url',
+                               side_effect=catalog_core.compile_url) as m:
+            for project_id in ('project-a', 'project-b'):
+                catalog = self.catalog_api.get_v3_catalog('user', project_id)
+                url = catalog[0]['endpoints'][0]['url']
+                self.assertEqual('http://localhost:%s/v2/%s' % (
+                    CONF.eventlet_server.public_port, project_id), url)
+                catalog = self.catalog_api.get_catalog('user', project_id)
+                self.assertEqual(url, catalog[None][service['type']][
+                    'publicURL'])
+            # Once for each of the v2 and v3 structures.
+            self.assertEqual(2, m.call_count)
+
+        endpoint['url'] = 'http://localhost/$(user_id)s'
+        self.catalog_api.update_endpoint(endpoint['id'], endpoint.copy())
+        catalog = self.catalog_api.get_v3_catalog('user', 'project-a')
+        self.assertEqual('http://localhost/user',
+                         catalog[0]['endpoints'][0]['url'])
+
+    def test_catalog_compiles_only_requested_version(self):
+        driver = self.catalog_api.driver
+        with mock.patch.object(driver, '_get_compiled_v3_catalog') as v3:
+            self.catalog_api.get_catalog('user', 'project')
+        self.assertFalse(v3.called)
+        with mock.patch.object(driver, '_get_compiled_v2_catalog') as v2:
+            self.catalog_api.get_v3_catalog('user', 'project')
+        self.assertFalse(v2.called)
+
     def test_get_catalog_with_empty_public_url(self):
         service = {
             'id': uuid.uuid4().hex,
@@ -922,6 +977,41 @@ class SqlCredential(SqlTests):
             self.user_foo['id'])
         self._validateCredentialList(credentials, self.user_credentials)
 
+    def test_list_credentials_for_user_and_type(self):
+        cred = self.user_credentials[0]
+        credentials = self.credential_api.list_credentials_for_user_and_type(
+            self.user_foo['id'], cred['type'])
+        self._validateCredentialList(credentials, [cred])
+
+    def test_list_credentials_for_user_and_type_default(self):
+        cred = self.user_credentials[0]
+        credentials = credential.Driver.list_credentials_for_user_and_type(
+            self.credential_api.driver, self.user_foo['id'], cred['type'])
+        self._validateCredentialList(credentials, [cred])
+
+    def test_list_credentials_filtered_by_type(self):
+        cred = self.credentials[0]
+        hints = driver_hints.Hints()
+        hints.add_filter('type', cred['type'])
+        credentials = self.credential_api.list_credentials(hints)
+        self._validateCredentialList(credentials, [cred])
+        self.assertEqual([], hints.filters)
+
+    def test_delete_credentials_for_project(self):
+        cred = self.credentials[0]
+        self.credential_api.delete_credentials_for_project(
+            cred['project_id'])
+        self._validateCredentialList(self.credential_api.list_credentials(),
+                                     self.credentials[1:])
+
+    def test_delete_credentials_for_user(self):
+        self.credential_api.delete_credentials_for_user(self.user_foo['id'])
+        for cred in self.user_credentials:
+            self.assertRaises(exception.CredentialNotFound,
+                              self.credential_api.get_credential, cred['id'])
+        self._validateCredentialList(self.credential_api.list_credentials(),
+                                     self.credentials[:3])
+
 
 class DeprecatedDecorators(SqlTests):
 
@@ -41,6 +41,11 @@ class CliTestCase(tests.SQLDriverOverrides, tests.TestCase):
         self.load_backends()
         cli.TokenFlush.main()
 
+    def test_revocation_flush(self):
+        self.useFixture(database.Database())
+        self.load_backends()
+        cli.RevocationFlush.main()
+
 
 class CliDomainConfigAllTestCase(tests.SQLDriverOverrides, tests.TestCase):
 
@@ -15,7 +15,9 @@
 import uuid
 
 from keystoneclient.contrib.ec2 import utils as ec2_utils
+from oslo_serialization import jsonutils
 
+from keystone.common import utils
 from keystone.contrib.ec2 import controllers
 from keystone import exception
 from keystone.tests import unit as tests
@@ -206,3 +208,112 @@ class TestCredentialEc2(tests.TestCase):
         # check if user is admin
         # no exceptions should be raised
         self.controller._is_admin(context)
+
+
+class TestEc2Authenticate(tests.TestCase):
+    def setUp(self):
+        super(TestEc2Authenticate, self).setUp()
+        self.useFixture(database.Database())
+        self.load_backends()
+        self.load_fixtures(default_fixtures)
+        self.controller = controllers.Ec2Controller()
+        self.addCleanup(self.controller._reusable_tokens.clear)
+        self.access = uuid.uuid4().hex
+        self.secret = uuid.uuid4().hex
+        self.credential_id = utils.hash_access_key(self.access)
+        self.credential_api.create_credential(
+            self.credential_id,
+            {'id': self.credential_id,
+             'user_id': self.user_foo['id'],
+             'project_id': self.tenant_bar['id'],
+             'blob': jsonutils.dumps({'access': self.access,
+                                      'secret': self.secret,
+                                      'trust_id': None}),
+             'type': 'ec2'})
+
+    def _signed_request(self, secret=None):
+        params = {'SignatureMethod': 'HmacSHA256',
+                  'SignatureVersion': '2',
+                  'AWSAccessKeyId': self.access,
+                  'Nonce': uuid.uuid4().hex}
+        request = {'access': self.access,
+                   'host': 'foo',
+                   'verb': 'GET',
+                   'path': '/bar',
+                   'params': params}
+        signer = ec2_utils.Ec2Signer(secret or self.secret)
+        request['signature'] = signer.generate(request)
+        return request
+
+    def _authenticate(self):
+        token_data = self.controller.authenticate(
+            {}, credentials=self._signed_request())
+        return token_data['access']['token']['id']
+
+    def test_authenticate_issues_new_tokens(self):
+        self.assertNotEqual(self._authenticate(), self._authenticate())
+
+    def test_authenticate_reuses_token(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        token_id = self._authenticate()
+        self.assertEqual(token_id, self._authenticate())
+
+    def test_authenticate_reused_token_still_checks_signature(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        self._authenticate()
+        self.assertRaises(exception.Unauthorized,
+                          self.controller.authenticate, {},
+                          credentials=self._signed_request(
+                              secret=uuid.uuid4().hex))
+
+    def test_authenticate_does_not_reuse_revoked_token(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        token_id = self._authenticate()
+        self.token_provider_api.revoke_token(token_id)
+        self.assertNotEqual(token_id, self._authenticate())
+
+    def test_authenticate_does_not_reuse_token_for_moved_credential(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        self.assignment_api.add_role_to_user_and_project(
+            self.user_foo['id'], self.tenant_baz['id'], self.role_member['id'])
+        token_id = self._authenticate()
+        # Move the credential behind the cache's back, so only the cache key
+        # keeps the old token from being handed back.
+        self.credential_api.driver.update_credential(
+            self.credential_id, {'project_id': self.tenant_baz['id']})
+        self.credential_api.get_credential.invalidate(self.credential_api,
+                                                      self.credential_id)
+        token_data = self.controller.authenticate(
+            {}, credentials=self._signed_request())
+        self.assertNotEqual(token_id, token_data['access']['token']['id'])
+        self.assertEqual(self.tenant_baz['id'],
+                         token_data['access']['token']['tenant']['id'])
+
+    def test_updating_credential_drops_kept_token(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        self._authenticate()
+        self.assertEqual(1, len(self.controller._reusable_tokens))
+        self.credential_api.update_credential(
+            self.credential_id, {'project_id': self.tenant_baz['id']})
+        self.assertEqual(0, len(self.controller._reusable_tokens))
+
+    def test_deleting_credential_drops_kept_token(self):
+        self.config_fixture.config(group='ec2', token_reuse_time=60)
+        self._authenticate()
+        self.credential_api.delete_credential(self.credential_id)
+        self.assertEqual(0, len(self.controller._reusable_tokens))
+
+    def test_authenticate_returns_roles_in_order(self):
+        role_ids = self.assignment_api.get_roles_for_user_and_project(
+            self.user_foo['id'], self.tenant_bar['id'])
+        roles_ref = self.controller._get_roles(list(reversed(role_ids)))
+        self.assertEqual(list(reversed(role_ids)),
+                         [role['id'] for role in roles_ref])
+        self.assertRaises(exception.RoleNotFound,
+                          self.controller._get_roles, [uuid.uuid4().hex])
+
+    def test_deleted_credential_is_not_cached(self):
+        self._authenticate()
+        self.credential_api.delete_credential(self.credential_id)
+        self.assertRaises(exception.CredentialNotFound,
+                          self._authenticate)
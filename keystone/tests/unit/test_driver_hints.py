@@ -58,3 +58,12 @@ class ListHintsTests(test.TestCase):
         hints.set_limit(10, truncated=True)
         self.assertEqual(10, hints.limit['limit'])
         self.assertTrue(hints.limit['truncated'])
+
+    def test_marker(self):
+        hints = driver_hints.Hints()
+        self.assertIsNone(hints.marker)
+        hints.set_marker('m1')
+        self.assertEqual('m1', hints.marker['marker'])
+        self.assertFalse(hints.marker['satisfied'])
+        hints.set_marker('m1', satisfied=True)
+        self.assertTrue(hints.marker['satisfied'])
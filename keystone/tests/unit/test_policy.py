@@ -167,6 +167,42 @@ class PolicyTestCase(BasePolicyTestCase):
         rules.enforce(admin_credentials, lowercase_action, self.target)
         rules.enforce(admin_credentials, uppercase_action, self.target)
 
+    def test_repeated_decision_is_cached(self):
+        credentials = {'project_id': 'fake', 'roles': []}
+        action = "example:my_file"
+        with mock.patch.object(common_policy.Enforcer, 'enforce',
+                               wraps=rules._ENFORCER.enforce) as enforce:
+            rules.enforce(credentials, action, {'project_id': 'fake'})
+            rules.enforce(dict(credentials), action, {'project_id': 'fake'})
+            self.assertEqual(1, enforce.call_count)
+
+            self.assertRaises(exception.ForbiddenAction, rules.enforce,
+                              credentials, action, {'project_id': 'another'})
+            self.assertRaises(exception.ForbiddenAction, rules.enforce,
+                              credentials, action, {'project_id': 'another'})
+            self.assertEqual(2, enforce.call_count)
+
+    def test_setting_rules_forgets_decisions(self):
+        action = "example:allowed"
+        rules.enforce(self.credentials, action, self.target)
+
+        self.rules[action] = [["false:false"]]
+        self._set_rules()
+        self.assertRaises(exception.ForbiddenAction, rules.enforce,
+                          self.credentials, action, self.target)
+
+    def test_http_decision_is_not_cached(self):
+        responses = iter(["True", "False"])
+
+        def fakeurlopen(url, post_data):
+            return six.StringIO(next(responses))
+
+        action = "example:get_http"
+        with mock.patch.object(urlrequest, 'urlopen', fakeurlopen):
+            rules.enforce(self.credentials, action, self.target)
+            self.assertRaises(exception.ForbiddenAction, rules.enforce,
+                              self.credentials, action, self.target)
+
 
 class DefaultPolicyTestCase(BasePolicyTestCase):
     def setUp(self):
@@ -137,8 +137,24 @@ class RevokeTests(object):
         event = model.RevokeEvent()
         event.revoked_at = _past_time()
         self.revoke_api.revoke(event)
+        self.revoke_api.flush_expired_events()
         self.assertEqual(1, len(self.revoke_api.list_events()))
 
+    def test_revoke_many(self):
+        user_ids = [_new_id() for i in range(3)]
+        self.revoke_api.revoke_many(
+            [model.RevokeEvent(user_id=user_id) for user_id in user_ids])
+        self.assertEqual(set(user_ids),
+                         set(e.user_id for e in self.revoke_api.list_events()))
+
+        token_values = _sample_blank_token()
+        token_values['expires_at'] = _future_time()
+        for user_id in user_ids:
+            token_values['user_id'] = user_id
+            self.assertRaises(exception.TokenNotFound,
+                              self.revoke_api.check_token,
+                              token_values)
+
     @mock.patch.object(timeutils, 'utcnow')
     def test_expired_events_removed_validate_token_success(self, mock_utcnow):
         def _sample_token_values():
@@ -180,6 +196,35 @@ class RevokeTests(object):
                 project_id=project_id),
             matchers.raises(exception.UnexpectedError))
 
+    def test_only_new_events_are_fetched(self):
+        token_values = _sample_blank_token()
+        token_values['expires_at'] = _future_time()
+        token_values['user_id'] = _new_id()
+
+        self.revoke_api.revoke_by_user(_new_id())
+        self.revoke_api.check_token(token_values)
+
+        self.revoke_api.revoke_by_user(token_values['user_id'])
+        with mock.patch.object(self.revoke_api.driver, 'list_events',
+                               wraps=self.revoke_api.driver.list_events) as m:
+            self.assertRaises(exception.TokenNotFound,
+                              self.revoke_api.check_token,
+                              token_values)
+        self.assertIsNotNone(m.call_args[1]['last_fetch'])
+
+    def test_events_are_applied_once(self):
+        token_values = _sample_blank_token()
+        token_values['expires_at'] = _future_time()
+
+        self.revoke_api.revoke_by_user(_new_id())
+        self.revoke_api.check_token(token_values)
+        self.revoke_api.revoke_by_user(_new_id())
+        self.revoke_api.check_token(token_values)
+
+        # both events fall within the fetch overlap, so the second check
+        # fetched the first one again
+        self.assertEqual(2, len(self.revoke_api._local_revoke_index._events))
+
 
 class SqlRevokeTests(test_backend_sql.SqlTests, RevokeTests):
     def config_overrides(self):
@@ -190,6 +235,21 @@ class SqlRevokeTests(test_backend_sql.SqlTests, RevokeTests):
             provider='pki',
             revoke_by_id=False)
 
+    def test_flush_expired_events_in_batches(self):
+        events = []
+        for i in range(5):
+            event = model.RevokeEvent(user_id=_new_id())
+            event.revoked_at = _past_time()
+            events.append(event)
+        self.revoke_api.revoke_many(events)
+        self.revoke_api.revoke_by_user(_new_id())
+        self.assertEqual(6, len(self.revoke_api.list_events()))
+
+        with mock.patch.object(self.revoke_api.driver, '_flush_batch_size',
+                               return_value=2):
+            self.revoke_api.flush_expired_events()
+        self.assertEqual(1, len(self.revoke_api.list_events()))
+
 
 class KvsRevokeTests(tests.TestCase, RevokeTests):
     def config_overrides(self):
@@ -634,3 +694,48 @@ class RevokeTreeTests(tests.TestCase):
         for event in self.events:
             self.tree.remove_event(event)
         self._assertEmpty(self.tree.revoke_map)
+
+
+class RevokeIndexTests(RevokeTreeTests):
+    def setUp(self):
+        super(RevokeIndexTests, self).setUp()
+        self.tree = model.RevokeIndex()
+
+    def test_cleanup(self):
+        expiry_base_time = _future_time()
+        for i in range(0, 10):
+            self.events.append(self._revoke_by_user(_new_id()))
+            self._revoke_by_expiration(
+                _new_id(), expiry_base_time + datetime.timedelta(seconds=i))
+            self._revoke_by_project_role_assignment(_new_id(), _new_id())
+            self._revoke_by_domain_role_assignment(_new_id(), _new_id())
+            self._revoke_by_user_and_project(_new_id(), _new_id())
+            self._revoke_by_domain(_new_id())
+            self.events.append(self.tree.add_event(model.RevokeEvent()))
+        # the wildcard events are identical, so they are collapsed into one
+        self.assertEqual(61, len(self.tree.issued_before))
+
+        for event in self.events:
+            self.tree.remove_event(event)
+        self._assertEmpty(self.tree.issued_before)
+        self._assertEmpty(self.tree.unindexed)
+        for index in self.tree.indexes.values():
+            self._assertEmpty(index)
+
+    def test_identical_events_keep_latest_issued_before(self):
+        user_id = _new_id()
+        token_data = _sample_blank_token()
+        token_data['user_id'] = user_id
+
+        old_event = self.tree.add_event(model.RevokeEvent(
+            user_id=user_id, issued_before=_past_time()))
+        self.assertFalse(self.tree.is_revoked(token_data))
+
+        new_event = self.tree.add_event(model.RevokeEvent(user_id=user_id))
+        self.assertTrue(self.tree.is_revoked(token_data))
+
+        # only the event with the latest issued_before can remove the entry
+        self.tree.remove_event(old_event)
+        self.assertTrue(self.tree.is_revoked(token_data))
+        self.tree.remove_event(new_event)
+        self.assertFalse(self.tree.is_revoked(token_data))
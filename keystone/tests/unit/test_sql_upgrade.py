@@ -30,6 +30,7 @@ WARNING::
 """
 
 import copy
+import datetime
 import json
 import uuid
 
@@ -500,6 +501,93 @@ class SqlUpgradeTests(SqlMigrateBase):
                            assignment['inherited']),
                           assignments)
 
+    def test_token_project_id_and_consumer_id_upgrade(self):
+        self.upgrade(73)
+
+        session = self.Session()
+        expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        project_token = {
+            'id': uuid.uuid4().hex,
+            'expires': expires,
+            'valid': True,
+            'user_id': uuid.uuid4().hex,
+            'extra': json.dumps({'tenant': {'id': 'project-id'}})}
+        consumer_token = {
+            'id': uuid.uuid4().hex,
+            'expires': expires,
+            'valid': True,
+            'user_id': uuid.uuid4().hex,
+            'extra': json.dumps({'token_data': {'token': {
+                'OS-OAUTH1': {'consumer_id': 'consumer-id'}}}})}
+        self.insert_dict(session, 'token', project_token)
+        self.insert_dict(session, 'token', consumer_token)
+        session.close()
+
+        self.upgrade(74)
+        self.metadata.clear()
+
+        table = sqlalchemy.Table('token', self.metadata, autoload=True)
+        index_data = [(idx.name, list(idx.columns.keys()))
+                      for idx in table.indexes]
+        self.assertIn(('ix_token_project_id', ['project_id']), index_data)
+        self.assertIn(('ix_token_consumer_id', ['consumer_id']), index_data)
+
+        session = self.Session()
+        token_ref = session.query(table).filter_by(
+            id=project_token['id']).one()
+        self.assertEqual('project-id', token_ref.project_id)
+        self.assertIsNone(token_ref.consumer_id)
+        token_ref = session.query(table).filter_by(
+            id=consumer_token['id']).one()
+        self.assertIsNone(token_ref.project_id)
+        self.assertEqual('consumer-id', token_ref.consumer_id)
+        session.close()
+
+    def test_project_hierarchy_upgrade(self):
+        self.upgrade(74)
+        self.assertTableDoesNotExist('project_hierarchy')
+
+        session = self.Session()
+        domain = {'id': uuid.uuid4().hex,
+                  'name': uuid.uuid4().hex,
+                  'enabled': True}
+        self.insert_dict(session, 'domain', domain)
+        project_ids = [uuid.uuid4().hex for _ in (1, 2, 3)]
+        for parent_id, project_id in zip([None] + project_ids, project_ids):
+            project = {'id': project_id,
+                       'name': uuid.uuid4().hex,
+                       'domain_id': domain['id'],
+                       'enabled': True,
+                       'parent_id': parent_id}
+            self.insert_dict(session, 'project', project)
+        session.close()
+
+        self.upgrade(75)
+        self.assertTableColumns('project_hierarchy',
+                                ['ancestor_id', 'descendant_id', 'depth'])
+
+        session = self.Session()
+        table = sqlalchemy.Table('project_hierarchy', self.metadata,
+                                 autoload=True)
+        rows = set((ref.ancestor_id, ref.descendant_id, ref.depth)
+                   for ref in session.query(table))
+        self.assertEqual(set([(project_ids[0], project_ids[1], 1),
+                              (project_ids[0], project_ids[2], 2),
+                              (project_ids[1], project_ids[2], 1)]),
+                         rows)
+        session.close()
+
+    def test_credential_indexes_upgrade(self):
+        self.upgrade(75)
+        self.upgrade(76)
+        table = sqlalchemy.Table('credential', self.metadata, autoload=True)
+        index_data = [(idx.name, list(idx.columns.keys()))
+                      for idx in table.indexes]
+        self.assertIn(('ix_credential_user_id_type', ['user_id', 'type']),
+                      index_data)
+        self.assertIn(('ix_credential_project_id', ['project_id']),
+                      index_data)
+
     def does_pk_exist(self, table, pk_column):
         """Checks whether a column is primary key on a table."""
 
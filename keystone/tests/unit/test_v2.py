@@ -1198,6 +1198,30 @@ class V2TestCase(RestfulTestCase, CoreApiTests, LegacyV2UsernameTests):
             expected_status=200)
         self.assertValidRevocationListResponse(r)
 
+    def test_fetch_revocation_list_if_none_match_304(self):
+        token = self.get_scoped_token()
+        r = self.admin_request(
+            method='GET',
+            path='/v2.0/tokens/revoked',
+            token=token,
+            expected_status=200)
+        etag = r.headers['ETag']
+
+        r = self.admin_request(
+            method='GET',
+            path='/v2.0/tokens/revoked',
+            headers={'If-None-Match': etag},
+            token=token,
+            expected_status=304)
+        self.assertEqual(etag, r.headers['ETag'])
+
+        self.admin_request(
+            method='GET',
+            path='/v2.0/tokens/revoked',
+            headers={'If-None-Match': '"%s"' % uuid.uuid4().hex},
+            token=token,
+            expected_status=200)
+
     def assertValidRevocationListResponse(self, response):
         self.assertIsNotNone(response.result['signed'])
 
@@ -1390,6 +1414,9 @@ class RevokeApiTestCase(V2TestCase):
     def test_fetch_revocation_list_sha256(self):
         self.skipTest('Revoke API disables revocation_list.')
 
+    def test_fetch_revocation_list_if_none_match_304(self):
+        self.skipTest('Revoke API disables revocation_list.')
+
 
 class TestFernetTokenProviderV2(RestfulTestCase):
 
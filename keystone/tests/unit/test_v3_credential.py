@@ -98,6 +98,18 @@ class CredentialTestCase(CredentialBaseTestCase):
         for cred in r.result['credentials']:
             self.assertEqual(self.user['id'], cred['user_id'])
 
+    def test_list_credentials_filtered_by_type(self):
+        """Call ``GET  /credentials?type={type}``."""
+        credential = self.new_credential_ref(user_id=self.user['id'])
+        credential['type'] = uuid.uuid4().hex
+        self.credential_api.create_credential(
+            credential['id'], credential)
+
+        r = self.get('/credentials?type=%s' % credential['type'])
+        self.assertValidCredentialListResponse(r, ref=credential)
+        self.assertEqual([credential['id']],
+                         [cred['id'] for cred in r.result['credentials']])
+
     def test_create_credential(self):
         """Call ``POST /credentials``."""
         ref = self.new_credential_ref(user_id=self.user['id'])
@@ -10,12 +10,19 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import base64
+import copy
+import hashlib
 import os
 import random
 import subprocess
 from testtools import matchers
 import uuid
 
+from cryptography.hazmat import backends
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives import hashes
+from cryptography import x509
 from lxml import etree
 import mock
 from oslo_config import cfg
@@ -1333,6 +1340,24 @@ class MappingCRUDTests(FederationTests):
         resp = self.get(url)
         self.assertValidMappingResponse(resp, mapping_fixtures.MAPPING_SMALL)
 
+    def test_mapping_rules_compiled_once(self):
+        mapping_id = uuid.uuid4().hex
+        self.federation_api.create_mapping(mapping_id,
+                                           mapping_fixtures.MAPPING_LARGE)
+        mapping = self.federation_api.get_mapping(mapping_id)
+        rule_processor = self.federation_api._get_rule_processor(mapping)
+        mapping = self.federation_api.get_mapping(mapping_id)
+        self.assertIs(rule_processor,
+                      self.federation_api._get_rule_processor(mapping))
+
+        self.federation_api.update_mapping(mapping_id,
+                                           mapping_fixtures.MAPPING_SMALL)
+        mapping = self.federation_api.get_mapping(mapping_id)
+        updated = self.federation_api._get_rule_processor(mapping)
+        self.assertIsNot(rule_processor, updated)
+        self.assertEqual(mapping_fixtures.MAPPING_SMALL['rules'],
+                         updated.rules)
+
     def test_delete_mapping_dne(self):
         url = self.MAPPING_URL + uuid.uuid4().hex
         self.delete(url, expected_status=404)
@@ -1459,6 +1484,45 @@ class MappingRuleEngineTests(FederationTests):
         self.assertIn(mapping_fixtures.EMPLOYEE_GROUP_ID, group_ids)
         self.assertEqual(full_name, user_name)
 
+    def test_rule_engine_reused_for_assertions(self):
+        """A RuleProcessor can be used for any number of assertions."""
+
+        mapping = mapping_fixtures.MAPPING_EPHEMERAL_USER
+        rules = copy.deepcopy(mapping['rules'])
+        rp = mapping_utils.RuleProcessor(mapping['rules'])
+        employee = rp.process(mapping_fixtures.EMPLOYEE_ASSERTION)
+        employee['user']['name'] = uuid.uuid4().hex
+        contractor = rp.process(mapping_fixtures.CONTRACTOR_ASSERTION)
+
+        self.assertValidMappedUserObject(contractor)
+        self.assertNotEqual(employee['user'], contractor['user'])
+        self.assertEqual(rules, mapping['rules'])
+
+    def test_transform_to_group_ids_recreated_group(self):
+        """A group recreated under the same name is mapped by its new ID."""
+
+        domain_id = CONF.identity.default_domain_id
+        name = uuid.uuid4().hex
+        group_names = [{'name': name, 'domain': {'id': domain_id}}]
+        group = self.identity_api.create_group(
+            {'name': name, 'domain_id': domain_id})
+
+        def transform():
+            return list(mapping_utils.transform_to_group_ids(
+                group_names, uuid.uuid4().hex, self.identity_api,
+                self.resource_api))
+
+        self.assertEqual([group['id']], transform())
+
+        # Recreate the group bypassing the identity API, as another process
+        # would.
+        driver = self.identity_api._select_identity_driver(domain_id)
+        driver.delete_group(group['id'])
+        group_id = uuid.uuid4().hex
+        driver.create_group(group_id, {'id': group_id, 'name': name,
+                                       'domain_id': domain_id})
+        self.assertEqual([group_id], transform())
+
     def test_rule_engine_no_regex_match(self):
         """Should deny authorization, the email of the tester won't match.
 
@@ -3208,6 +3272,64 @@ class SAMLGenerationTests(FederationTests):
         cert_text = cert_text.replace(os.linesep, '')
         self.assertEqual(idp_public_key, cert_text)
 
+    def test_saml_signing_internal(self):
+        """Test that an assertion signed in process can be verified."""
+        self.config_fixture.config(group='saml', assertion_signer='internal')
+
+        generator = keystone_idp.SAMLGenerator()
+        response = generator.samlize_token(self.ISSUER, self.RECIPIENT,
+                                           self.SUBJECT, self.SUBJECT_DOMAIN,
+                                           self.ROLES, self.PROJECT,
+                                           self.PROJECT_DOMAIN)
+
+        idp_public_key = sigver.read_cert_from_file(CONF.saml.certfile, 'pem')
+        signature = response.assertion.signature
+        cert_text = signature.key_info.x509_data[0].x509_certificate.text
+        self.assertEqual(idp_public_key, cert_text)
+
+        nsmap = {'ds': xmldsig.NAMESPACE}
+        assertion = etree.fromstring(response.assertion.to_string())
+        signature = assertion.find('ds:Signature', nsmap)
+        signed_info = signature.find('ds:SignedInfo', nsmap)
+        certificate = x509.load_der_x509_certificate(
+            base64.b64decode(cert_text), backends.default_backend())
+        signature_value = base64.b64decode(
+            signature.find('ds:SignatureValue', nsmap).text)
+        signed_data = etree.tostring(signed_info, method='c14n',
+                                     exclusive=True)
+        public_key = certificate.public_key()
+        if hasattr(public_key, 'verify'):
+            public_key.verify(signature_value, signed_data,
+                              padding.PKCS1v15(), hashes.SHA1())
+        else:
+            verifier = public_key.verifier(signature_value,
+                                           padding.PKCS1v15(), hashes.SHA1())
+            verifier.update(signed_data)
+            verifier.verify()
+
+        assertion.remove(signature)
+        digest = hashlib.sha1(etree.tostring(assertion, method='c14n',
+                                             exclusive=True)).digest()
+        self.assertEqual(
+            base64.b64encode(digest).decode('ascii'),
+            signed_info.find('ds:Reference/ds:DigestValue', nsmap).text)
+
+    @mock.patch('saml2.create_class_from_xml_string')
+    @mock.patch('oslo_utils.fileutils.write_to_tempfile')
+    @mock.patch('subprocess.check_output')
+    def test__sign_assertion_internal_unavailable(self, check_output_mock,
+                                                  write_to_tempfile_mock,
+                                                  create_class_mock):
+        self.config_fixture.config(group='saml', assertion_signer='internal')
+        write_to_tempfile_mock.return_value = 'tmp_path'
+        check_output_mock.return_value = 'fakeoutput'
+
+        with mock.patch.object(keystone_idp, '_get_assertion_signer',
+                               return_value=None):
+            keystone_idp._sign_assertion(self.signed_assertion)
+
+        create_class_mock.assert_called_with(saml.Assertion, 'fakeoutput')
+
     def _create_generate_saml_request(self, token_id, sp_id):
         return {
             "auth": {
@@ -448,3 +448,48 @@ class IdentityTestListLimitCase(IdentityTestFilteredCase):
         r = self.get('/services', auth=self.auth)
         self.assertEqual(10, len(r.result.get('services')))
         self.assertIsNone(r.result.get('truncated'))
+
+    def _test_entity_list_pages(self, plural):
+        """GET /<entities>?limit=3, following the next links."""
+
+        self._set_policy({"identity:list_%s" % plural: []})
+        r = self.get('/%s' % plural, auth=self.auth)
+        all_ids = [ref['id'] for ref in r.result.get(plural)]
+
+        paged_ids = []
+        url = '/%s?limit=3' % plural
+        while url:
+            r = self.get(url, auth=self.auth)
+            refs = r.result.get(plural)
+            self.assertTrue(len(refs) <= 3)
+            paged_ids.extend(ref['id'] for ref in refs)
+            next_url = r.result['links']['next']
+            url = next_url and next_url.split('/v3', 1)[1]
+
+        self.assertEqual(sorted(paged_ids), paged_ids)
+        self.assertItemsEqual(all_ids, paged_ids)
+
+    def test_users_list_pages(self):
+        self._test_entity_list_pages('users')
+
+    def test_projects_list_pages(self):
+        self._test_entity_list_pages('projects')
+
+    def test_non_driver_list_pages(self):
+        self._test_entity_list_pages('policies')
+
+    def test_list_limit_requested_below_configured(self):
+        self._set_policy({"identity:list_services": []})
+        self.config_fixture.config(group='catalog', list_limit=5)
+        r = self.get('/services?limit=2', auth=self.auth)
+        self.assertEqual(2, len(r.result.get('services')))
+        self.assertIs(r.result.get('truncated'), True)
+
+        r = self.get('/services?limit=8', auth=self.auth)
+        self.assertEqual(5, len(r.result.get('services')))
+
+    def test_invalid_list_limit(self):
+        self._set_policy({"identity:list_services": []})
+        for limit in ('a', '0', '-1'):
+            self.get('/services?limit=%s' % limit, auth=self.auth,
+                     expected_status=400)
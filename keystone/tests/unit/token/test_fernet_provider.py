@@ -15,6 +15,7 @@ import hashlib
 import os
 import uuid
 
+import mock
 from oslo_utils import timeutils
 
 from keystone.common import config
@@ -469,3 +470,58 @@ class TestLoadKeys(tests.TestCase):
         keys = fernet_utils.load_keys()
         self.assertEqual(2, len(keys))
         self.assertTrue(len(keys[0]))
+
+
+class TestCryptoCache(tests.TestCase):
+    def setUp(self):
+        super(TestCryptoCache, self).setUp()
+        self.useFixture(ksfixtures.KeyRepository(self.config_fixture))
+        self.formatter = token_formatters.TokenFormatter()
+
+    def test_keys_are_only_loaded_once(self):
+        crypto = self.formatter.crypto
+        with mock.patch.object(fernet_utils, 'load_keys') as load_keys:
+            self.assertIs(crypto, self.formatter.crypto)
+            self.assertIs(crypto, token_formatters.TokenFormatter().crypto)
+            self.assertFalse(load_keys.called)
+
+    def test_keys_are_reloaded_after_rotation(self):
+        token = self.formatter.pack(b'payload')
+        crypto = self.formatter.crypto
+
+        fernet_utils.rotate_keys()
+        # ensure the change is visible even on file systems with a coarse
+        # modification time resolution
+        stat_info = os.stat(CONF.fernet_tokens.key_repository)
+        os.utime(CONF.fernet_tokens.key_repository,
+                 (stat_info.st_atime, stat_info.st_mtime + 1))
+
+        self.assertIsNot(crypto, self.formatter.crypto)
+        # tokens issued with the previous primary key remain valid
+        self.assertEqual(b'payload', self.formatter.unpack(token))
+
+    def test_keys_are_reloaded_after_key_overwritten(self):
+        crypto = self.formatter.crypto
+        key_repository = CONF.fernet_tokens.key_repository
+        directory_info = os.stat(key_repository)
+
+        # Key distribution may overwrite a key file in place, which doesn't
+        # change the directory itself.
+        with open(os.path.join(key_repository, '1')) as f:
+            key = f.read()
+        key_file = os.path.join(key_repository, '0')
+        with open(key_file, 'w') as f:
+            f.write(key)
+        key_info = os.stat(key_file)
+        os.utime(key_file, (key_info.st_atime, key_info.st_mtime + 1))
+        os.utime(key_repository,
+                 (directory_info.st_atime, directory_info.st_mtime))
+
+        self.assertIsNot(crypto, self.formatter.crypto)
+
+    def test_missing_key_repository_is_not_cached(self):
+        self.formatter.crypto
+        self.config_fixture.config(group='fernet_tokens',
+                                   key_repository=uuid.uuid4().hex)
+        self.assertRaises(exception.KeysNotFound,
+                          lambda: self.formatter.crypto)
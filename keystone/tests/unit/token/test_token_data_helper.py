@@ -11,6 +11,7 @@
 # under the License.
 
 import base64
+import threading
 import uuid
 
 from testtools import matchers
@@ -53,3 +54,55 @@ class TestTokenDataHelper(tests.TestCase):
                           self.v3_data_helper._populate_audit_info,
                           token_data=token_data,
                           audit_info=audit_info)
+
+    def _populate_calls(self, threads):
+        def populate(token_data, key, value):
+            threads.add(threading.current_thread())
+            token_data[key] = value
+
+        return [(populate, ('project', uuid.uuid4().hex)),
+                (populate, ('user', uuid.uuid4().hex)),
+                (populate, ('roles', uuid.uuid4().hex))]
+
+    def test_v3_token_data_helper_populate_concurrently(self):
+        self.config_fixture.config(group='token', concurrent_data_fetch=True)
+        threads = set()
+        calls = self._populate_calls(threads)
+        token_data = {'methods': ['password']}
+        self.v3_data_helper._populate_concurrently(token_data, calls)
+
+        expected = {'methods': ['password']}
+        for _fn, (key, value) in calls:
+            expected[key] = value
+        self.assertEqual(expected, token_data)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_v3_token_data_helper_populate_concurrently_reuses_pool(self):
+        self.config_fixture.config(group='token', concurrent_data_fetch=True)
+        data_fetch_pool = common._get_data_fetch_pool()
+        self.v3_data_helper._populate_concurrently(
+            {}, self._populate_calls(set()))
+        self.assertIs(data_fetch_pool, common._get_data_fetch_pool())
+
+    def test_v3_token_data_helper_populate_sequentially(self):
+        threads = set()
+        token_data = {}
+        self.v3_data_helper._populate_concurrently(
+            token_data, self._populate_calls(threads))
+        self.assertThat(token_data, matchers.HasLength(3))
+        self.assertEqual(set([threading.current_thread()]), threads)
+
+    def test_v3_token_data_helper_populate_concurrently_first_error(self):
+        self.config_fixture.config(group='token', concurrent_data_fetch=True)
+
+        def not_found(token_data):
+            raise exception.ProjectNotFound(project_id=uuid.uuid4().hex)
+
+        def unauthorized(token_data):
+            raise exception.Unauthorized()
+
+        token_data = {}
+        self.assertRaises(exception.ProjectNotFound,
+                          self.v3_data_helper._populate_concurrently,
+                          token_data, [(not_found, ()), (unauthorized, ())])
+        self.assertEqual({}, token_data)
@@ -39,14 +39,38 @@ class TokenModel(sql.ModelBase, sql.DictBase):
     valid = sql.Column(sql.Boolean(), default=True, nullable=False)
     user_id = sql.Column(sql.String(64))
     trust_id = sql.Column(sql.String(64))
+    # NOTE(dstanek): project_id and consumer_id duplicate values that are
+    # also in extra, so that tokens can be matched by the database. They are
+    # deliberately not part of the token reference.
+    project_id = sql.Column(sql.String(64))
+    consumer_id = sql.Column(sql.String(64))
     __table_args__ = (
         sql.Index('ix_token_expires', 'expires'),
         sql.Index('ix_token_expires_valid', 'expires', 'valid'),
         sql.Index('ix_token_user_id', 'user_id'),
-        sql.Index('ix_token_trust_id', 'trust_id')
+        sql.Index('ix_token_trust_id', 'trust_id'),
+        sql.Index('ix_token_project_id', 'project_id'),
+        sql.Index('ix_token_consumer_id', 'consumer_id')
     )
 
 
+def token_project_id(token_ref_dict):
+    """Return the ID of the project a token is scoped to, if any."""
+    tenant = token_ref_dict.get('tenant')
+    if tenant:
+        return tenant.get('id')
+
+
+def token_consumer_id(token_ref_dict):
+    """Return the ID of the OAuth consumer a token was issued for, if any."""
+    try:
+        oauth = token_ref_dict['token_data']['token'].get('OS-OAUTH1')
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if oauth:
+        return oauth.get('consumer_id')
+
+
 def _expiry_range_batched(session, upper_bound_func, batch_size):
     """Returns the stop point of the next batch for expiration.
 
@@ -103,6 +127,8 @@ class Token(token.persistence.Driver):
 
         token_ref = TokenModel.from_dict(data_copy)
         token_ref.valid = True
+        token_ref.project_id = token_project_id(data_copy)
+        token_ref.consumer_id = token_consumer_id(data_copy)
         session = sql.get_session()
         with session.begin():
             session.add(token_ref)
@@ -127,46 +153,67 @@ class Token(token.persistence.Driver):
 
         """
         session = sql.get_session()
-        token_list = []
         with session.begin():
             now = timeutils.utcnow()
-            query = session.query(TokenModel)
+            query = session.query(TokenModel.id)
             query = query.filter_by(valid=True)
             query = query.filter(TokenModel.expires > now)
             if trust_id:
                 query = query.filter(TokenModel.trust_id == trust_id)
             else:
                 query = query.filter(TokenModel.user_id == user_id)
+            if tenant_id:
+                query = query.filter(TokenModel.project_id == tenant_id)
+            if consumer_id:
+                query = query.filter(TokenModel.consumer_id == consumer_id)
 
-            for token_ref in query.all():
-                if tenant_id:
-                    token_ref_dict = token_ref.to_dict()
-                    if not self._tenant_matches(tenant_id, token_ref_dict):
-                        continue
-                if consumer_id:
-                    token_ref_dict = token_ref.to_dict()
-                    if not self._consumer_matches(consumer_id, token_ref_dict):
-                        continue
-
-                token_ref.valid = False
-                token_list.append(token_ref.id)
+            token_list = [token_ref[0] for token_ref in query]
+            self._invalidate_tokens(session, token_list)
 
         return token_list
 
-    def _tenant_matches(self, tenant_id, token_ref_dict):
-        return ((tenant_id is None) or
-                (token_ref_dict.get('tenant') and
-                 token_ref_dict['tenant'].get('id') == tenant_id))
+    def delete_tokens_for_users(self, user_ids, project_ids=None):
+        return self._bulk_delete_tokens(TokenModel.user_id, user_ids,
+                                        project_ids)
 
-    def _consumer_matches(self, consumer_id, ref):
-        if consumer_id is None:
-            return True
-        else:
-            try:
-                oauth = ref['token_data']['token'].get('OS-OAUTH1', {})
-                return oauth and oauth['consumer_id'] == consumer_id
-            except KeyError:
-                return False
+    def delete_tokens_for_trusts(self, trusts, project_ids=None):
+        trust_ids = [trust['id'] for trust in trusts]
+        return self._bulk_delete_tokens(TokenModel.trust_id, trust_ids,
+                                        project_ids)
+
+    def _bulk_delete_tokens(self, column, values, project_ids):
+        project_ids = list(project_ids or [])
+        session = sql.get_session()
+        token_list = []
+        with session.begin():
+            now = timeutils.utcnow()
+            # NOTE(dstanek): deleting the tokens of a whole domain can match
+            # many projects as well as many users, so both lists are split.
+            project_batches = list(sql.in_clause_batches(project_ids)) or [[]]
+            for batch in sql.in_clause_batches(values):
+                for project_batch in project_batches:
+                    query = session.query(TokenModel.id)
+                    query = query.filter_by(valid=True)
+                    query = query.filter(TokenModel.expires > now)
+                    query = query.filter(column.in_(batch))
+                    if project_batch:
+                        query = query.filter(
+                            TokenModel.project_id.in_(project_batch))
+                    token_list.extend(token_ref[0] for token_ref in query)
+
+            self._invalidate_tokens(session, token_list)
+
+        return token_list
+
+    def _invalidate_tokens(self, session, token_ids):
+        # NOTE(dstanek): the tokens are invalidated by ID, rather than by
+        # repeating the criteria used to find them, so that exactly the
+        # tokens that are reported as deleted (and so removed from the
+        # cache) are the ones invalidated.
+        for batch in sql.in_clause_batches(token_ids):
+            query = session.query(TokenModel)
+            query = query.filter(TokenModel.id.in_(batch))
+            query.update({'valid': False}, synchronize_session=False)
 
     def _list_tokens_for_trust(self, trust_id):
         session = sql.get_session()
@@ -184,34 +231,26 @@ class Token(token.persistence.Driver):
 
     def _list_tokens_for_user(self, user_id, tenant_id=None):
         session = sql.get_session()
-        tokens = []
         now = timeutils.utcnow()
-        query = session.query(TokenModel)
+        query = session.query(TokenModel.id)
         query = query.filter(TokenModel.expires > now)
         query = query.filter(TokenModel.user_id == user_id)
+        if tenant_id:
+            query = query.filter(TokenModel.project_id == tenant_id)
 
         token_references = query.filter_by(valid=True)
-        for token_ref in token_references:
-            token_ref_dict = token_ref.to_dict()
-            if self._tenant_matches(tenant_id, token_ref_dict):
-                tokens.append(token_ref['id'])
-        return tokens
+        return [token_ref[0] for token_ref in token_references]
 
     def _list_tokens_for_consumer(self, user_id, consumer_id):
-        tokens = []
         session = sql.get_session()
-        with session.begin():
-            now = timeutils.utcnow()
-            query = session.query(TokenModel)
-            query = query.filter(TokenModel.expires > now)
-            query = query.filter(TokenModel.user_id == user_id)
-            token_references = query.filter_by(valid=True)
+        now = timeutils.utcnow()
+        query = session.query(TokenModel.id)
+        query = query.filter(TokenModel.expires > now)
+        query = query.filter(TokenModel.user_id == user_id)
+        query = query.filter(TokenModel.consumer_id == consumer_id)
 
-            for token_ref in token_references:
-                token_ref_dict = token_ref.to_dict()
-                if self._consumer_matches(consumer_id, token_ref_dict):
-                    tokens.append(token_ref_dict['id'])
-        return tokens
+        token_references = query.filter_by(valid=True)
+        return [token_ref[0] for token_ref in token_references]
 
     def _list_tokens(self, user_id, tenant_id=None, trust_id=None,
                      consumer_id=None):
@@ -16,15 +16,21 @@
 
 import abc
 import copy
+import datetime
+import hashlib
+import itertools
 
 from oslo_config import cfg
 from oslo_log import log
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import six
 
 from keystone.common import cache
 from keystone.common import dependency
 from keystone.common import manager
+from keystone.common import signing
+from keystone.common import utils as ks_utils
 from keystone import exception
 from keystone.i18n import _LW
 from keystone.token import utils
@@ -114,11 +120,53 @@ class PersistenceManager(manager.Manager):
     def list_revoked_tokens(self):
         return self.driver.list_revoked_tokens()
 
+    def get_signed_revocation_list(self):
+        """Return the signed revocation list document.
+
+        The document is signed once and then cached until the revocation list
+        is invalidated or the first of the revoked tokens expires, whichever
+        comes first.
+
+        :returns: a dict with the ``signed`` document and its ``etag``
+
+        """
+        revocation_list = self._get_signed_revocation_list()
+        expires = revocation_list['expires']
+        if expires and expires <= timeutils.utcnow():
+            # Let the expired token drop out of the list.
+            self.invalidate_revocation_list()
+            revocation_list = self._get_signed_revocation_list()
+        return revocation_list
+
+    @REVOCATION_MEMOIZE
+    def _get_signed_revocation_list(self):
+        revoked = []
+        expiries = []
+        for token_ref in self.list_revoked_tokens():
+            token_ref = dict(token_ref)
+            expires = token_ref.get('expires')
+            if isinstance(expires, datetime.datetime):
+                token_ref['expires'] = ks_utils.isotime(expires)
+            elif isinstance(expires, six.string_types):
+                expires = timeutils.parse_isotime(expires)
+            if expires:
+                expiries.append(timeutils.normalize_time(expires))
+            revoked.append(token_ref)
+
+        signed = signing.cms_sign_text(jsonutils.dumps({'revoked': revoked}),
+                                       CONF.signing.certfile,
+                                       CONF.signing.keyfile)
+        etag = hashlib.sha256(signed.encode('utf-8')).hexdigest()
+        return {'signed': signed,
+                'etag': '"%s"' % etag,
+                'expires': min(expiries) if expiries else None}
+
     def invalidate_revocation_list(self):
         # NOTE(morganfainberg): Note that ``self`` needs to be passed to
         # invalidate() because of the way the invalidation method works on
         # determining cache-keys.
         self.list_revoked_tokens.invalidate(self)
+        self._get_signed_revocation_list.invalidate(self)
 
     def delete_tokens_for_domain(self, domain_id):
         """Delete all tokens for a given domain.
@@ -132,12 +180,17 @@ class PersistenceManager(manager.Manager):
         """
         if not CONF.token.revoke_by_id:
             return
-        projects = self.resource_api.list_projects()
-        for project in projects:
-            if project['domain_id'] == domain_id:
-                for user_id in self.assignment_api.list_user_ids_for_project(
-                        project['id']):
-                    self.delete_tokens_for_user(user_id, project['id'])
+        try:
+            projects = self.resource_api.list_projects_in_domain(domain_id)
+        except exception.DomainNotFound:
+            # NOTE(dstanek): by the time a deleted domain is reported its
+            # projects are gone as well, so only its users are left.
+            projects = []
+        project_ids = [project['id'] for project in projects]
+        if project_ids:
+            user_ids = self.assignment_api.list_user_ids_for_projects(
+                project_ids)
+            self._delete_tokens_for_users(user_ids, project_ids=project_ids)
         # TODO(morganfainberg): implement deletion of domain_scoped tokens.
 
         users = self.identity_api.list_users(domain_id)
@@ -182,8 +235,30 @@ class PersistenceManager(manager.Manager):
         """
         if not CONF.token.revoke_by_id:
             return
-        for user_id in user_ids:
-            self.delete_tokens_for_user(user_id, project_id=project_id)
+        project_ids = [project_id] if project_id else None
+        self._delete_tokens_for_users(user_ids, project_ids=project_ids)
+
+    def _delete_tokens_for_users(self, user_ids, project_ids=None):
+        """Delete the tokens of many users, and of their trusts, in bulk.
+
+        This is the bulk equivalent of calling ``delete_tokens_for_user`` for
+        each user and project combination.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        trusts = self.trust_api.list_trusts_for_users(user_ids)
+
+        token_list = self.driver.delete_tokens_for_users(
+            user_ids, project_ids=project_ids)
+        if trusts:
+            token_list += self.driver.delete_tokens_for_trusts(
+                trusts, project_ids=project_ids)
+
+        for token_id in token_list:
+            unique_id = utils.generate_unique_id(token_id)
+            self._invalidate_individual_token_cache(unique_id)
+        self.invalidate_revocation_list()
 
     def _invalidate_individual_token_cache(self, token_id):
         # NOTE(morganfainberg): invalidate takes the exact same arguments as
@@ -321,6 +396,78 @@ class Driver(object):
                 pass
         return token_list
 
+    def delete_tokens_for_users(self, user_ids, project_ids=None):
+        """Deletes the tokens of several users at once.
+
+        Drivers that can match many tokens in a single operation should
+        override this; the default deletes the tokens user by user.
+
+        :param user_ids: identities of the users
+        :type user_ids: list
+        :param project_ids: if not None, only delete the tokens scoped to one
+                            of these projects
+        :type project_ids: list
+        :returns: The tokens that have been deleted.
+
+        """
+        if project_ids is None:
+            token_list = []
+            for user_id in user_ids:
+                token_list.extend(self.delete_tokens(user_id) or [])
+            return token_list
+        return self._delete_tokens_in_projects(
+            (self._list_tokens(user_id) for user_id in user_ids),
+            project_ids)
+
+    def delete_tokens_for_trusts(self, trusts, project_ids=None):
+        """Deletes the tokens issued for several trusts at once.
+
+        Drivers that can match many tokens in a single operation should
+        override this; the default deletes the tokens trust by trust.
+
+        :param trusts: trust references, each with at least an ``id`` and a
+                       ``trustee_user_id``
+        :type trusts: list
+        :param project_ids: if not None, only delete the tokens scoped to one
+                            of these projects
+        :type project_ids: list
+        :returns: The tokens that have been deleted.
+
+        """
+        if project_ids is None:
+            token_list = []
+            for trust in trusts:
+                token_list.extend(
+                    self.delete_tokens(trust['trustee_user_id'],
+                                       trust_id=trust['id']) or [])
+            return token_list
+        return self._delete_tokens_in_projects(
+            (self._list_tokens(trust['trustee_user_id'], trust_id=trust['id'])
+             for trust in trusts),
+            project_ids)
+
+    def _delete_tokens_in_projects(self, token_lists, project_ids):
+        """Delete the listed tokens that are scoped to one of the projects.
+
+        Each list of tokens is only gone through once, however many projects
+        are given, rather than once for every project.
+        """
+        project_ids = set(project_ids)
+        token_list = []
+        for token_id in itertools.chain.from_iterable(token_lists):
+            try:
+                token_ref = self.get_token(token_id)
+            except exception.TokenNotFound:
+                continue
+            if (token_ref.get('tenant') or {}).get('id') not in project_ids:
+                continue
+            try:
+                self.delete_token(token_id)
+            except exception.NotFound:
+                pass
+            token_list.append(token_id)
+        return token_list
+
     @abc.abstractmethod
     def _list_tokens(self, user_id, tenant_id=None, trust_id=None,
                      consumer_id=None):
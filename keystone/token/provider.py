@@ -185,9 +185,11 @@ class Manager(manager.Manager):
         unique_id = utils.generate_unique_id(token_id)
         # NOTE(morganfainberg): Ensure we never use the long-form token_id
         # (PKI) as part of the cache_key.
-        token = self._validate_token(unique_id)
+        revoke_generation = self.revoke_api.get_revoke_generation()
+        token = self._validate_token(unique_id, revoke_generation)
         self._token_belongs_to(token, belongs_to)
-        self._is_valid_token(token)
+        self._is_valid_token(token,
+                             check_revocation=revoke_generation is None)
         return token
 
     def check_revocation_v2(self, token):
@@ -208,9 +210,11 @@ class Manager(manager.Manager):
             token_ref = self._persistence.get_token(unique_id)
         else:
             token_ref = token_id
-        token = self._validate_v2_token(token_ref)
+        revoke_generation = self.revoke_api.get_revoke_generation()
+        token = self._validate_v2_token(token_ref, revoke_generation)
         self._token_belongs_to(token, belongs_to)
-        self._is_valid_token(token)
+        self._is_valid_token(token,
+                             check_revocation=revoke_generation is None)
         return token
 
     def check_revocation_v3(self, token):
@@ -241,31 +245,51 @@ class Manager(manager.Manager):
             # NOTE(morganfainberg): Ensure we never use the long-form token_id
             # (PKI) as part of the cache_key.
             token_ref = self._persistence.get_token(unique_id)
-        token = self._validate_v3_token(token_ref)
-        self._is_valid_token(token)
+        revoke_generation = self.revoke_api.get_revoke_generation()
+        token = self._validate_v3_token(token_ref, revoke_generation)
+        self._is_valid_token(token,
+                             check_revocation=revoke_generation is None)
         return token
 
+    # NOTE(dstanek): The validated tokens are cached together with the outcome
+    # of the revocation check. The revocation generation is part of the cache
+    # key, so a cached token is only trusted until a new revocation event is
+    # recorded; after that it is validated and checked again in full. Without
+    # revocation caching there is no generation (it is None), so only the
+    # token is cached and the caller checks revocation every time.
+
     @MEMOIZE
-    def _validate_token(self, token_id):
+    def _validate_token(self, token_id, revoke_generation):
         if not self._needs_persistence:
-            return self.driver.validate_v3_token(token_id)
-        token_ref = self._persistence.get_token(token_id)
-        version = self.driver.get_token_version(token_ref)
-        if version == self.V3:
-            return self.driver.validate_v3_token(token_ref)
-        elif version == self.V2:
-            return self.driver.validate_v2_token(token_ref)
-        raise exception.UnsupportedTokenVersionException()
+            token = self.driver.validate_v3_token(token_id)
+        else:
+            token_ref = self._persistence.get_token(token_id)
+            version = self.driver.get_token_version(token_ref)
+            if version == self.V3:
+                token = self.driver.validate_v3_token(token_ref)
+            elif version == self.V2:
+                token = self.driver.validate_v2_token(token_ref)
+            else:
+                raise exception.UnsupportedTokenVersionException()
+        if revoke_generation is not None:
+            self.check_revocation(token)
+        return token
 
     @MEMOIZE
-    def _validate_v2_token(self, token_id):
-        return self.driver.validate_v2_token(token_id)
+    def _validate_v2_token(self, token_id, revoke_generation):
+        token = self.driver.validate_v2_token(token_id)
+        if revoke_generation is not None:
+            self.check_revocation_v2(token)
+        return token
 
     @MEMOIZE
-    def _validate_v3_token(self, token_id):
-        return self.driver.validate_v3_token(token_id)
+    def _validate_v3_token(self, token_id, revoke_generation):
+        token = self.driver.validate_v3_token(token_id)
+        if revoke_generation is not None:
+            self.check_revocation_v3(token)
+        return token
 
-    def _is_valid_token(self, token):
+    def _is_valid_token(self, token, check_revocation=True):
         """Verify the token is valid format and has not expired."""
 
         current_time = timeutils.normalize_time(timeutils.utcnow())
@@ -286,7 +310,8 @@ class Manager(manager.Manager):
             raise exception.TokenNotFound(_('Failed to validate token'))
 
         if current_time < expiry:
-            self.check_revocation(token)
+            if check_revocation:
+                self.check_revocation(token)
             # Token has not expired and has not been revoked.
             return None
         else:
@@ -372,9 +397,10 @@ class Manager(manager.Manager):
         # consulted before accepting a token as valid.  For now we will
         # do the explicit individual token invalidation.
 
-        self._validate_token.invalidate(self, token_id)
-        self._validate_v2_token.invalidate(self, token_id)
-        self._validate_v3_token.invalidate(self, token_id)
+        revoke_generation = self.revoke_api.get_revoke_generation()
+        self._validate_token.invalidate(self, token_id, revoke_generation)
+        self._validate_v2_token.invalidate(self, token_id, revoke_generation)
+        self._validate_v3_token.invalidate(self, token_id, revoke_generation)
 
     def revoke_token(self, token_id, revoke_chain=False):
         revoke_by_expires = False
@@ -419,6 +445,13 @@ class Manager(manager.Manager):
     def list_revoked_tokens(self):
         return self._persistence.list_revoked_tokens()
 
+    def get_signed_revocation_list(self):
+        return self._persistence.get_signed_revocation_list()
+
+    # NOTE(dstanek): the revocation events recorded for the same notifications
+    # already invalidate these tokens, so deleting them from persistence can
+    # be deferred. There is no such event for a user's tokens on a project.
+    @notifications.deferrable
     def _trust_deleted_event_callback(self, service, resource_type, operation,
                                       payload):
         if CONF.token.revoke_by_id:
@@ -427,12 +460,14 @@ class Manager(manager.Manager):
             self._persistence.delete_tokens(user_id=trust['trustor_user_id'],
                                             trust_id=trust_id)
 
+    @notifications.deferrable
     def _delete_user_tokens_callback(self, service, resource_type, operation,
                                      payload):
         if CONF.token.revoke_by_id:
             user_id = payload['resource_info']
             self._persistence.delete_tokens_for_user(user_id)
 
+    @notifications.deferrable
     def _delete_domain_tokens_callback(self, service, resource_type,
                                        operation, payload):
         if CONF.token.revoke_by_id:
@@ -447,6 +482,7 @@ class Manager(manager.Manager):
             self._persistence.delete_tokens_for_user(user_id=user_id,
                                                      project_id=project_id)
 
+    @notifications.deferrable
     def _delete_project_tokens_callback(self, service, resource_type,
                                         operation, payload):
         if CONF.token.revoke_by_id:
@@ -455,6 +491,7 @@ class Manager(manager.Manager):
                 self.assignment_api.list_user_ids_for_project(project_id),
                 project_id=project_id)
 
+    @notifications.deferrable
     def _delete_user_oauth_consumer_tokens_callback(self, service,
                                                     resource_type, operation,
                                                     payload):
@@ -12,6 +12,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from multiprocessing import pool
+import sys
+import threading
+
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
 from oslo_log import versionutils
@@ -32,6 +37,31 @@ from keystone.token import provider
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
 
+# Number of backend lookups for new tokens that may run at the same time in
+# a process when ``[token] concurrent_data_fetch`` is enabled.
+DATA_FETCH_POOL_SIZE = 16
+
+_data_fetch_pool = None
+_data_fetch_pool_lock = threading.Lock()
+
+
+def _get_data_fetch_pool():
+    """Return the pool running concurrent token data lookups.
+
+    The pool is created on first use, so that worker processes forked by the
+    server don't inherit the threads of their parent, and is reused after
+    that. Under eventlet it is a pool of green threads.
+
+    """
+    global _data_fetch_pool
+    with _data_fetch_pool_lock:
+        if _data_fetch_pool is None:
+            if eventlet.patcher.is_monkey_patched('thread'):
+                _data_fetch_pool = eventlet.GreenPool(DATA_FETCH_POOL_SIZE)
+            else:
+                _data_fetch_pool = pool.ThreadPool(DATA_FETCH_POOL_SIZE)
+        return _data_fetch_pool
+
 
 @dependency.requires('catalog_api', 'resource_api')
 class V2TokenDataHelper(object):
@@ -219,6 +249,46 @@ class V3TokenDataHelper(object):
             project_ref['domain_id'])
         return filtered_project
 
+    def _populate_concurrently(self, token_data, calls):
+        """Run independent ``_populate_*`` calls and merge their results.
+
+        Each call is given its own copy of ``token_data`` and, when
+        ``[token] concurrent_data_fetch`` is enabled, runs in the shared data
+        fetch pool.
+        The copies are merged back in the order the calls were given, and the
+        first call to fail in that order has its exception raised, so the
+        result is the same as running the calls one after another.
+
+        """
+        if not CONF.token.concurrent_data_fetch:
+            for fn, args in calls:
+                fn(token_data, *args)
+            return
+
+        parts = [dict(token_data) for _call in calls]
+        errors = [None] * len(calls)
+
+        def run(index, fn, args):
+            try:
+                fn(parts[index], *args)
+            except Exception:
+                errors[index] = sys.exc_info()
+
+        data_fetch_pool = _get_data_fetch_pool()
+        if isinstance(data_fetch_pool, eventlet.GreenPool):
+            results = [data_fetch_pool.spawn(run, i, fn, args)
+                       for i, (fn, args) in enumerate(calls)]
+        else:
+            results = [data_fetch_pool.apply_async(run, (i, fn, args))
+                       for i, (fn, args) in enumerate(calls)]
+        for result in results:
+            result.wait()
+
+        for part, error in zip(parts, errors):
+            if error is not None:
+                six.reraise(*error)
+            token_data.update(part)
+
     def _populate_scope(self, token_data, domain_id, project_id):
         if 'domain' in token_data or 'project' in token_data:
             # scope already exist, no need to populate it again
@@ -453,16 +523,20 @@ class V3TokenDataHelper(object):
         if bind:
             token_data['bind'] = bind
 
-        self._populate_scope(token_data, domain_id, project_id)
-        self._populate_user(token_data, user_id, trust)
-        self._populate_roles(token_data, user_id, domain_id, project_id, trust,
-                             access_token)
         self._populate_audit_info(token_data, audit_info)
 
+        calls = [
+            (self._populate_scope, (domain_id, project_id)),
+            (self._populate_user, (user_id, trust)),
+            (self._populate_roles, (user_id, domain_id, project_id, trust,
+                                    access_token)),
+        ]
         if include_catalog:
-            self._populate_service_catalog(token_data, user_id, domain_id,
-                                           project_id, trust)
-        self._populate_service_providers(token_data)
+            calls.append((self._populate_service_catalog,
+                          (user_id, domain_id, project_id, trust)))
+        calls.append((self._populate_service_providers, ()))
+        self._populate_concurrently(token_data, calls)
+
         self._populate_token_dates(token_data, expires=expires, trust=trust,
                                    issued_at=issued_at)
         self._populate_oauth_section(token_data, access_token)
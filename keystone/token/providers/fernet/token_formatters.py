@@ -39,6 +39,10 @@ LOG = log.getLogger(__name__)
 TIMESTAMP_START = 1
 TIMESTAMP_END = 9
 
+# A process-wide cache of the MultiFernet instance built from the key
+# repository, paired with the key repository signature it was built from.
+_CRYPTO_CACHE = (None, None)
+
 
 class TokenFormatter(object):
     """Packs and unpacks payloads into tokens for transport."""
@@ -55,14 +59,35 @@ class TokenFormatter(object):
         This @property just needs to return an object that implements
         ``encrypt(plaintext)`` and ``decrypt(ciphertext)``.
 
+        The instance is shared by the whole process and is only rebuilt when
+        the key repository changes on disk (for example, after a key rotation
+        or a key distribution), so that loading keys stays out of the token
+        issue and validation path.
+
         """
+        global _CRYPTO_CACHE
+
+        # NOTE(dstanek): the signature is taken before the keys are loaded so
+        # that a rotation racing with the load results in another reload on
+        # the next call, rather than in stale keys being cached.
+        signature = utils.key_repository_signature()
+        cached_signature, crypto = _CRYPTO_CACHE
+        if crypto is not None and signature is not None and (
+                signature == cached_signature):
+            return crypto
+
         keys = utils.load_keys()
 
         if not keys:
             raise exception.KeysNotFound()
 
         fernet_instances = [fernet.Fernet(key) for key in keys]
-        return fernet.MultiFernet(fernet_instances)
+        crypto = fernet.MultiFernet(fernet_instances)
+
+        # replace the cached pair in a single assignment so that concurrent
+        # callers never observe a signature paired with the wrong keys
+        _CRYPTO_CACHE = (signature, crypto)
+        return crypto
 
     def pack(self, payload):
         """Pack a payload for transport as a token."""
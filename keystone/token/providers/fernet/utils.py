@@ -224,6 +224,37 @@ def rotate_keys(keystone_user_id=None, keystone_group_id=None):
         os.remove(key_to_purge)
 
 
+def key_repository_signature():
+    """Return a value that changes whenever the key repository changes.
+
+    Key rotation adds, renames and removes files in the key repository, which
+    updates the modification time of the directory itself. Key distribution
+    may instead overwrite existing key files in place, which leaves the
+    directory untouched, so the modification time, size and inode of each
+    file are part of the signature as well. This takes a ``stat()`` per key
+    but does not open any of the key files, so it stays much cheaper than
+    :func:`load_keys`.
+
+    Returns ``None`` if the key repository cannot be inspected.
+
+    """
+    key_repository = CONF.fernet_tokens.key_repository
+    try:
+        stat_info = os.stat(key_repository)
+        files = []
+        for filename in sorted(os.listdir(key_repository)):
+            file_info = os.stat(os.path.join(key_repository, filename))
+            files.append((filename, file_info.st_ino, file_info.st_mtime,
+                          file_info.st_size))
+    except OSError:
+        return None
+
+    return (key_repository,
+            stat_info.st_ino,
+            stat_info.st_mtime,
+            tuple(files))
+
+
 def load_keys():
     """Load keys from disk into a list.
 
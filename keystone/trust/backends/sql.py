@@ -17,6 +17,7 @@ import time
 from oslo_log import log
 from oslo_utils import timeutils
 from six.moves import range
+import sqlalchemy
 
 from keystone.common import sql
 from keystone import exception
@@ -172,6 +173,20 @@ class Trust(trust.Driver):
                   filter_by(trustor_user_id=trustor_user_id))
         return [trust_ref.to_dict() for trust_ref in trusts]
 
+    @sql.handle_conflicts(conflict_type='trust')
+    def list_trusts_for_users(self, user_ids):
+        session = sql.get_session()
+        trusts = {}
+        for batch in sql.in_clause_batches(user_ids):
+            query = (session.query(TrustModel).
+                     filter_by(deleted_at=None).
+                     filter(sqlalchemy.or_(
+                         TrustModel.trustee_user_id.in_(batch),
+                         TrustModel.trustor_user_id.in_(batch))))
+            for trust_ref in query:
+                trusts[trust_ref.id] = trust_ref.to_dict()
+        return list(trusts.values())
+
     @sql.handle_conflicts(conflict_type='trust')
     def delete_trust(self, trust_id):
         with sql.transaction() as session:
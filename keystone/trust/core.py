@@ -238,6 +238,22 @@ class Driver(object):
     def list_trusts_for_trustor(self, trustor):
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_trusts_for_users(self, user_ids):
+        """List the trusts in which any of the users is trustee or trustor.
+
+        Drivers that can find the trusts of many users at once should
+        override this.
+
+        :returns: a list of trusts, each listed once.
+        """
+        trusts = {}
+        for user_id in user_ids:
+            for trust in self.list_trusts_for_trustee(user_id):
+                trusts[trust['id']] = trust
+            for trust in self.list_trusts_for_trustor(user_id):
+                trusts[trust['id']] = trust
+        return list(trusts.values())
+
     @abc.abstractmethod
     def delete_trust(self, trust_id):
         raise exception.NotImplemented()  # pragma: no cover
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare the rate of PKI token signing in process and with openssl.
+
+Usage::
+
+    python tools/benchmark_cms_signing.py [--count N] [--size BYTES]
+
+The example signing certificate and key are used unless others are given.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import time
+import uuid
+
+from keystoneclient.common import cms
+from oslo_serialization import jsonutils
+
+from keystone.common import signing
+
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples', 'pki')
+
+
+def _rate(sign, text, certfile, keyfile, count):
+    start = time.time()
+    for _i in range(count):
+        sign(text, certfile, keyfile)
+    return count / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200,
+                        help='number of tokens signed by each method')
+    parser.add_argument('--size', type=int, default=4096,
+                        help='approximate size of each token, in bytes')
+    parser.add_argument('--certfile',
+                        default=os.path.join(EXAMPLES, 'certs',
+                                             'signing_cert.pem'))
+    parser.add_argument('--keyfile',
+                        default=os.path.join(EXAMPLES, 'private',
+                                             'signing_key.pem'))
+    args = parser.parse_args()
+
+    text = jsonutils.dumps({'token': {'id': uuid.uuid4().hex,
+                                      'padding': 'x' * args.size}})
+    for name, keystoneclient_sign, keystone_sign in (
+            ('PKI', cms.cms_sign_token, signing.cms_sign_token),
+            ('PKIZ', cms.pkiz_sign, signing.pkiz_sign)):
+        openssl_rate = _rate(keystoneclient_sign, text, args.certfile,
+                             args.keyfile, args.count)
+        native_rate = _rate(keystone_sign, text, args.certfile,
+                            args.keyfile, args.count)
+        print('%-4s  openssl: %8.1f tokens/s  in process: %8.1f tokens/s  '
+              '(x%.1f)' % (name, openssl_rate, native_rate,
+                           native_rate / openssl_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare Fernet token packing with cached keys and with keys loaded per use.
+
+Usage::
+
+    python tools/benchmark_fernet_keys.py [--keys N] [--count N]
+
+A temporary key repository holding the given number of keys is used.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from cryptography import fernet
+from oslo_config import cfg
+
+from keystone.common import config
+from keystone.token.providers.fernet import token_formatters
+from keystone.token.providers.fernet import utils
+
+
+def _uncached_crypto():
+    return fernet.MultiFernet(
+        [fernet.Fernet(key) for key in utils.load_keys()])
+
+
+def _rate(get_crypto, count):
+    start = time.time()
+    for _i in range(count):
+        crypto = get_crypto()
+        crypto.decrypt(crypto.encrypt(b'payload'))
+    return count / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=3,
+                        help='number of keys in the key repository')
+    parser.add_argument('--count', type=int, default=5000,
+                        help='number of payloads packed and unpacked')
+    args = parser.parse_args()
+
+    config.configure()
+    cfg.CONF([], project='keystone')
+
+    key_repository = tempfile.mkdtemp()
+    try:
+        os.chmod(key_repository, 0o700)
+        for i in range(args.keys):
+            with open(os.path.join(key_repository, str(i)), 'w') as f:
+                f.write(fernet.Fernet.generate_key().decode('utf-8'))
+        cfg.CONF.set_override('key_repository', key_repository,
+                              group='fernet_tokens')
+        cfg.CONF.set_override('max_active_keys', args.keys,
+                              group='fernet_tokens')
+
+        formatter = token_formatters.TokenFormatter()
+        cached_rate = _rate(lambda: formatter.crypto, args.count)
+        uncached_rate = _rate(_uncached_crypto, args.count)
+    finally:
+        shutil.rmtree(key_repository)
+
+    print('%d keys  loaded per use: %8.1f tokens/s  cached: %8.1f tokens/s  '
+          '(x%.1f)' % (args.keys, uncached_rate, cached_rate,
+                       cached_rate / uncached_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Measure the rate at which a large federation mapping processes assertions.
+
+Usage::
+
+    python tools/benchmark_mapping.py [--rules N] [--values N] [--count N]
+
+The rate is given both for a mapping compiled once and reused, as the
+federation manager does, and for a mapping compiled for every assertion.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+import uuid
+
+from oslo_config import cfg
+
+from keystone.common import config
+from keystone.contrib.federation import utils
+
+
+def _mapping(rule_count, value_count):
+    rules = []
+    for i in range(rule_count):
+        values = ['group-%d-%d' % (i, j) for j in range(value_count)]
+        rules.append({
+            'local': [{'user': {'name': '{0}'}},
+                      {'group': {'id': uuid.uuid4().hex}}],
+            'remote': [{'type': 'UserName'},
+                       {'type': 'Groups', 'any_one_of': values},
+                       {'type': 'Email', 'regex': True,
+                        'any_one_of': ['.*@example%d\\.com$' % i]},
+                       {'type': 'orgPersonType',
+                        'not_any_of': ['Contractor', 'Guest']}]})
+    return rules
+
+
+def _assertions(rule_count, value_count, count):
+    for i in range(count):
+        rule = i % rule_count
+        yield {'UserName': 'user%d' % i,
+               'Groups': 'group-%d-%d;other' % (rule, i % value_count),
+               'Email': 'user%d@example%d.com' % (i, rule),
+               'orgPersonType': 'Employee'}
+
+
+def _rate(process, assertions):
+    start = time.time()
+    for assertion in assertions:
+        process(assertion)
+    return len(assertions) / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=200,
+                        help='number of rules in the mapping')
+    parser.add_argument('--values', type=int, default=50,
+                        help='number of any_one_of values in each rule')
+    parser.add_argument('--count', type=int, default=500,
+                        help='number of assertions processed')
+    args = parser.parse_args()
+
+    config.configure()
+    cfg.CONF([], project='keystone')
+
+    rules = _mapping(args.rules, args.values)
+    assertions = list(_assertions(args.rules, args.values, args.count))
+
+    rule_processor = utils.RuleProcessor(rules)
+    compiled_rate = _rate(rule_processor.process, assertions)
+    uncompiled_rate = _rate(
+        lambda assertion: utils.RuleProcessor(rules).process(assertion),
+        assertions)
+    print('%d rules  compiled per assertion: %8.1f assertions/s  '
+          'compiled once: %8.1f assertions/s  (x%.1f)' %
+          (args.rules, uncompiled_rate, compiled_rate,
+           compiled_rate / uncompiled_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Measure token revocation checks against many active revocation events.
+
+Usage::
+
+    python tools/benchmark_revoke_index.py [--events N [N ...]] [--count N]
+
+The events are a mix of user, user and project, audit ID and domain events,
+as recorded when users are disabled, roles are removed and tokens are revoked.
+Each revocation structure is timed checking the same tokens, most of which
+match no event.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import time
+import uuid
+
+from oslo_utils import timeutils
+
+from keystone.contrib.revoke import model
+
+
+def _events(count, ids):
+    revoked_at = timeutils.utcnow()
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            values = {'user_id': ids[i % len(ids)]}
+        elif kind == 1:
+            values = {'user_id': ids[i % len(ids)],
+                      'project_id': ids[(i + 1) % len(ids)]}
+        elif kind == 2:
+            values = {'audit_id': uuid.uuid4().hex}
+        else:
+            values = {'domain_id': uuid.uuid4().hex}
+        yield model.RevokeEvent(revoked_at=revoked_at, **values)
+
+
+def _tokens(count, ids):
+    issued_at = timeutils.utcnow() - datetime.timedelta(minutes=5)
+    for i in range(count):
+        token_data = model.blank_token_data(issued_at)
+        # one token in ten belongs to a user who has been revoked
+        user_id = ids[i % len(ids)] if i % 10 == 0 else uuid.uuid4().hex
+        token_data.update({'user_id': user_id,
+                           'project_id': uuid.uuid4().hex,
+                           'identity_domain_id': 'default',
+                           'assignment_domain_id': 'default',
+                           'audit_id': uuid.uuid4().hex,
+                           'roles': [uuid.uuid4().hex, uuid.uuid4().hex]})
+        yield token_data
+
+
+def _rate(structure, tokens):
+    start = time.time()
+    for token_data in tokens:
+        structure.is_revoked(token_data)
+    return len(tokens) / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, nargs='+',
+                        default=[10000, 100000],
+                        help='numbers of active revocation events')
+    parser.add_argument('--count', type=int, default=1000,
+                        help='number of tokens checked')
+    args = parser.parse_args()
+
+    for event_count in args.events:
+        ids = [uuid.uuid4().hex for _i in range(event_count // 4 or 1)]
+        events = list(_events(event_count, ids))
+        tokens = list(_tokens(args.count, ids))
+
+        tree_rate = _rate(model.RevokeTree(events), tokens)
+        index_rate = _rate(model.RevokeIndex(events), tokens)
+        print('%7d events  tree: %10.1f checks/s (%8.3f ms)  '
+              'index: %10.1f checks/s (%8.3f ms)  (x%.1f)' %
+              (event_count, tree_rate, 1000.0 / tree_rate,
+               index_rate, 1000.0 / index_rate, index_rate / tree_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare the rate of SAML assertion signing in process and with xmlsec1.
+
+Usage::
+
+    python tools/benchmark_saml_signing.py [--count N] [--roles N]
+
+The example signing certificate and key are used unless others are given.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import time
+
+from oslo_config import cfg
+
+from keystone.common import config
+from keystone.contrib.federation import idp
+
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'examples', 'pki')
+
+
+def _rate(signer, roles, count):
+    cfg.CONF.set_override('assertion_signer', signer, group='saml')
+    start = time.time()
+    for _i in range(count):
+        idp.SAMLGenerator().samlize_token(
+            'https://idp.example.com/v3/OS-FEDERATION/saml2/idp',
+            'https://sp.example.com/Shibboleth.sso/SAML2/ECP',
+            'user', 'Default', roles, 'project', 'Default')
+    return count / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200,
+                        help='number of assertions signed by each method')
+    parser.add_argument('--roles', type=int, default=5,
+                        help='number of roles in each assertion')
+    parser.add_argument('--certfile',
+                        default=os.path.join(EXAMPLES, 'certs',
+                                             'signing_cert.pem'))
+    parser.add_argument('--keyfile',
+                        default=os.path.join(EXAMPLES, 'private',
+                                             'signing_key.pem'))
+    args = parser.parse_args()
+
+    config.configure()
+    cfg.CONF([], project='keystone')
+    cfg.CONF.set_override('certfile', args.certfile, group='saml')
+    cfg.CONF.set_override('keyfile', args.keyfile, group='saml')
+
+    roles = ['role%d' % i for i in range(args.roles)]
+    internal_rate = _rate('internal', roles, args.count)
+    xmlsec1_rate = _rate('xmlsec1', roles, args.count)
+    print('xmlsec1: %8.1f assertions/s  in process: %8.1f assertions/s  '
+          '(x%.1f)' % (xmlsec1_rate, internal_rate,
+                       internal_rate / xmlsec1_rate))
+
+
+if __name__ == '__main__':
+    main()